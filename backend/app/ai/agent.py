@@ -1,7 +1,12 @@
-import json
 from typing import List, Dict, Any, Optional
-from openai import AsyncOpenAI
+from app.ai.context7_client import context7_client
+from app.ai.llm_gateway import LLMGateway, LLMGatewayError
+from app.ai.prompts import comparison_prompt, recommendation_prompt
+from app.ai.recommendation_engine import ScoredUniversity, format_recommendations, recommendation_engine
 from app.core.config import settings
+from app.core.offload import offload
+from app.core.singleflight import get_singleflight, make_key
+from app.models.university import University
 from app.services.university_service import UniversityService
 
 
@@ -12,10 +17,16 @@ class UniversityAIAgent:
     """
 
     def __init__(self):
-        self.client = AsyncOpenAI(api_key=settings.openai_api_key)
+        self.gateway = LLMGateway()
         self.model = "gpt-4o-mini"
         # Simple in-memory storage for conversation history
         self.sessions: Dict[str, List[Dict[str, Any]]] = {}
+        # Identical prompts in flight at the same time share one completion
+        self.llm_flight = get_singleflight("llm")
+
+    @property
+    def client(self):
+        return self.gateway.client
 
     async def recommend_universities(
         self,
@@ -23,59 +34,90 @@ class UniversityAIAgent:
         user_query: str,
         user_score: Optional[float] = None,
         preferred_country: Optional[str] = None,
-        preferred_specialty: Optional[str] = None
+        preferred_specialty: Optional[str] = None,
+        mode: str = "auto"
     ) -> Dict[str, Any]:
         """
         Main recommendation endpoint.
         Provides personalized university recommendations based on user criteria.
-        """
 
-        # Retrieve past context from session storage
-        past_messages = self.sessions.get(session_id, [])
-        context_summary = self._summarize_context(past_messages)
+        Candidates are pre-ranked by the offline recommendation engine. In "auto"
+        mode the shortlist is sent to the LLM and the engine's ranking is served
+        if the LLM is unavailable or over budget; "offline" skips the LLM and
+        "llm" never falls back.
+        """
 
         # Fetch relevant universities from database
-        universities, total = await UniversityService.get_all_universities(
-            skip=0,
-            limit=50,
+        universities, total = await UniversityService.get_recommendation_candidates(
+            limit=settings.reco_candidate_limit,
             country=preferred_country,
             specialty=preferred_specialty,
             min_score=user_score
         )
 
-        # Filter universities based on score if provided
-        if user_score:
-            filtered_universities = []
-            for uni in universities:
-                matching_requirements = [
-                    req for req in uni.requirements
-                    if req.minimum_score <= user_score
-                ]
-                if matching_requirements:
-                    filtered_universities.append(uni)
-            universities = filtered_universities[:10]
-        else:
-            universities = universities[:10]
+        return await self.recommend_from_candidates(
+            universities,
+            total,
+            session_id=session_id,
+            user_query=user_query,
+            user_score=user_score,
+            preferred_country=preferred_country,
+            preferred_specialty=preferred_specialty,
+            mode=mode
+        )
+
+    async def recommend_from_candidates(
+        self,
+        universities: List[University],
+        total: int,
+        session_id: Optional[str],
+        user_query: str,
+        user_score: Optional[float] = None,
+        preferred_country: Optional[str] = None,
+        preferred_specialty: Optional[str] = None,
+        mode: str = "auto"
+    ) -> Dict[str, Any]:
+        """
+        Recommend from an already fetched candidate list.
+        Used by batch jobs to share one fetch between students; no session history
+        is read or written when session_id is None.
+        """
+
+        # Retrieve past context from session storage
+        past_messages = self.sessions.get(session_id, []) if session_id else []
+        context_summary = self._summarize_context(past_messages)
+
+        # Rank locally and keep only the shortlist for the prompt
+        shortlist = recommendation_engine.rank(
+            universities,
+            user_score=user_score,
+            preferred_specialty=preferred_specialty,
+            limit=settings.reco_shortlist_size
+        )
+
+        if mode == "offline" or (mode == "auto" and not self.gateway.api_key):
+            return self._offline_result(session_id, user_query, shortlist, total)
 
         # Prepare university data for GPT
         university_data = [
             {
-                "name": uni.name,
-                "country": uni.country,
-                "city": uni.city,
-                "ranking": uni.ranking,
-                "specialties": uni.specialty_names,
+                "name": item.university.name,
+                "country": item.university.country,
+                "city": item.university.city,
+                "ranking": item.university.ranking,
+                "specialties": item.university.specialty_names,
                 "requirements": [
                     {
                         "specialty": req.specialty_name,
                         "min_score": req.minimum_score,
                         "exams": req.exams
-                    } for req in uni.requirements
+                    } for req in item.university.requirements
                 ],
-                "tuition_fee_usd": uni.tuition_fee_usd,
-                "acceptance_rate": uni.acceptance_rate
+                "tuition_fee_usd": item.university.tuition_fee_usd,
+                "acceptance_rate": item.university.acceptance_rate,
+                "match_score": round(item.score, 3)
             }
-            for uni in universities
+            for item in shortlist
         ]
 
         # Build system prompt
@@ -97,55 +139,86 @@ class UniversityAIAgent:
 
         messages.append({
             "role": "user",
-            "content": f"""User query: {user_query}
-
-Available universities:
-{json.dumps(university_data, indent=2)}
-
-Please provide:
-1. Top 3-5 recommended universities with reasoning
-2. Comparison of pros/cons for each
-3. Explanation of why these match the user's criteria
-4. Any additional advice for the application process"""
+            "content": await offload(recommendation_prompt, user_query, university_data)
         })
 
         # Call OpenAI for recommendations
         try:
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                max_tokens=2000,
-                temperature=0.7
-            )
-
-            response_text = response.choices[0].message.content
+            response_text = await self._complete(messages, max_tokens=2000, temperature=0.7)
 
-            # Store interaction in session
-            if session_id not in self.sessions:
-                self.sessions[session_id] = []
-
-            self.sessions[session_id].append({"role": "user", "content": user_query})
-            self.sessions[session_id].append({"role": "assistant", "content": response_text})
-
-            # Keep only last 20 messages to prevent memory issues
-            if len(self.sessions[session_id]) > 20:
-                self.sessions[session_id] = self.sessions[session_id][-20:]
+            self._remember(session_id, user_query, response_text)
 
             return {
                 "success": True,
+                "source": "llm",
                 "recommendations": response_text,
-                "universities_analyzed": len(universities),
+                "ranked_universities": [item.to_dict() for item in shortlist],
+                "universities_analyzed": len(shortlist),
                 "total_universities_available": total,
                 "session_id": session_id
             }
 
+        except LLMGatewayError as e:
+            if mode == "auto":
+                result = self._offline_result(session_id, user_query, shortlist, total)
+                result["fallback_reason"] = str(e)
+                return result
+            return {
+                "success": False,
+                "error": str(e),
+                "status_code": e.status_code,
+                "retry_after": e.retry_after,
+                "universities_analyzed": len(shortlist)
+            }
         except Exception as e:
             return {
                 "success": False,
                 "error": str(e),
-                "universities_analyzed": len(universities)
+                "universities_analyzed": len(shortlist)
             }
 
+    def _offline_result(
+        self,
+        session_id: Optional[str],
+        user_query: str,
+        shortlist: List[ScoredUniversity],
+        total: int
+    ) -> Dict[str, Any]:
+        """Build a recommendation response from the local ranking alone."""
+        response_text = format_recommendations(shortlist)
+        self._remember(session_id, user_query, response_text)
+
+        return {
+            "success": True,
+            "source": "offline",
+            "recommendations": response_text,
+            "ranked_universities": [item.to_dict() for item in shortlist],
+            "universities_analyzed": len(shortlist),
+            "total_universities_available": total,
+            "session_id": session_id
+        }
+
+    def _remember(self, session_id: Optional[str], user_query: str, response_text: str) -> None:
+        """Store an interaction in the session history."""
+        if not session_id:
+            return
+        if session_id not in self.sessions:
+            self.sessions[session_id] = []
+
+        self.sessions[session_id].append({"role": "user", "content": user_query})
+        self.sessions[session_id].append({"role": "assistant", "content": response_text})
+
+        # Keep only last 20 messages to prevent memory issues
+        if len(self.sessions[session_id]) > 20:
+            self.sessions[session_id] = self.sessions[session_id][-20:]
+
+        # Mirror to long-term memory; batched, so this never waits on the network
+        context7_client.enqueue_context(
+            session_id,
+            {"query": user_query, "response": response_text},
+            tags=["recommendation"]
+        )
+
     async def compare_universities(
         self,
         session_id: str,
@@ -159,7 +232,8 @@ Please provide:
         # Fetch universities by name
         all_universities = []
         for name in university_names:
-            universities = await UniversityService.search_universities(name)
+            # Only a handful of fields go into the prompt: skip model hydration
+            universities = await UniversityService.search_universities(name, raw=True)
             if universities:
                 all_universities.extend(universities)
 
@@ -172,20 +246,20 @@ Please provide:
         # Prepare data
         university_data = [
             {
-                "name": uni.name,
-                "country": uni.country,
-                "city": uni.city,
-                "ranking": uni.ranking,
-                "specialties": uni.specialty_names,
-                "tuition_fee_usd": uni.tuition_fee_usd,
-                "acceptance_rate": uni.acceptance_rate,
-                "student_count": uni.student_count,
+                "name": uni["name"],
+                "country": uni["country"],
+                "city": uni["city"],
+                "ranking": uni["ranking"],
+                "specialties": uni["specialty_names"],
+                "tuition_fee_usd": uni["tuition_fee_usd"],
+                "acceptance_rate": uni["acceptance_rate"],
+                "student_count": uni["student_count"],
                 "requirements": [
                     {
-                        "specialty": req.specialty_name,
-                        "min_score": req.minimum_score,
-                        "exams": req.exams
-                    } for req in uni.requirements
+                        "specialty": req["specialty_name"],
+                        "min_score": req["minimum_score"],
+                        "exams": req["exams"]
+                    } for req in uni["requirements"]
                 ]
             }
             for uni in all_universities
@@ -197,27 +271,11 @@ Please provide:
 
         messages = [
             {"role": "system", "content": "You are a university advisor. Compare universities objectively."},
-            {"role": "user", "content": f"""Compare these universities based on: {', '.join(criteria)}
-
-Universities:
-{json.dumps(university_data, indent=2)}
-
-Provide:
-1. Side-by-side comparison table
-2. Key differences
-3. Which university is better for specific goals
-4. Overall recommendation"""}
+            {"role": "user", "content": await offload(comparison_prompt, criteria, university_data)}
         ]
 
         try:
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                max_tokens=1500,
-                temperature=0.7
-            )
-
-            response_text = response.choices[0].message.content
+            response_text = await self._complete(messages, max_tokens=1500, temperature=0.7)
 
             # Store in session
             if session_id not in self.sessions:
@@ -235,12 +293,39 @@ Provide:
                 "universities_compared": len(all_universities)
             }
 
+        except LLMGatewayError as e:
+            return {
+                "success": False,
+                "error": str(e),
+                "status_code": e.status_code,
+                "retry_after": e.retry_after
+            }
         except Exception as e:
             return {
                 "success": False,
                 "error": str(e)
             }
 
+    async def _complete(
+        self,
+        messages: List[Dict[str, Any]],
+        max_tokens: int,
+        temperature: float
+    ) -> str:
+        """Run a chat completion, coalescing identical concurrent prompts."""
+
+        async def call() -> str:
+            response = await self.gateway.chat(
+                model=self.model,
+                messages=messages,
+                max_tokens=max_tokens,
+                temperature=temperature
+            )
+            return response.choices[0].message.content
+
+        key = make_key(self.model, messages, max_tokens=max_tokens, temperature=temperature)
+        return await self.llm_flight.do(key, call)
+
     def _build_system_prompt(
         self,
         context_summary: str,
@@ -0,0 +1,213 @@
+import asyncio
+import os
+import socket
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set, Tuple
+from beanie import PydanticObjectId
+from app.ai.agent import ai_agent
+from app.core.config import settings
+from app.models.recommendation_job import RecommendationJob, StudentProfile
+from app.models.university import University
+from app.services.university_service import UniversityService
+
+
+class BatchJobManager:
+    """
+    Runs batch recommendation jobs on a bounded pool of asyncio workers.
+
+    Jobs live in the `recommendation_jobs` collection. Each student's result is
+    written as soon as it is ready, so a job interrupted by a restart resumes
+    with only the missing students. A worker claims a job atomically and keeps a
+    heartbeat on it. A clean shutdown hands the process's running jobs back to
+    the queue; after a crash they become claimable once their heartbeat is
+    older than the lease. Every process rescans for claimable jobs
+    periodically, so either kind is picked up by whichever process is alive.
+    """
+
+    def __init__(self):
+        self.worker_count = settings.batch_job_workers
+        self.student_concurrency = settings.batch_job_student_concurrency
+        self.lease = timedelta(seconds=settings.batch_job_lease_seconds)
+        self.rescan_interval = settings.batch_job_rescan_seconds
+        self.candidate_limit = settings.batch_candidate_limit
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        # Job ids in the local queue, so rescans don't enqueue them twice
+        self._enqueued: Set[PydanticObjectId] = set()
+
+    @property
+    def running(self) -> bool:
+        return bool(self._workers)
+
+    async def start(self) -> None:
+        self._queue = asyncio.Queue()
+        self._enqueued = set()
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.worker_count)]
+        resumed = await self.resume_pending()
+        if resumed:
+            print(f"[OK] Resumed {resumed} batch recommendation job(s)")
+        self._workers.append(asyncio.create_task(self._rescanner()))
+
+    async def stop(self) -> None:
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        # Hand interrupted jobs back: results written so far are kept, and the
+        # next process (or another live one) resumes with the missing students
+        try:
+            released = await self.release_claimed()
+        except Exception as e:
+            print(f"[WARNING] Could not release batch jobs: {str(e)[:100]}")
+            return
+        if released:
+            print(f"[OK] Released {released} running batch recommendation job(s)")
+
+    async def submit(self, students: List[StudentProfile], mode: str = "auto") -> RecommendationJob:
+        job = RecommendationJob(
+            students=students,
+            mode=mode,
+            results=[None] * len(students),
+            total=len(students)
+        )
+        await job.insert()
+        self._enqueue(job.id)
+        return job
+
+    def _enqueue(self, job_id: PydanticObjectId) -> bool:
+        if job_id in self._enqueued:
+            return False
+        self._enqueued.add(job_id)
+        self._queue.put_nowait(job_id)
+        return True
+
+    async def resume_pending(self) -> int:
+        """Queue every claimable job not already queued here; returns how many were added."""
+        cursor = RecommendationJob.get_motor_collection().find(self._claimable_filter(), {"_id": 1})
+        count = 0
+        async for doc in cursor:
+            count += self._enqueue(doc["_id"])
+        return count
+
+    async def release_claimed(self) -> int:
+        """Put this process's running jobs back in the queue, for use on shutdown."""
+        result = await RecommendationJob.get_motor_collection().update_many(
+            {"status": "running", "worker_id": self.worker_id},
+            {"$set": {"status": "queued", "worker_id": None, "updated_at": datetime.utcnow()}}
+        )
+        return result.modified_count
+
+    async def _rescanner(self) -> None:
+        while True:
+            await asyncio.sleep(self.rescan_interval)
+            try:
+                await self.resume_pending()
+            except Exception as e:
+                print(f"[WARNING] Batch job rescan failed: {str(e)[:100]}")
+
+    def _claimable_filter(self) -> dict:
+        return {"$or": [
+            {"status": "queued"},
+            {"status": "running", "heartbeat_at": {"$lt": datetime.utcnow() - self.lease}}
+        ]}
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            self._enqueued.discard(job_id)
+            try:
+                await self._run(job_id)
+            except Exception as e:
+                print(f"[WARNING] Batch job {job_id} failed: {str(e)[:100]}")
+                await self._finish(job_id, "failed", error=str(e))
+            finally:
+                self._queue.task_done()
+
+    async def _claim(self, job_id: PydanticObjectId) -> Optional[RecommendationJob]:
+        now = datetime.utcnow()
+        claimed = await RecommendationJob.get_motor_collection().find_one_and_update(
+            {"_id": job_id, **self._claimable_filter()},
+            {"$set": {
+                "status": "running",
+                "worker_id": self.worker_id,
+                "heartbeat_at": now,
+                "updated_at": now
+            }},
+            projection={"_id": 1}
+        )
+        if not claimed:
+            # Already finished, or held by a live worker elsewhere
+            return None
+        return await RecommendationJob.get(job_id)
+
+    async def _run(self, job_id: PydanticObjectId) -> None:
+        job = await self._claim(job_id)
+        if not job:
+            return
+
+        # Group the remaining students so each (country, specialty) is fetched once
+        groups: Dict[Tuple[Optional[str], Optional[str]], List[int]] = defaultdict(list)
+        for index, student in enumerate(job.students):
+            if job.results[index] is None:
+                groups[(student.preferred_country, student.preferred_specialty)].append(index)
+
+        semaphore = asyncio.Semaphore(self.student_concurrency)
+        for (country, specialty), indexes in groups.items():
+            universities, total = await UniversityService.get_recommendation_candidates(
+                limit=self.candidate_limit,
+                country=country,
+                specialty=specialty
+            )
+            await asyncio.gather(*[
+                self._run_student(job, index, universities, total, semaphore)
+                for index in indexes
+            ])
+
+        await self._finish(job.id, "completed")
+
+    async def _run_student(
+        self,
+        job: RecommendationJob,
+        index: int,
+        universities: List[University],
+        total: int,
+        semaphore: asyncio.Semaphore
+    ) -> None:
+        student = job.students[index]
+        async with semaphore:
+            try:
+                result = await ai_agent.recommend_from_candidates(
+                    universities,
+                    total,
+                    session_id=None,
+                    user_query=student.query,
+                    user_score=student.user_score,
+                    preferred_country=student.preferred_country,
+                    preferred_specialty=student.preferred_specialty,
+                    mode=job.mode
+                )
+            except Exception as e:
+                result = {"success": False, "error": str(e)}
+
+        result["student_id"] = student.student_id
+        counter = "completed" if result.get("success") else "failed"
+        now = datetime.utcnow()
+        await RecommendationJob.get_motor_collection().update_one(
+            {"_id": job.id, "worker_id": self.worker_id},
+            {
+                "$set": {f"results.{index}": result, "heartbeat_at": now, "updated_at": now},
+                "$inc": {counter: 1}
+            }
+        )
+
+    async def _finish(self, job_id: PydanticObjectId, status: str, error: Optional[str] = None) -> None:
+        now = datetime.utcnow()
+        await RecommendationJob.get_motor_collection().update_one(
+            {"_id": job_id, "worker_id": self.worker_id},
+            {"$set": {"status": status, "error": error, "finished_at": now, "updated_at": now}}
+        )
+
+
+batch_job_manager = BatchJobManager()
@@ -1,18 +1,102 @@
-import httpx
-from typing import List, Dict, Any, Optional
+import asyncio
+import importlib.util
+from datetime import datetime
+from typing import TYPE_CHECKING, List, Dict, Any, Optional
 from app.core.config import settings
 
+if TYPE_CHECKING:
+    import httpx
+
 
 class Context7Client:
     """
     Context7 integration for AI memory and context management.
     Acts as a memory layer for the AI agent to store and retrieve conversation context.
+
+    One pooled `httpx.AsyncClient` is shared by every call (keep-alive, optional
+    HTTP/2). It is opened in the application lifespan via `open()` and closed
+    with `close()`. Writes are buffered and sent in batches, either when
+    `context7_batch_size` records are pending or every
+    `context7_flush_interval_seconds`.
     """
 
     def __init__(self):
-        self.base_url = settings.context7_base_url
+        self.base_url = settings.context7_base_url.rstrip("/")
         self.api_key = settings.context7_api_key
         self.enabled = bool(self.api_key)
+        self.batch_size = settings.context7_batch_size
+        self.flush_interval = settings.context7_flush_interval_seconds
+        # Cap on buffered records while the backend is unreachable; oldest are dropped
+        self.max_pending = settings.context7_batch_size * 10
+        self._client: Optional["httpx.AsyncClient"] = None
+        self._pending: List[Dict[str, Any]] = []
+        # The batch being sent, out of `_pending` until it is accepted or put back
+        self._sending: List[Dict[str, Any]] = []
+        self._flush_lock = asyncio.Lock()
+        self._flusher: Optional[asyncio.Task] = None
+
+    async def open(self) -> None:
+        if not self.enabled or self._client is not None:
+            return
+        # Imported here so deployments without Context7 don't load httpx at startup
+        import httpx
+
+        http2 = settings.context7_http2
+        if http2 and importlib.util.find_spec("h2") is None:
+            print("[WARNING] h2 is not installed, Context7 client falls back to HTTP/1.1")
+            http2 = False
+
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            headers={"Authorization": f"Bearer {self.api_key}"},
+            limits=httpx.Limits(
+                max_connections=settings.context7_max_connections,
+                max_keepalive_connections=settings.context7_max_keepalive_connections,
+                keepalive_expiry=settings.context7_keepalive_expiry_seconds
+            ),
+            timeout=httpx.Timeout(settings.context7_timeout_seconds, connect=5.0),
+            http2=http2
+        )
+        self._flusher = asyncio.create_task(self._flush_periodically())
+
+    async def close(self) -> None:
+        if self._flusher:
+            self._flusher.cancel()
+            await asyncio.gather(self._flusher, return_exceptions=True)
+            self._flusher = None
+        if self._client:
+            await self.flush()
+            await self._client.aclose()
+            self._client = None
+
+    @property
+    def client(self) -> "httpx.AsyncClient":
+        if self._client is None:
+            raise RuntimeError("Context7Client is not open; call open() during startup")
+        return self._client
+
+    def enqueue_context(
+        self,
+        session_id: str,
+        context_data: Dict[str, Any],
+        tags: Optional[List[str]] = None
+    ) -> bool:
+        """Buffer a context record for the next batch without waiting on the network."""
+        if not self.enabled or self._client is None:
+            return False
+
+        self._pending.append({
+            "session_id": session_id,
+            "data": context_data,
+            "tags": tags or [],
+            "timestamp": context_data.get("timestamp") or datetime.utcnow().isoformat()
+        })
+        self._trim()
+        return True
+
+    def _trim(self) -> None:
+        if len(self._pending) > self.max_pending:
+            del self._pending[:len(self._pending) - self.max_pending]
 
     async def store_context(
         self,
@@ -23,30 +107,56 @@ class Context7Client:
         """
         Store context in Context7 memory layer.
         Used to persist user preferences, search history, and recommendations.
+        The record is batched; a full batch is flushed before returning.
         """
         if not self.enabled:
             return {"stored": False, "reason": "Context7 not configured"}
+        if not self.enqueue_context(session_id, context_data, tags):
+            return {"stored": False, "reason": "Context7 client not open"}
+
+        if len(self._pending) >= self.batch_size:
+            await self.flush()
+        return {"stored": True, "queued": len(self._pending)}
+
+    async def flush(self) -> int:
+        """Send all buffered records in batches; returns how many were accepted."""
+        if not (self._pending or self._sending) or self._client is None:
+            return 0
+
+        sent = 0
+        async with self._flush_lock:
+            while self._pending:
+                # Taken out while in flight, so trimming in enqueue_context can't shift it
+                batch = self._pending[:self.batch_size]
+                del self._pending[:len(batch)]
+                self._sending = batch
+                delivered = False
+                try:
+                    response = await self.client.post("/v1/context/batch", json={"contexts": batch})
+                    response.raise_for_status()
+                    delivered = True
+                except Exception as e:
+                    print(f"[WARNING] Context7 batch write failed: {str(e)[:100]}")
+                finally:
+                    self._sending = []
+                    if not delivered:
+                        # Back in front for the next flush; over the cap the oldest still go first
+                        self._pending[:0] = batch
+                        self._trim()
+                if not delivered:
+                    break
+                sent += len(batch)
+        return sent
 
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.post(
-                    f"{self.base_url}/v1/context",
-                    headers={
-                        "Authorization": f"Bearer {self.api_key}",
-                        "Content-Type": "application/json"
-                    },
-                    json={
-                        "session_id": session_id,
-                        "data": context_data,
-                        "tags": tags or [],
-                        "timestamp": context_data.get("timestamp")
-                    },
-                    timeout=10.0
-                )
-                response.raise_for_status()
-                return response.json()
-            except Exception as e:
-                return {"stored": False, "error": str(e)}
+    async def _flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def _flush_session(self, session_id: str) -> None:
+        # Reads must see this session's own buffered writes
+        if any(record["session_id"] == session_id for record in self._pending + self._sending):
+            await self.flush()
 
     async def retrieve_context(
         self,
@@ -57,24 +167,20 @@ class Context7Client:
         Retrieve historical context from Context7.
         Enables the AI to remember past interactions and preferences.
         """
-        if not self.enabled:
+        if not self.enabled or self._client is None:
             return []
 
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(
-                    f"{self.base_url}/v1/context/{session_id}",
-                    headers={
-                        "Authorization": f"Bearer {self.api_key}"
-                    },
-                    params={"limit": limit},
-                    timeout=10.0
-                )
-                response.raise_for_status()
-                result = response.json()
-                return result.get("contexts", [])
-            except Exception as e:
-                return []
+        try:
+            await self._flush_session(session_id)
+            response = await self.client.get(
+                f"/v1/context/{session_id}",
+                params={"limit": limit}
+            )
+            response.raise_for_status()
+            result = response.json()
+            return result.get("contexts", [])
+        except Exception:
+            return []
 
     async def search_context(
         self,
@@ -86,45 +192,38 @@ class Context7Client:
         Semantic search through stored contexts.
         Allows AI to find relevant past interactions.
         """
-        if not self.enabled:
+        if not self.enabled or self._client is None:
             return []
 
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.post(
-                    f"{self.base_url}/v1/context/search",
-                    headers={
-                        "Authorization": f"Bearer {self.api_key}",
-                        "Content-Type": "application/json"
-                    },
-                    json={
-                        "session_id": session_id,
-                        "query": query,
-                        "limit": limit
-                    },
-                    timeout=10.0
-                )
-                response.raise_for_status()
-                result = response.json()
-                return result.get("results", [])
-            except Exception as e:
-                return []
+        try:
+            await self._flush_session(session_id)
+            response = await self.client.post(
+                "/v1/context/search",
+                json={
+                    "session_id": session_id,
+                    "query": query,
+                    "limit": limit
+                }
+            )
+            response.raise_for_status()
+            result = response.json()
+            return result.get("results", [])
+        except Exception:
+            return []
 
     async def clear_context(self, session_id: str) -> bool:
-        """Clear all context for a session."""
-        if not self.enabled:
+        """Clear all context for a session, including records not yet sent."""
+        if not self.enabled or self._client is None:
             return False
 
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.delete(
-                    f"{self.base_url}/v1/context/{session_id}",
-                    headers={
-                        "Authorization": f"Bearer {self.api_key}"
-                    },
-                    timeout=10.0
-                )
-                response.raise_for_status()
-                return True
-            except Exception:
-                return False
+        async with self._flush_lock:
+            self._pending = [r for r in self._pending if r["session_id"] != session_id]
+        try:
+            response = await self.client.delete(f"/v1/context/{session_id}")
+            response.raise_for_status()
+            return True
+        except Exception:
+            return False
+
+
+context7_client = Context7Client()
@@ -0,0 +1,319 @@
+import asyncio
+import os
+import random
+import time
+from datetime import date
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+from app.core.config import settings
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+
+class LLMGatewayError(Exception):
+    """Base error for upstream LLM failures, carries the HTTP status to surface."""
+
+    status_code: int = 502
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class LLMOverloadedError(LLMGatewayError):
+    """Too many calls are already waiting for an upstream slot."""
+
+    status_code = 503
+
+
+class LLMCircuitOpenError(LLMGatewayError):
+    """The provider is marked unhealthy and calls fail fast."""
+
+    status_code = 503
+
+
+class LLMRateLimitedError(LLMGatewayError):
+    """The provider kept rate limiting us after all retries."""
+
+    status_code = 429
+
+
+class LLMBudgetExceededError(LLMGatewayError):
+    """The daily token budget has been spent."""
+
+    status_code = 429
+
+
+class LLMTimeoutError(LLMGatewayError):
+    """The call did not finish before its deadline."""
+
+    status_code = 504
+
+
+@lru_cache(maxsize=None)
+def retryable_errors() -> Tuple[type, ...]:
+    # openai is imported on first use: it is the slowest import of the app
+    # and a cold start without AI traffic shouldn't pay for it
+    import openai
+
+    return (openai.APITimeoutError, openai.APIConnectionError, openai.RateLimitError, openai.InternalServerError)
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+    Opens after `failure_threshold` failures, lets one probe through after `reset_timeout`.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probe_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def check(self) -> None:
+        """Fail fast while open, without claiming the half-open probe."""
+        if self.state == "open":
+            remaining = self.reset_timeout - (time.monotonic() - self.opened_at)
+            raise LLMCircuitOpenError("LLM provider is unavailable", retry_after=max(remaining, 0.0))
+
+    def before_call(self) -> None:
+        """Admit one upstream attempt; in half-open state it becomes the probe."""
+        self.check()
+        if self.state == "half_open":
+            if self._probe_in_flight:
+                raise LLMCircuitOpenError("LLM provider is recovering", retry_after=1.0)
+            self._probe_in_flight = True
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._probe_in_flight = False
+
+    def release_probe(self) -> None:
+        """Let another probe through when the current one ended without a verdict."""
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self._probe_in_flight or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+        self._probe_in_flight = False
+
+
+class LLMGateway:
+    """
+    Guards every chat completion call with a deadline, a concurrency limit,
+    a bounded wait queue, jittered retries and a circuit breaker.
+    """
+
+    def __init__(self, client: Optional["AsyncOpenAI"] = None):
+        self._client = client
+        self._client_pid = os.getpid() if client else None
+        self.timeout = settings.llm_timeout_seconds
+        self.max_retries = settings.llm_max_retries
+        self.backoff_base = settings.llm_backoff_base_seconds
+        self.backoff_max = settings.llm_backoff_max_seconds
+        self.max_concurrency = settings.llm_max_concurrency
+        self.max_queue = settings.llm_max_queue
+        self.breaker = CircuitBreaker(
+            failure_threshold=settings.llm_circuit_failure_threshold,
+            reset_timeout=settings.llm_circuit_reset_seconds,
+        )
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._in_flight = 0
+        self._waiting = 0
+        self.daily_token_budget = settings.llm_daily_token_budget
+        self._budget_day = date.today()
+        self._tokens_used = 0
+        self._draining = False
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    @property
+    def client(self) -> "AsyncOpenAI":
+        # The client owns an HTTP connection pool, which must not be shared
+        # with a forked worker: each process builds its own on first use
+        if self._client is None or self._client_pid != os.getpid():
+            from openai import AsyncOpenAI
+
+            self._client = AsyncOpenAI(
+                api_key=settings.openai_api_key,
+                base_url=settings.openai_base_url or None,
+                timeout=settings.llm_timeout_seconds,
+                # Retries are handled here so they share the deadline and the breaker
+                max_retries=0,
+            )
+            self._client_pid = os.getpid()
+        return self._client
+
+    @property
+    def api_key(self) -> str:
+        return settings.openai_api_key if self._client is None else self._client.api_key
+
+    async def drain(self, timeout: float) -> bool:
+        """
+        Refuse new calls and wait for queued and in-flight ones to finish.
+        Returns False if some were still running after `timeout` seconds.
+        """
+        self._draining = True
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def close(self) -> None:
+        if self._client is not None and self._client_pid == os.getpid():
+            await self._client.close()
+        self._client = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": self._in_flight,
+            "waiting": self._waiting,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "circuit_state": self.breaker.state,
+            "consecutive_failures": self.breaker.failures,
+            "tokens_used_today": self._tokens_used,
+            "daily_token_budget": self.daily_token_budget,
+            "draining": self._draining,
+        }
+
+    def over_budget(self) -> bool:
+        if date.today() != self._budget_day:
+            self._budget_day = date.today()
+            self._tokens_used = 0
+        return 0 < self.daily_token_budget <= self._tokens_used
+
+    def _record_usage(self, response: Any) -> None:
+        usage = getattr(response, "usage", None)
+        if usage is not None:
+            self._tokens_used += usage.total_tokens or 0
+
+    async def chat(
+        self,
+        model: str,
+        messages: List[Dict[str, Any]],
+        timeout: Optional[float] = None,
+        **kwargs: Any
+    ) -> Any:
+        """Run a chat completion, raising LLMGatewayError subclasses on failure."""
+        deadline = time.monotonic() + (timeout or self.timeout)
+        if self._draining:
+            raise LLMOverloadedError("Server is shutting down", retry_after=1.0)
+        if self.over_budget():
+            raise LLMBudgetExceededError("Daily AI token budget exhausted")
+        # The probe is only claimed once a slot is held (in _call_with_retries):
+        # a call rejected or abandoned while queueing must not hold it
+        self.breaker.check()
+
+        if self._waiting + self._in_flight >= self.max_concurrency + self.max_queue:
+            raise LLMOverloadedError("Too many pending AI requests", retry_after=1.0)
+
+        self._waiting += 1
+        self._idle.clear()
+        acquired = False
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self._remaining(deadline))
+            acquired = True
+        except asyncio.TimeoutError:
+            raise LLMTimeoutError("Timed out waiting for an AI request slot")
+        finally:
+            self._waiting -= 1
+            if acquired:
+                # Counted before the waiter leaves, so drain() never sees a gap
+                self._in_flight += 1
+            else:
+                self._update_idle()
+
+        try:
+            return await self._call_with_retries(model, messages, deadline, **kwargs)
+        finally:
+            self._in_flight -= 1
+            self._semaphore.release()
+            self._update_idle()
+
+    def _update_idle(self) -> None:
+        if self._waiting == 0 and self._in_flight == 0:
+            self._idle.set()
+
+    async def _call_with_retries(
+        self,
+        model: str,
+        messages: List[Dict[str, Any]],
+        deadline: float,
+        **kwargs: Any
+    ) -> Any:
+        self.breaker.before_call()
+        attempt = 0
+        while True:
+            try:
+                response = await asyncio.wait_for(
+                    self.client.chat.completions.create(model=model, messages=messages, **kwargs),
+                    timeout=self._remaining(deadline),
+                )
+                self.breaker.record_success()
+                self._record_usage(response)
+                return response
+            except asyncio.TimeoutError:
+                self.breaker.record_failure()
+                raise LLMTimeoutError("AI provider did not respond in time")
+            except retryable_errors() as e:
+                self.breaker.record_failure()
+                delay = self._backoff(attempt, e)
+                if attempt >= self.max_retries or time.monotonic() + delay >= deadline:
+                    raise self._translate(e)
+                attempt += 1
+                await asyncio.sleep(delay)
+                self.breaker.before_call()
+            except asyncio.CancelledError:
+                self.breaker.release_probe()
+                raise
+            except Exception as e:
+                # Non-retryable (auth, bad request): the provider itself is healthy
+                self.breaker.record_success()
+                raise LLMGatewayError(str(e))
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        retry_after = self._retry_after_header(error)
+        if retry_after is not None:
+            return min(retry_after, self.backoff_max)
+        # Full jitter: uniform in [0, base * 2^attempt]
+        ceiling = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return random.uniform(0, ceiling)
+
+    @staticmethod
+    def _retry_after_header(error: Exception) -> Optional[float]:
+        response = getattr(error, "response", None)
+        if response is None:
+            return None
+        try:
+            return float(response.headers.get("retry-after"))
+        except (TypeError, ValueError):
+            return None
+
+    def _translate(self, error: Exception) -> LLMGatewayError:
+        from openai import APITimeoutError, RateLimitError
+
+        if isinstance(error, RateLimitError):
+            return LLMRateLimitedError("AI provider rate limit exceeded",
+                                       retry_after=self._retry_after_header(error))
+        if isinstance(error, APITimeoutError):
+            return LLMTimeoutError("AI provider did not respond in time")
+        return LLMGatewayError(f"AI provider error: {error}")
+
+    @staticmethod
+    def _remaining(deadline: float) -> float:
+        return max(deadline - time.monotonic(), 0.0)
@@ -0,0 +1,31 @@
+import json
+from typing import Any, Dict, List
+
+# Prompt builders are plain functions of plain data, so they can run in the
+# offload pool (including a process pool) instead of on the event loop.
+
+
+def recommendation_prompt(user_query: str, university_data: List[Dict[str, Any]]) -> str:
+    return f"""User query: {user_query}
+
+Available universities (pre-ranked by match_score, best first):
+{json.dumps(university_data, separators=(",", ":"))}
+
+Please provide:
+1. Top 3-5 recommended universities with reasoning
+2. Comparison of pros/cons for each
+3. Explanation of why these match the user's criteria
+4. Any additional advice for the application process"""
+
+
+def comparison_prompt(criteria: List[str], university_data: List[Dict[str, Any]]) -> str:
+    return f"""Compare these universities based on: {', '.join(criteria)}
+
+Universities:
+{json.dumps(university_data, separators=(",", ":"))}
+
+Provide:
+1. Side-by-side comparison table
+2. Key differences
+3. Which university is better for specific goals
+4. Overall recommendation"""
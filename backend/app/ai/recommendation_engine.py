@@ -0,0 +1,184 @@
+import math
+from dataclasses import dataclass, field
+from typing import List, Optional
+from app.core.config import settings
+from app.models.university import University, UniversityRequirements
+
+
+@dataclass
+class RecommendationWeights:
+    margin: float = 0.35
+    ranking: float = 0.30
+    tuition: float = 0.15
+    acceptance: float = 0.10
+    specialty: float = 0.10
+
+    @classmethod
+    def from_settings(cls) -> "RecommendationWeights":
+        return cls(
+            margin=settings.reco_weight_margin,
+            ranking=settings.reco_weight_ranking,
+            tuition=settings.reco_weight_tuition,
+            acceptance=settings.reco_weight_acceptance,
+            specialty=settings.reco_weight_specialty,
+        )
+
+
+@dataclass
+class ScoredUniversity:
+    university: University
+    score: float
+    requirement: Optional[UniversityRequirements]
+    components: dict = field(default_factory=dict)
+
+    def to_dict(self) -> dict:
+        uni = self.university
+        return {
+            "id": str(uni.id) if uni.id else None,
+            "name": uni.name,
+            "country": uni.country,
+            "city": uni.city,
+            "ranking": uni.ranking,
+            "tuition_fee_usd": uni.tuition_fee_usd,
+            "acceptance_rate": uni.acceptance_rate,
+            "specialty": self.requirement.specialty_name if self.requirement else None,
+            "minimum_score": self.requirement.minimum_score if self.requirement else None,
+            "exams": self.requirement.exams if self.requirement else [],
+            "score": round(self.score, 4),
+            "components": {k: round(v, 4) for k, v in self.components.items()},
+        }
+
+
+class RecommendationEngine:
+    """
+    Deterministic, offline university ranking.
+
+    Every component is normalized to [0, 1] and combined with configurable
+    weights. Universities whose minimum score for the chosen specialty is above
+    the user's score are excluded. Ties are broken by ranking, then name, so the
+    output is stable for identical input.
+    """
+
+    # Score margin that counts as "comfortably above the minimum"
+    MARGIN_SCALE = 200.0
+    # Tuition at or above this is scored as the least affordable
+    TUITION_CAP_USD = 60000.0
+    # Ranking at or below this is scored as the least prestigious
+    RANKING_CAP = 1000
+
+    def __init__(self, weights: Optional[RecommendationWeights] = None):
+        self.weights = weights or RecommendationWeights.from_settings()
+
+    def rank(
+        self,
+        universities: List[University],
+        user_score: Optional[float] = None,
+        preferred_specialty: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> List[ScoredUniversity]:
+        scored = []
+        for uni in universities:
+            result = self._score(uni, user_score, preferred_specialty)
+            if result is not None:
+                scored.append(result)
+
+        scored.sort(key=lambda s: (-s.score, s.university.ranking or math.inf, s.university.name))
+        return scored[:limit] if limit else scored
+
+    def _score(
+        self,
+        uni: University,
+        user_score: Optional[float],
+        preferred_specialty: Optional[str]
+    ) -> Optional[ScoredUniversity]:
+        requirement, specialty_match = self._pick_requirement(uni, user_score, preferred_specialty)
+
+        if user_score is not None and uni.requirements and requirement is None:
+            # Nothing at this university is within reach of the user's score
+            return None
+
+        components = {
+            "margin": self._margin(requirement, user_score),
+            "ranking": self._ranking(uni.ranking),
+            "tuition": self._tuition(uni.tuition_fee_usd),
+            "acceptance": (uni.acceptance_rate / 100.0) if uni.acceptance_rate is not None else 0.5,
+            "specialty": 1.0 if specialty_match else 0.0,
+        }
+        w = self.weights
+        score = (
+            w.margin * components["margin"]
+            + w.ranking * components["ranking"]
+            + w.tuition * components["tuition"]
+            + w.acceptance * components["acceptance"]
+            + w.specialty * components["specialty"]
+        )
+        return ScoredUniversity(uni, score, requirement, components)
+
+    @staticmethod
+    def _pick_requirement(
+        uni: University,
+        user_score: Optional[float],
+        preferred_specialty: Optional[str]
+    ) -> tuple[Optional[UniversityRequirements], bool]:
+        """Best reachable requirement, preferring ones for the requested specialty."""
+        reachable = [
+            req for req in uni.requirements
+            if user_score is None or req.minimum_score <= user_score
+        ]
+
+        if preferred_specialty:
+            needle = preferred_specialty.lower()
+            if any(needle in req.specialty_name.lower() for req in uni.requirements):
+                matching = [req for req in reachable if needle in req.specialty_name.lower()]
+                if matching:
+                    return min(matching, key=lambda r: r.minimum_score), True
+                return None, True
+            if any(needle in name.lower() for name in uni.specialty_names):
+                # Offered, but without listed requirements for it
+                return (min(reachable, key=lambda r: r.minimum_score) if reachable else None), True
+
+        if reachable:
+            return min(reachable, key=lambda r: r.minimum_score), False
+        return None, False
+
+    def _margin(self, requirement: Optional[UniversityRequirements], user_score: Optional[float]) -> float:
+        if user_score is None or requirement is None:
+            return 0.5
+        return min((user_score - requirement.minimum_score) / self.MARGIN_SCALE, 1.0)
+
+    def _ranking(self, ranking: Optional[int]) -> float:
+        if ranking is None:
+            return 0.0
+        # Log scale: moving from 1 to 10 matters more than from 500 to 510
+        return max(1.0 - math.log(ranking) / math.log(self.RANKING_CAP), 0.0)
+
+    def _tuition(self, tuition: Optional[float]) -> float:
+        if tuition is None:
+            return 0.5
+        return max(1.0 - tuition / self.TUITION_CAP_USD, 0.0)
+
+
+def format_recommendations(ranked: List[ScoredUniversity]) -> str:
+    """Plain-text summary used when the answer is served without the LLM."""
+    if not ranked:
+        return "No universities match the given criteria. Try widening the country or specialty filters."
+
+    lines = ["Top matches based on your score, rankings, tuition and acceptance rates:", ""]
+    for position, item in enumerate(ranked, start=1):
+        uni = item.university
+        details = [f"{uni.city}, {uni.country}"]
+        if uni.ranking:
+            details.append(f"world ranking #{uni.ranking}")
+        if uni.tuition_fee_usd is not None:
+            details.append(f"tuition ${uni.tuition_fee_usd:,.0f}/year")
+        if uni.acceptance_rate is not None:
+            details.append(f"acceptance rate {uni.acceptance_rate:g}%")
+        lines.append(f"{position}. {uni.name} ({'; '.join(details)})")
+        if item.requirement:
+            req = item.requirement
+            exams = f", exams: {', '.join(req.exams)}" if req.exams else ""
+            lines.append(f"   {req.specialty_name}: minimum score {req.minimum_score:g}{exams}")
+    return "\n".join(lines)
+
+
+recommendation_engine = RecommendationEngine()
@@ -0,0 +1,174 @@
+import gzip
+import hashlib
+import importlib.util
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.config import settings
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "application/xml")
+
+
+def available_encoders(
+    zstd_level: int = settings.compression_zstd_level,
+    brotli_quality: int = settings.compression_brotli_quality,
+    gzip_level: int = settings.compression_gzip_level
+) -> Dict[str, Callable[[bytes], bytes]]:
+    """Available encoders, in server preference order."""
+    encoders: Dict[str, Callable[[bytes], bytes]] = {}
+    if importlib.util.find_spec("zstandard") is not None:
+        import zstandard
+        compressor = zstandard.ZstdCompressor(level=zstd_level)
+        encoders["zstd"] = compressor.compress
+    else:
+        print("[WARNING] zstandard is not installed, zstd responses are disabled")
+    if importlib.util.find_spec("brotli") is not None:
+        import brotli
+        encoders["br"] = lambda body: brotli.compress(body, quality=brotli_quality)
+    else:
+        print("[WARNING] brotli is not installed, br responses are disabled")
+    encoders["gzip"] = lambda body: gzip.compress(body, compresslevel=gzip_level, mtime=0)
+    return encoders
+
+
+def negotiate(accept_encoding: str, available: List[str]) -> Optional[str]:
+    """
+    Pick an encoding from an Accept-Encoding header: highest q-value wins,
+    ties go to the order of `available`. Returns None for identity.
+    """
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name.strip()] = q
+
+    best, best_q = None, 0.0
+    for encoding in available:
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+class CompressedCache:
+    """
+    LRU of compressed bodies keyed by encoding and a digest of the
+    uncompressed body. Hashing is far cheaper than compressing, and keying by
+    content means a hot page (e.g. a catalog snapshot list page) is compressed
+    once per encoding and reused until its bytes change; nothing has to be
+    invalidated explicitly.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple[str, bytes], bytes]" = OrderedDict()
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_compress(self, encoding: str, body: bytes, compress: Callable[[bytes], bytes]) -> bytes:
+        if self.max_bytes <= 0:
+            return compress(body)
+        key = (encoding, hashlib.blake2b(body, digest_size=16).digest())
+        cached = self._entries.get(key)
+        if cached is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return cached
+
+        self.misses += 1
+        compressed = compress(body)
+        if len(compressed) <= self.max_bytes:
+            self._entries[key] = compressed
+            self._size += len(compressed)
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+        return compressed
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "bytes": self._size,
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+
+compressed_cache = CompressedCache(settings.compression_cache_max_bytes)
+
+
+class CompressionMiddleware:
+    """
+    Negotiates zstd, br or gzip for JSON and text responses of at least
+    `compression_min_size` bytes. Successful GET responses go through
+    `CompressedCache`; other responses are compressed each time. Streaming
+    responses (several body chunks) pass through untouched.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.minimum_size = settings.compression_min_size
+        self.encoders = available_encoders()
+        self.cache = compressed_cache
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""), list(self.encoders))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        cacheable_method = scope["method"] == "GET"
+        start: Optional[Message] = None
+        passthrough = False
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start, passthrough
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            headers = MutableHeaders(raw=start["headers"])
+            if message.get("more_body", False) or not self._compressible(start["status"], headers, body):
+                passthrough = True
+                await send(start)
+                await send(message)
+                return
+
+            compress = self.encoders[encoding]
+            if cacheable_method and start["status"] == 200 and "no-store" not in headers.get("cache-control", ""):
+                compressed = self.cache.get_or_compress(encoding, body, compress)
+            else:
+                compressed = compress(body)
+
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            headers.add_vary_header("Accept-Encoding")
+            await send(start)
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_compressed)
+
+    def _compressible(self, status: int, headers: MutableHeaders, body: bytes) -> bool:
+        if status < 200 or status in (204, 304) or "content-encoding" in headers:
+            return False
+        if len(body) < self.minimum_size:
+            return False
+        return headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES)
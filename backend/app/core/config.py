@@ -10,7 +10,166 @@ class Settings(BaseSettings):
 
     mongodb_url: str = "mongodb://localhost:27017"
     database_name: str = "university_catalog"
+    # Index sync at startup: "background" (serve first, sync all collections concurrently) or "startup" (wait).
+    # Either way the indexes correctness depends on (change log seq, 2dsphere) are created before serving.
+    mongo_index_sync: str = "background"
     openai_api_key: str = ""
+    openai_base_url: str = ""
+
+    # LLM gateway: deadlines, concurrency, retries and circuit breaker
+    llm_timeout_seconds: float = 30.0
+    llm_max_concurrency: int = 8
+    llm_max_queue: int = 32
+    llm_max_retries: int = 2
+    llm_backoff_base_seconds: float = 0.5
+    llm_backoff_max_seconds: float = 8.0
+    llm_circuit_failure_threshold: int = 5
+    llm_circuit_reset_seconds: float = 30.0
+    # 0 disables the daily token budget
+    llm_daily_token_budget: int = 0
+
+    # Offline recommendation engine weights and LLM shortlist size
+    reco_weight_margin: float = 0.35
+    reco_weight_ranking: float = 0.30
+    reco_weight_tuition: float = 0.15
+    reco_weight_acceptance: float = 0.10
+    reco_weight_specialty: float = 0.10
+    reco_shortlist_size: int = 10
+    # Candidates fetched from Mongo when the snapshot isn't loaded, best ranked first
+    reco_candidate_limit: int = 50
+
+    # Batch recommendation jobs
+    batch_job_workers: int = 2
+    batch_job_student_concurrency: int = 4
+    batch_job_lease_seconds: int = 300
+    # How often each process looks for queued or abandoned jobs it doesn't know about
+    batch_job_rescan_seconds: float = 30.0
+    batch_candidate_limit: int = 200
+    batch_max_students: int = 500
+
+    # Universities per update_many when propagating specialty renames/deletes
+    specialty_propagation_batch_size: int = 1000
+
+    # Cross-worker cache invalidation: auto, change_stream or local
+    invalidation_mode: str = "auto"
+    invalidation_poll_seconds: float = 5.0
+
+    # In-memory catalog snapshot for reads
+    catalog_snapshot_enabled: bool = False
+    catalog_snapshot_debounce_seconds: float = 0.2
+
+    # Context7 memory backend (disabled while the API key is empty)
+    context7_base_url: str = "https://api.context7.com"
+    context7_api_key: str = ""
+    context7_http2: bool = True
+    context7_timeout_seconds: float = 10.0
+    context7_max_connections: int = 20
+    context7_max_keepalive_connections: int = 10
+    context7_keepalive_expiry_seconds: float = 30.0
+    context7_batch_size: int = 50
+    context7_flush_interval_seconds: float = 2.0
+
+    # Catalog change log for delta sync (GET /api/changes)
+    change_log_retention_days: int = 30
+    change_log_page_size: int = 500
+    change_log_settle_seconds: float = 5.0
+    change_log_compaction_seconds: float = 3600.0
+
+    # Precomputed "similar universities" (GET /api/universities/{id}/similar)
+    similarity_enabled: bool = True
+    similarity_top_k: int = 20
+    similarity_debounce_seconds: float = 2.0
+    similarity_lease_seconds: float = 120.0
+
+    # Materialized per-specialty leaderboards (GET /api/specialties/{id}/leaderboard)
+    leaderboard_enabled: bool = True
+    leaderboard_size: int = 50
+    leaderboard_debounce_seconds: float = 2.0
+    leaderboard_lease_seconds: float = 120.0
+
+    # Response compression (zstd/br need the zstandard/brotli packages; gzip always works)
+    compression_enabled: bool = True
+    compression_min_size: int = 1024
+    compression_gzip_level: int = 6
+    compression_brotli_quality: int = 5
+    compression_zstd_level: int = 3
+    # Compressed bodies of GET responses kept for reuse, keyed by content
+    compression_cache_max_bytes: int = 32 * 1024 * 1024
+
+    # Admission control: token buckets per client and route class (tokens/second, bucket size)
+    rate_limit_enabled: bool = True
+    rate_limit_read_per_second: float = 20.0
+    rate_limit_read_burst: float = 60.0
+    rate_limit_search_per_second: float = 2.0
+    rate_limit_search_burst: float = 10.0
+    rate_limit_write_per_second: float = 1.0
+    rate_limit_write_burst: float = 10.0
+    rate_limit_ai_per_second: float = 0.1
+    rate_limit_ai_burst: float = 5.0
+    # Searches running at once per worker, beyond which new ones get 503 (0 = unlimited)
+    rate_limit_search_max_in_flight: int = 16
+    # Shared buckets across workers (redis:// URL, needs the redis package); empty keeps them per process
+    rate_limit_redis_url: str = ""
+    rate_limit_redis_timeout_seconds: float = 0.05
+    rate_limit_max_keys: int = 100_000
+    # Header carrying a client id set by a trusted gateway; empty identifies clients by IP
+    rate_limit_client_header: str = ""
+    # Proxies in front that append to X-Forwarded-For; the client is the hop this far from the right (0 = peer)
+    rate_limit_trusted_proxies: int = 0
+
+    # Deadline for the MongoDB work of a request, per route class, in ms (0 = none).
+    # Clients may pick their own with the header, up to the max.
+    query_deadline_read_ms: int = 3000
+    query_deadline_search_ms: int = 2000
+    query_deadline_write_ms: int = 10000
+    query_deadline_ai_ms: int = 0
+    query_deadline_max_ms: int = 30000
+    query_deadline_header: str = "X-Request-Timeout-Ms"
+
+    # Slow-query log: commands slower than this, and all deadline hits, with shape and plan
+    slow_query_ms: float = 200.0
+    slow_query_log_size: int = 200
+    slow_query_explain: bool = True
+    slow_query_explain_interval_seconds: float = 600.0
+
+    # Event-loop monitoring: lag sampled every interval (reported under /health); a loop
+    # blocked longer than the threshold is logged with the stack of the blocking code
+    loop_monitor_enabled: bool = True
+    loop_lag_interval_seconds: float = 0.25
+    loop_slow_callback_ms: float = 100.0
+    # Development: asyncio debug mode plus a log of blocking calls (file, DNS, socket) on the loop
+    loop_debug: bool = False
+
+    # CPU-heavy work (prompt building, similarity features): "thread", "process" or "inline"
+    offload_mode: str = "thread"
+    offload_workers: int = 2
+
+    # Static catalog: default list pages, university details and the specialty list
+    # pre-rendered as content-hashed, pre-compressed JSON files, kept current on writes
+    static_catalog_enabled: bool = False
+    static_catalog_dir: str = "static_catalog"
+    # "serve": the API answers covered requests from the files; "redirect": 307 to
+    # static_catalog_base_url (a CDN in front of the directory); "off": files only
+    static_catalog_mode: str = "serve"
+    static_catalog_base_url: str = ""
+    static_catalog_sorts: str = "name:asc,ranking:asc"
+    static_catalog_page_size: int = 20
+    static_catalog_max_list_pages: int = 50
+    static_catalog_debounce_seconds: float = 2.0
+    static_catalog_max_age_seconds: int = 60
+    # Files a newer build replaced are deleted after this long
+    static_catalog_retention_seconds: int = 3600
+
+    # Production server (python -m app.server); 0 workers means one per CPU the
+    # process may use (CPU affinity, capped by the container's cgroup CPU quota)
+    server_host: str = "0.0.0.0"
+    server_port: int = 8000
+    server_workers: int = 0
+    server_backlog: int = 2048
+    server_keepalive_seconds: int = 75
+    server_graceful_shutdown_seconds: int = 30
+    # On shutdown, how long in-flight AI calls may run before the worker exits
+    llm_drain_seconds: float = 20.0
 
     app_title: str = "University Aggregator API"
     app_version: str = "1.0.0"
@@ -0,0 +1,153 @@
+import asyncio
+import contextvars
+import time
+from typing import Dict, Optional
+import pymongo
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.config import settings
+from app.core.rate_limit import EXEMPT_PATHS, classify
+
+# Query budget per route class in milliseconds; 0 leaves the class unbounded.
+# AI routes wait on the LLM between queries, which has its own timeouts.
+ROUTE_BUDGETS_MS = {
+    "read": settings.query_deadline_read_ms,
+    "search": settings.query_deadline_search_ms,
+    "write": settings.query_deadline_write_ms,
+    "ai": settings.query_deadline_ai_ms,
+}
+
+# Writes that fan out over the catalog (specialty rename/delete propagation,
+# consistency repair) run to completion once started, like at startup resume
+UNBOUNDED_ROUTES = (
+    ("PUT", "/api/specialties/"),
+    ("DELETE", "/api/specialties/"),
+    ("POST", "/api/specialties/consistency/repair"),
+)
+
+# Only reads are cancelled when the client goes away. A write runs to the
+# end, so its invalidation, change log entry and any propagation it starts
+# are never cut off between the write and its bookkeeping.
+CANCELLABLE_METHODS = ("GET", "HEAD")
+
+
+# Requests cancelled because the client disconnected, and answered 504 at the deadline
+_counters: Dict[str, int] = {"cancelled": 0, "timed_out": 0}
+
+
+# Monotonic time at which the current request's deadline runs out
+_deadline: "contextvars.ContextVar[Optional[float]]" = contextvars.ContextVar("query_deadline", default=None)
+
+
+def time_left() -> Optional[float]:
+    """Seconds left before the current request's deadline, None without one."""
+    deadline = _deadline.get()
+    return None if deadline is None else max(deadline - time.monotonic(), 0.0)
+
+
+def record_timeout() -> None:
+    _counters["timed_out"] += 1
+
+
+def deadline_stats() -> Dict[str, int]:
+    return dict(_counters)
+
+
+def route_budget(method: str, path: str) -> float:
+    """Default deadline of a route in seconds, 0 for none."""
+    if any(method == m and path.startswith(prefix) for m, prefix in UNBOUNDED_ROUTES):
+        return 0.0
+    return ROUTE_BUDGETS_MS[classify(method, path)] / 1000
+
+
+class DeadlineMiddleware:
+    """
+    Gives each request a deadline for its MongoDB work and stops the work
+    when the client goes away.
+
+    The deadline is the route's default (`query_deadline_*_ms`), or the
+    client's `query_deadline_header` in milliseconds, capped at
+    `query_deadline_max_ms`. It is applied with `pymongo.timeout`, so every
+    find, count, aggregate and write issued while handling the request carries
+    `maxTimeMS` for the time left (Motor copies the context into its threads)
+    and the server abandons it at the deadline. An exceeded deadline surfaces
+    as a PyMongoError with `timeout` set, answered with 504.
+
+    The app runs in its own task while this middleware reads the request
+    stream; for GET and HEAD, a disconnect before the response is complete
+    cancels the task.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.header = settings.query_deadline_header
+        self.max_budget = settings.query_deadline_max_ms / 1000
+
+    def _budget(self, scope: Scope) -> float:
+        budget = route_budget(scope["method"], scope["path"])
+        requested = Headers(scope=scope).get(self.header) if self.header else None
+        if requested:
+            try:
+                requested_seconds = float(requested) / 1000
+            except ValueError:
+                requested_seconds = 0.0
+            if requested_seconds > 0:
+                budget = requested_seconds
+        return min(budget, self.max_budget) if budget else 0.0
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        budget = self._budget(scope)
+        if not budget:
+            await self._run(scope, receive, send)
+            return
+        token = _deadline.set(time.monotonic() + budget)
+        try:
+            with pymongo.timeout(budget):
+                await self._run(scope, receive, send)
+        finally:
+            _deadline.reset(token)
+
+    async def _run(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["method"] not in CANCELLABLE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        messages: "asyncio.Queue[Message]" = asyncio.Queue()
+        responded = False
+        disconnected = False
+
+        async def send_tracked(message: Message) -> None:
+            nonlocal responded
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                responded = True
+            await send(message)
+
+        # Created after pymongo.timeout is entered, so the task inherits the deadline
+        app_task = asyncio.create_task(self.app(scope, messages.get, send_tracked))
+
+        async def read_requests() -> None:
+            nonlocal disconnected
+            while True:
+                message = await receive()
+                if message["type"] == "http.disconnect":
+                    if not responded:
+                        disconnected = True
+                        app_task.cancel()
+                    messages.put_nowait(message)
+                    return
+                messages.put_nowait(message)
+
+        reader = asyncio.create_task(read_requests())
+        try:
+            await app_task
+        except asyncio.CancelledError:
+            if not disconnected:
+                raise
+            # Nobody is left to answer
+            _counters["cancelled"] += 1
+        finally:
+            reader.cancel()
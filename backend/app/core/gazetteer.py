@@ -0,0 +1,63 @@
+import json
+import unicodedata
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+# Bundled offline gazetteer: one entry per city that hosts catalog universities.
+# Add a line there when a new city is imported; nothing is geocoded over the network.
+GAZETTEER_PATH = Path(__file__).resolve().parent.parent / "data" / "cities.json"
+
+# Alternative country spellings seen in imports -> the catalog's spelling
+COUNTRY_ALIASES = {
+    "us": "usa",
+    "united states": "usa",
+    "united states of america": "usa",
+    "uk": "united kingdom",
+    "great britain": "united kingdom",
+    "england": "united kingdom",
+    "scotland": "united kingdom",
+    "wales": "united kingdom",
+    "korea": "south korea",
+    "republic of korea": "south korea",
+    "russian federation": "russia",
+    "czechia": "czech republic",
+    "uae": "united arab emirates",
+    "prc": "china",
+}
+
+
+def _normalize(value: str) -> str:
+    """Case-, accent- and whitespace-insensitive key, so "Zürich" matches "Zurich"."""
+    decomposed = unicodedata.normalize("NFKD", value)
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(stripped.casefold().replace(".", " ").split())
+
+
+def _country_key(country: str) -> str:
+    key = _normalize(country)
+    return COUNTRY_ALIASES.get(key, key)
+
+
+@lru_cache(maxsize=1)
+def _gazetteer() -> Dict[Tuple[str, str], Tuple[float, float]]:
+    with open(GAZETTEER_PATH, "r", encoding="utf-8") as f:
+        entries = json.load(f)
+    return {
+        (_normalize(entry["city"]), _country_key(entry["country"])): (entry["lat"], entry["lon"])
+        for entry in entries
+    }
+
+
+def locate(city: Optional[str], country: Optional[str]) -> Optional[Dict[str, object]]:
+    """
+    GeoJSON point for a city, or None if it isn't in the gazetteer.
+    Coordinates are [longitude, latitude], as GeoJSON and 2dsphere expect.
+    """
+    if not city or not country:
+        return None
+    found = _gazetteer().get((_normalize(city), _country_key(country)))
+    if found is None:
+        return None
+    lat, lon = found
+    return {"type": "Point", "coordinates": [lon, lat]}
@@ -0,0 +1,167 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, Optional, Set, Tuple
+from app.core.config import settings
+
+# Audit events that block the calling thread. "open" of modules is left out
+# (imports), and socket.connect only counts on blocking sockets: asyncio's own
+# non-blocking connects raise the same event. time.sleep is audited from 3.12.
+BLOCKING_EVENTS = {
+    "open", "socket.connect", "socket.getaddrinfo", "socket.gethostbyname",
+    "socket.gethostbyaddr", "subprocess.Popen", "os.system", "time.sleep"
+}
+IMPORT_SUFFIXES = (".py", ".pyc", ".pyi", ".so", ".pth")
+
+STACK_DEPTH = 12
+
+
+def _stack(frame) -> str:
+    return "".join(traceback.format_stack(frame, limit=STACK_DEPTH))
+
+
+class LoopMonitor:
+    """
+    Watches the event loop from a watchdog thread.
+
+    Every `loop_lag_interval_seconds` the thread schedules a no-op on the loop
+    and times how long it waits to run: that is the loop lag, kept as a rolling
+    window (about a minute) and reported under /health. If the no-op hasn't run
+    after `loop_slow_callback_ms`, something is blocking the loop; the thread
+    captures the loop thread's stack at that moment, so the log shows the
+    blocking code itself rather than whatever ran next.
+
+    With `loop_debug` on, asyncio debug mode is enabled (it also logs slow
+    callbacks) and an audit hook reports blocking calls made on the loop
+    thread, such as file opens, DNS lookups or blocking socket connects, once
+    per call site. Debug mode costs a little on every audited event and is
+    meant for development.
+    """
+
+    def __init__(self):
+        self.enabled = settings.loop_monitor_enabled
+        self.interval = settings.loop_lag_interval_seconds
+        self.threshold = settings.loop_slow_callback_ms / 1000
+        self.debug = settings.loop_debug
+        self.samples: Deque[float] = deque(maxlen=max(1, int(60 / self.interval)))
+        self.stalls = 0
+        self.last_stall: Optional[Dict[str, Any]] = None
+        self.blocking_calls = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[int] = None
+        self._stop = threading.Event()
+        self._watchdog: Optional[threading.Thread] = None
+        self._reported_sites: Set[Tuple[str, Tuple[Tuple[str, int], ...]]] = set()
+        self._in_hook = threading.local()
+        self._hook_installed = False
+
+    async def start(self) -> None:
+        if not self.enabled:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._stop.clear()
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+        if self.debug:
+            self._enable_debug()
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._watchdog:
+            await asyncio.to_thread(self._watchdog.join, 1.0)
+            self._watchdog = None
+        self._loop = None
+
+    def _watch(self) -> None:
+        while not self._stop.is_set():
+            loop = self._loop
+            if loop is None or loop.is_closed():
+                return
+            ran = threading.Event()
+            sent = time.monotonic()
+            try:
+                loop.call_soon_threadsafe(ran.set)
+            except RuntimeError:
+                # Loop closed between the check and the call
+                return
+
+            if not ran.wait(self.threshold):
+                frame = sys._current_frames().get(self._loop_thread)
+                stack = _stack(frame) if frame is not None else "unavailable"
+                while not ran.wait(0.5):
+                    if self._stop.is_set():
+                        return
+                self._record_stall(time.monotonic() - sent, stack)
+
+            self.samples.append(time.monotonic() - sent)
+            self._stop.wait(self.interval)
+
+    def _record_stall(self, blocked: float, stack: str) -> None:
+        self.stalls += 1
+        self.last_stall = {
+            "at": datetime.utcnow().isoformat(),
+            "blocked_ms": round(blocked * 1000, 1),
+            "stack": stack.splitlines()[-STACK_DEPTH * 2:]
+        }
+        print(f"[WARNING] Event loop blocked for {blocked * 1000:.0f} ms, stack when detected:\n{stack}")
+
+    def _enable_debug(self) -> None:
+        self._loop.set_debug(True)
+        self._loop.slow_callback_duration = self.threshold
+        logging.getLogger("asyncio").setLevel(logging.WARNING)
+        if not self._hook_installed:
+            # Audit hooks can't be removed; the hook checks `_loop` and goes quiet after stop()
+            sys.addaudithook(self._audit)
+            self._hook_installed = True
+        print("[OK] Event loop debug mode: slow callbacks and blocking calls on the loop are logged")
+
+    def _audit(self, event: str, args: Tuple[Any, ...]) -> None:
+        if event not in BLOCKING_EVENTS or self._loop is None:
+            return
+        if threading.get_ident() != self._loop_thread or getattr(self._in_hook, "active", False):
+            return
+        if event == "open" and (not isinstance(args[0], str) or args[0].endswith(IMPORT_SUFFIXES)):
+            return
+        if event == "socket.connect" and not args[0].getblocking():
+            return
+
+        # Formatting the stack reads source files, which is audited too
+        self._in_hook.active = True
+        try:
+            frame = sys._getframe(1)
+            summary = traceback.extract_stack(frame, limit=3)
+            site = (event, tuple((entry.filename, entry.lineno) for entry in summary))
+            if site in self._reported_sites:
+                return
+            self._reported_sites.add(site)
+            self.blocking_calls += 1
+            print(f"[WARNING] Blocking call on the event loop: {event} {str(args[0])[:80]}\n{_stack(frame)}")
+        finally:
+            self._in_hook.active = False
+
+    def stats(self) -> Dict[str, Any]:
+        samples = sorted(tuple(self.samples))
+        if not samples:
+            return {"enabled": self.enabled, "samples": 0}
+
+        def percentile(p: float) -> float:
+            return round(samples[min(len(samples) - 1, int(p * len(samples)))] * 1000, 2)
+
+        return {
+            "enabled": self.enabled,
+            "debug": self.debug,
+            "samples": len(samples),
+            "lag_ms": {"p50": percentile(0.5), "p99": percentile(0.99), "max": round(samples[-1] * 1000, 2)},
+            "stalls": self.stalls,
+            "last_stall": self.last_stall,
+            "blocking_calls": self.blocking_calls
+        }
+
+
+loop_monitor = LoopMonitor()
@@ -0,0 +1,44 @@
+import asyncio
+import functools
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+from app.core.config import settings
+
+T = TypeVar("T")
+
+_executor: Optional[Executor] = None
+
+
+def _get_executor() -> Executor:
+    global _executor
+    if _executor is None:
+        if settings.offload_mode == "process":
+            # spawn: forking a process that runs an event loop and driver threads isn't safe
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.offload_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        else:
+            _executor = ThreadPoolExecutor(max_workers=settings.offload_workers, thread_name_prefix="offload")
+    return _executor
+
+
+async def offload(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Run CPU-bound work (serialization, prompt building, numeric work) off the
+    event loop, per `offload_mode`: "thread" (default), "process", or "inline"
+    to run it on the loop. For "process", `fn` must be a module-level function
+    and its arguments and result picklable.
+    """
+    if settings.offload_mode == "inline":
+        return fn(*args, **kwargs)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(), functools.partial(fn, *args, **kwargs))
+
+
+def shutdown_offload() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
@@ -0,0 +1,308 @@
+import importlib.util
+import ipaddress
+import math
+import time
+from dataclasses import dataclass
+from typing import Dict, List
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
+from app.core.config import settings
+
+# Never limited: health checks, docs and CORS preflights
+EXEMPT_PATHS = ("/", "/health", "/docs", "/redoc", "/openapi.json", "/docs/oauth2-redirect")
+
+WRITE_METHODS = ("POST", "PUT", "PATCH", "DELETE")
+
+
+@dataclass(frozen=True)
+class RouteClass:
+    name: str
+    # Tokens per second and bucket size, per client
+    rate: float
+    burst: float
+    # Requests of this class running at once in this process (0 = unlimited)
+    max_in_flight: int = 0
+
+
+ROUTE_CLASSES = {
+    "read": RouteClass("read", settings.rate_limit_read_per_second, settings.rate_limit_read_burst),
+    "search": RouteClass(
+        "search",
+        settings.rate_limit_search_per_second,
+        settings.rate_limit_search_burst,
+        settings.rate_limit_search_max_in_flight
+    ),
+    "write": RouteClass("write", settings.rate_limit_write_per_second, settings.rate_limit_write_burst),
+    "ai": RouteClass("ai", settings.rate_limit_ai_per_second, settings.rate_limit_ai_burst),
+}
+
+
+def classify(method: str, path: str) -> str:
+    """
+    Route class of a request. AI calls are the POSTs under /api/ai (batch job
+    polling is a cheap read); batch gets are reads even as POSTs.
+    """
+    if path.startswith("/api/ai/"):
+        return "ai" if method == "POST" else "read"
+    if path.endswith("/search"):
+        return "search"
+    if method in WRITE_METHODS and not path.endswith("/batch"):
+        return "write"
+    return "read"
+
+
+class MemoryBuckets:
+    """
+    Token buckets in a dict, per process: limits are per worker, so the
+    effective limit is the configured one times the number of workers.
+    """
+
+    name = "memory"
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        # key -> [tokens, last refill (monotonic seconds)]
+        self._buckets: Dict[str, List[float]] = {}
+
+    async def take(self, key: str, rate: float, burst: float) -> float:
+        """Take one token; returns 0 if admitted, else seconds until one is available."""
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            if len(self._buckets) >= self.max_keys:
+                self._evict(now)
+            self._buckets[key] = [burst - 1, now]
+            return 0.0
+
+        tokens = min(burst, bucket[0] + (now - bucket[1]) * rate)
+        bucket[1] = now
+        if tokens >= 1:
+            bucket[0] = tokens - 1
+            return 0.0
+        bucket[0] = tokens
+        return (1 - tokens) / rate
+
+    def _evict(self, now: float) -> None:
+        """Drop buckets that have refilled completely; they carry no state a fresh bucket wouldn't."""
+        idle = max(route.burst / route.rate for route in ROUTE_CLASSES.values())
+        self._buckets = {key: bucket for key, bucket in self._buckets.items() if now - bucket[1] < idle}
+        if len(self._buckets) >= self.max_keys:
+            # Flooded with distinct keys: forget the older half
+            keys = list(self._buckets)
+            self._buckets = {key: self._buckets[key] for key in keys[len(keys) // 2:]}
+
+    async def close(self) -> None:
+        self._buckets.clear()
+
+    def stats(self) -> dict:
+        return {"backend": self.name, "keys": len(self._buckets)}
+
+
+# Refill and take one token atomically; the server clock keeps workers consistent.
+# Returns the wait in seconds as a string (Lua numbers would be truncated to integers).
+TAKE_SCRIPT = """
+if redis.replicate_commands then redis.replicate_commands() end
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'at')
+local tokens = tonumber(state[1]) or burst
+local at = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - at) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'at', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000) + 1000)
+return tostring(wait)
+"""
+
+
+class RedisBuckets:
+    """
+    Token buckets in Redis (or anything speaking its protocol and Lua), shared
+    by all workers and instances. Costs one round trip per request. If Redis
+    is unreachable requests are admitted, with a warning at most once a minute.
+    """
+
+    name = "redis"
+
+    def __init__(self, url: str):
+        import redis.asyncio as redis
+
+        self.client = redis.from_url(url, socket_timeout=settings.rate_limit_redis_timeout_seconds)
+        self.script = self.client.register_script(TAKE_SCRIPT)
+        self.errors = 0
+        self._warned_at = 0.0
+
+    async def take(self, key: str, rate: float, burst: float) -> float:
+        try:
+            return float(await self.script(keys=[f"ratelimit:{key}"], args=[rate, burst]))
+        except Exception as e:
+            self.errors += 1
+            now = time.monotonic()
+            if now - self._warned_at > 60:
+                self._warned_at = now
+                print(f"[WARNING] Rate limit backend unavailable, admitting requests: {str(e)[:100]}")
+            return 0.0
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+    def stats(self) -> dict:
+        return {"backend": self.name, "errors": self.errors}
+
+
+class RateLimiter:
+    """
+    Per-client token buckets for each route class plus per-process in-flight
+    counts. The backend is created on first use: shared Redis buckets when
+    `rate_limit_redis_url` is set, else buckets in this process's memory.
+    """
+
+    def __init__(self):
+        self._backend = None
+        self.in_flight: Dict[str, int] = {name: 0 for name in ROUTE_CLASSES}
+        self.rejected: Dict[str, int] = {name: 0 for name in ROUTE_CLASSES}
+        self.shed: Dict[str, int] = {name: 0 for name in ROUTE_CLASSES}
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            if settings.rate_limit_redis_url:
+                if importlib.util.find_spec("redis") is None:
+                    # Per-process buckets would silently multiply the limits
+                    raise RuntimeError("RATE_LIMIT_REDIS_URL is set but the redis package is not installed")
+                self._backend = RedisBuckets(settings.rate_limit_redis_url)
+            else:
+                self._backend = MemoryBuckets(settings.rate_limit_max_keys)
+        return self._backend
+
+    def open(self) -> None:
+        """Create the backend at startup, so a misconfigured one stops the server."""
+        _ = self.backend
+
+    async def take(self, route: RouteClass, client: str) -> float:
+        wait = await self.backend.take(f"{route.name}:{client}", route.rate, route.burst)
+        if wait > 0:
+            self.rejected[route.name] += 1
+        return wait
+
+    async def close(self) -> None:
+        if self._backend is not None:
+            await self._backend.close()
+            self._backend = None
+
+    def stats(self) -> dict:
+        return {
+            "enabled": settings.rate_limit_enabled,
+            **(self._backend.stats() if self._backend else {}),
+            "rejected": self.rejected,
+            "shed": self.shed,
+            "in_flight": self.in_flight
+        }
+
+
+rate_limiter = RateLimiter()
+
+
+class RateLimitMiddleware:
+    """
+    Admission control in front of the routers. Each request is classified
+    (read, search, write, ai) and takes a token from its client's bucket for
+    that class; an empty bucket answers 429 with Retry-After. Searches also
+    count against a per-process in-flight cap, since each one is a regex scan
+    holding a Mongo connection; over the cap the answer is 503.
+
+    Clients are identified by `rate_limit_client_header` when set (an API
+    gateway's authenticated client id), else by the peer address. Behind
+    `rate_limit_trusted_proxies` proxies it is the X-Forwarded-For hop the
+    outermost of them appended, counted from the right: hops further left are
+    whatever the client sent. With none configured, a warning is logged when
+    requests come through a local proxy.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.limiter = rate_limiter
+        self.client_header = settings.rate_limit_client_header.lower()
+        self.trusted_proxies = settings.rate_limit_trusted_proxies
+        self._proxy_warned = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] == "OPTIONS" or scope["path"] in EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        route = ROUTE_CLASSES[classify(scope["method"], scope["path"])]
+        wait = await self.limiter.take(route, self._client(scope))
+        if wait > 0:
+            await self._reject(send, 429, "Rate limit exceeded", wait)
+            return
+
+        if not route.max_in_flight:
+            await self.app(scope, receive, send)
+            return
+
+        in_flight = self.limiter.in_flight
+        if in_flight[route.name] >= route.max_in_flight:
+            self.limiter.shed[route.name] += 1
+            await self._reject(send, 503, "Server busy", 1)
+            return
+        in_flight[route.name] += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            in_flight[route.name] -= 1
+
+    def _client(self, scope: Scope) -> str:
+        if self.client_header or self.trusted_proxies:
+            headers = Headers(scope=scope)
+            if self.client_header and headers.get(self.client_header):
+                return "key:" + headers[self.client_header]
+            if self.trusted_proxies:
+                hops = [hop.strip() for header in headers.getlist("x-forwarded-for") for hop in header.split(",")]
+                hops = [hop for hop in hops if hop]
+                if hops:
+                    return hops[max(len(hops) - self.trusted_proxies, 0)]
+        client = scope.get("client")
+        if not client:
+            return "unknown"
+        if not self._proxy_warned:
+            self._warn_if_proxied(scope, client[0])
+        return client[0]
+
+    def _warn_if_proxied(self, scope: Scope, peer: str) -> None:
+        """
+        A private or loopback peer forwarding for someone else is a proxy: every
+        client behind it shares its bucket. Said once, at the first such request.
+        """
+        if not any(name == b"x-forwarded-for" for name, _ in scope["headers"]):
+            return
+        try:
+            address = ipaddress.ip_address(peer)
+        except ValueError:
+            return
+        if address.is_private or address.is_loopback:
+            self._proxy_warned = True
+            print(f"[WARNING] Rate limiting keys clients by peer address, but requests arrive through "
+                  f"a proxy at {peer} with X-Forwarded-For: all clients behind it share one bucket. "
+                  f"Set RATE_LIMIT_TRUSTED_PROXIES or RATE_LIMIT_CLIENT_HEADER")
+
+    @staticmethod
+    async def _reject(send: Send, status: int, detail: str, retry_after: float) -> None:
+        body = b'{"detail":"' + detail.encode() + b'"}'
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(1, math.ceil(retry_after))).encode())
+            ]
+        })
+        await send({"type": "http.response.body", "body": body})
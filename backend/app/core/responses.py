@@ -0,0 +1,53 @@
+from typing import Any, Dict, Generic, Optional, Type, TypeVar
+from fastapi import Response
+from pydantic import TypeAdapter
+from pydantic_core import to_json
+
+T = TypeVar("T")
+
+
+class LeanSerializer(Generic[T]):
+    """
+    Pre-built JSON serializer for a response type.
+
+    Returning a model from a route makes FastAPI dump it to dicts, validate
+    those against `response_model` (every nested requirement and `HttpUrl`
+    again), and encode the result. Documents read from MongoDB or the catalog
+    snapshot are already valid, so read endpoints hand them to
+    `response()` instead: one pass through the pydantic-core serializer
+    straight to JSON bytes. Keep `response_model` on the route for the
+    OpenAPI schema; the output is byte-for-byte what FastAPI would produce.
+    """
+
+    def __init__(self, type_: Type[T]):
+        self.adapter = TypeAdapter(type_)
+
+    def dump(self, content: T) -> bytes:
+        return self.adapter.dump_json(content, by_alias=True)
+
+    def response(
+        self,
+        content: T,
+        status_code: int = 200,
+        headers: Optional[Dict[str, str]] = None
+    ) -> Response:
+        return Response(
+            content=self.dump(content),
+            status_code=status_code,
+            headers=headers,
+            media_type="application/json"
+        )
+
+
+def raw_json_response(
+    content: Any,
+    status_code: int = 200,
+    headers: Optional[Dict[str, str]] = None
+) -> Response:
+    """JSON response for plain dicts and lists, e.g. raw-mode service reads (see RawReader)."""
+    return Response(
+        content=to_json(content),
+        status_code=status_code,
+        headers=headers,
+        media_type="application/json"
+    )
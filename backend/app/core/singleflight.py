@@ -0,0 +1,105 @@
+import asyncio
+import contextvars
+import json
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+import pymongo
+from pymongo.errors import ExecutionTimeout
+from app.core.deadlines import time_left
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key into one in-flight task.
+
+    Every caller awaiting the same key receives the same result object, so
+    callers must treat it as read-only. The shared task is shielded: one caller
+    being cancelled (e.g. client disconnect) does not cancel it for the others,
+    but it is cancelled once every caller has gone.
+
+    With a `timeout`, the shared task runs detached from the request that
+    started it, under its own `pymongo.timeout(timeout)`, so it never inherits
+    the first caller's deadline. Each caller still waits only until its own
+    deadline (`time_left()`) and then gets an ExecutionTimeout, answered 504.
+    """
+
+    def __init__(self, name: str, timeout: float = 0.0):
+        self.name = name
+        self.timeout = timeout
+        self._in_flight: Dict[Hashable, asyncio.Task] = {}
+        self._waiters: Dict[asyncio.Task, int] = {}
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        self.calls += 1
+        task = self._in_flight.get(key)
+        if task is None:
+            self.executions += 1
+            if self.timeout:
+                task = asyncio.create_task(self._detached(fn), context=contextvars.Context())
+            else:
+                task = asyncio.ensure_future(fn())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._forget(key, task))
+        else:
+            self.coalesced += 1
+
+        self._waiters[task] = self._waiters.get(task, 0) + 1
+        try:
+            left = time_left()
+            if left is None:
+                return await asyncio.shield(task)
+            try:
+                return await asyncio.wait_for(asyncio.shield(task), left)
+            except asyncio.TimeoutError:
+                raise ExecutionTimeout(f"{self.name}: deadline exceeded waiting for a shared call", 50)
+        finally:
+            waiting = self._waiters.get(task, 0) - 1
+            if waiting > 0:
+                self._waiters[task] = waiting
+            else:
+                self._waiters.pop(task, None)
+                if not task.done():
+                    task.cancel()
+
+    async def _detached(self, fn: Callable[[], Awaitable[T]]) -> T:
+        with pymongo.timeout(self.timeout):
+            return await fn()
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        self._waiters.pop(task, None)
+        # Mark the exception as retrieved when every waiter was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._in_flight),
+        }
+
+
+_registry: Dict[str, SingleFlight] = {}
+
+
+def get_singleflight(name: str, timeout: float = 0.0) -> SingleFlight:
+    """Return the process-wide SingleFlight group for `name`."""
+    if name not in _registry:
+        _registry[name] = SingleFlight(name, timeout)
+    return _registry[name]
+
+
+def singleflight_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: group.stats() for name, group in _registry.items()}
+
+
+def make_key(*parts: Any, **params: Any) -> str:
+    """Canonical key: argument order and dict ordering don't matter."""
+    return json.dumps([parts, params], sort_keys=True, default=str, separators=(",", ":"))
@@ -0,0 +1,273 @@
+import asyncio
+import inspect
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Union
+from pymongo import ReturnDocument
+from pymongo.errors import OperationFailure, PyMongoError
+from app.core.config import settings
+from app.db.mongodb import db
+
+CATALOG_COLLECTIONS = ["universities", "specialties"]
+CATALOG_META_COLLECTION = "catalog_meta"
+
+# Local mode: changes kept with the version counter, for other workers to replay
+RECENT_CHANGES = 1000
+
+# Server error codes meaning "no change streams here" and "resume token too old"
+CHANGE_STREAMS_UNSUPPORTED = {40573}
+CHANGE_STREAM_HISTORY_LOST = {286, 280}
+
+
+@dataclass(frozen=True)
+class InvalidationEvent:
+    """
+    A change to a catalog collection.
+
+    `operation` is one of insert, update, replace, delete, or reset. A reset has
+    no document id and means "anything in this collection may have changed".
+    """
+
+    collection: str
+    operation: str
+    document_id: Optional[str] = None
+    updated_fields: tuple = field(default_factory=tuple)
+
+    @property
+    def is_reset(self) -> bool:
+        return self.operation == "reset"
+
+
+Handler = Callable[[InvalidationEvent], Union[None, Awaitable[None]]]
+
+
+class InvalidationBus:
+    """
+    Fans out catalog change events to in-process caches and indexes.
+
+    In `change_stream` mode every worker watches the catalog collections,
+    resuming after its last event when the stream drops (or emitting resets
+    if the oplog has moved past it). The resume token is kept in memory only:
+    everything subscribed is rebuilt from the database on startup, after the
+    stream is opened, so a restarted worker has nothing to catch up on.
+
+    Without a replica set (`local` mode, also used in tests) the services
+    publish events directly via `notify()`, which also bumps a shared version
+    counter in `catalog_meta` and appends the change to the last
+    RECENT_CHANGES kept next to it. Other workers poll the counter and replay
+    those changes as targeted events; only a worker that fell further behind
+    than that gets resets, which rebuild every subscriber (snapshot,
+    similarity, leaderboards, static catalog) from scratch. `auto` picks
+    change streams when available.
+    """
+
+    def __init__(self):
+        self.mode = settings.invalidation_mode
+        self.poll_interval = settings.invalidation_poll_seconds
+        self.active_mode: Optional[str] = None
+        self._subscribers: List[tuple[Optional[Set[str]], Handler]] = []
+        self._write_handlers: List[Callable[[InvalidationEvent], None]] = []
+        self._task: Optional[asyncio.Task] = None
+        self._resume_token: Optional[Dict[str, Any]] = None
+        self._seen_version = 0
+        self.events_published = 0
+
+    def subscribe(self, handler: Handler, collections: Optional[List[str]] = None) -> None:
+        """Register a handler for events on `collections` (all catalog collections by default)."""
+        self._subscribers.append((set(collections) if collections else None, handler))
+
+    def subscribe_writes(self, handler: Callable[[InvalidationEvent], None]) -> None:
+        """
+        Register a synchronous handler for this process's own writes, called by
+        `notify()` in every mode before it returns, for state that must reflect
+        a write before the next request of the same client reads it.
+        """
+        self._write_handlers.append(handler)
+
+    async def publish(self, event: InvalidationEvent) -> None:
+        self.events_published += 1
+        for collections, handler in self._subscribers:
+            if collections is not None and event.collection not in collections:
+                continue
+            try:
+                result = handler(event)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                print(f"[WARNING] Invalidation handler {getattr(handler, '__qualname__', handler)} "
+                      f"failed: {str(e)[:100]}")
+
+    async def reset_all(self) -> None:
+        for collection in CATALOG_COLLECTIONS:
+            await self.publish(InvalidationEvent(collection, "reset"))
+
+    async def notify(
+        self,
+        collection: str,
+        operation: str,
+        document_id: Optional[Any] = None,
+        updated_fields: Optional[List[str]] = None
+    ) -> None:
+        """
+        Called by the services after a write. With change streams active the
+        stream delivers the event to subscribers, so only write handlers run.
+        """
+        event = InvalidationEvent(
+            collection,
+            operation,
+            str(document_id) if document_id is not None else None,
+            tuple(updated_fields or ())
+        )
+        for handler in self._write_handlers:
+            try:
+                handler(event)
+            except Exception as e:
+                print(f"[WARNING] Invalidation write handler {getattr(handler, '__qualname__', handler)} "
+                      f"failed: {str(e)[:100]}")
+
+        if self.active_mode != "local":
+            return
+
+        await self.publish(event)
+
+        doc = await self._meta().find_one_and_update(
+            {"_id": "catalog"},
+            {
+                "$inc": {"version": 1},
+                "$push": {"recent": {"$each": [self._to_record(event)], "$slice": -RECENT_CHANGES}}
+            },
+            projection={"version": 1},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        seen, self._seen_version = self._seen_version, max(self._seen_version, doc["version"])
+        if doc["version"] > seen + 1:
+            # Other workers wrote in between: apply theirs, not our own again
+            await self._catch_up(seen, doc["version"] - 1)
+
+    async def start(self) -> None:
+        if self.mode in ("auto", "change_stream") and await self._change_streams_supported():
+            self.active_mode = "change_stream"
+            self._resume_token = None
+            self._task = asyncio.create_task(self._watch())
+        else:
+            self.active_mode = "local"
+            self._seen_version = await self.current_version()
+            self._task = asyncio.create_task(self._poll())
+        print(f"[OK] Invalidation bus running in {self.active_mode} mode")
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def _database(self):
+        return db.client[settings.database_name]
+
+    def _meta(self):
+        return self._database()[CATALOG_META_COLLECTION]
+
+    async def current_version(self) -> int:
+        doc = await self._meta().find_one({"_id": "catalog"}, {"version": 1})
+        return doc["version"] if doc else 0
+
+    @staticmethod
+    def _to_record(event: InvalidationEvent) -> Dict[str, Any]:
+        return {
+            "collection": event.collection,
+            "operation": event.operation,
+            "document_id": event.document_id,
+            "updated_fields": list(event.updated_fields)
+        }
+
+    async def _catch_up(self, after: int, until: int) -> None:
+        """Publish the changes of versions `after` + 1 to `until`, or resets if they are no longer kept."""
+        doc = await self._meta().find_one({"_id": "catalog"}, {"version": 1, "recent": {"$slice": -RECENT_CHANGES}})
+        recent = (doc.get("recent") or []) if doc else []
+        # recent[-1] is the change of doc["version"], which may be past `until` by now
+        newer = doc["version"] - until if doc else 0
+        wanted = recent[:max(len(recent) - newer, 0)][-(until - after):]
+        if len(wanted) < until - after:
+            await self.reset_all()
+            return
+        for record in wanted:
+            await self.publish(InvalidationEvent(
+                record["collection"],
+                record["operation"],
+                record.get("document_id"),
+                tuple(record.get("updated_fields") or ())
+            ))
+
+    async def _change_streams_supported(self) -> bool:
+        if self.mode == "local":
+            return False
+        try:
+            async with self._database().watch(max_await_time_ms=1):
+                return True
+        except OperationFailure as e:
+            if e.code in CHANGE_STREAMS_UNSUPPORTED or self.mode == "auto":
+                return False
+            raise
+
+    async def _watch(self) -> None:
+        pipeline = [{"$match": {"ns.coll": {"$in": CATALOG_COLLECTIONS}}}]
+        while True:
+            try:
+                async with self._database().watch(pipeline, resume_after=self._resume_token) as stream:
+                    async for change in stream:
+                        await self.publish(self._to_event(change))
+                        self._resume_token = stream.resume_token
+            except OperationFailure as e:
+                if e.code not in CHANGE_STREAM_HISTORY_LOST:
+                    print(f"[WARNING] Change stream failed: {str(e)[:100]}")
+                    await asyncio.sleep(1)
+                    continue
+                # Too far behind to resume: start fresh and drop everything derived
+                self._resume_token = None
+                await self.reset_all()
+            except PyMongoError as e:
+                print(f"[WARNING] Change stream interrupted: {str(e)[:100]}")
+                await asyncio.sleep(1)
+
+    @staticmethod
+    def _to_event(change: Dict[str, Any]) -> InvalidationEvent:
+        collection = change.get("ns", {}).get("coll", "")
+        operation = change.get("operationType", "reset")
+        if operation not in ("insert", "update", "replace", "delete"):
+            # drop, rename, invalidate...
+            return InvalidationEvent(collection, "reset")
+
+        document_id = change.get("documentKey", {}).get("_id")
+        updated = change.get("updateDescription", {}).get("updatedFields", {})
+        removed = change.get("updateDescription", {}).get("removedFields", [])
+        return InvalidationEvent(
+            collection,
+            operation,
+            str(document_id) if document_id is not None else None,
+            tuple(sorted(set(updated) | set(removed)))
+        )
+
+    async def _poll(self) -> None:
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                version = await self.current_version()
+                if version > self._seen_version:
+                    seen, self._seen_version = self._seen_version, version
+                    await self._catch_up(seen, version)
+                elif version < self._seen_version:
+                    # Counter reset (catalog_meta dropped): nothing to replay against
+                    self._seen_version = version
+                    await self.reset_all()
+            except Exception as e:
+                print(f"[WARNING] Catalog version poll failed: {str(e)[:100]}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.active_mode,
+            "subscribers": len(self._subscribers),
+            "events_published": self.events_published
+        }
+
+
+invalidation_bus = InvalidationBus()
@@ -1,27 +1,115 @@
+import asyncio
+import os
+import time
+from typing import List, Optional
 from motor.motor_asyncio import AsyncIOMotorClient
-from beanie import init_beanie
+from pymongo import IndexModel
+from beanie.odm.utils.init import Initializer
 from app.core.config import settings
+from app.db.slow_queries import slow_query_log
 from app.models.university import University
 from app.models.specialty import Specialty
+from app.models.recommendation_job import RecommendationJob
+from app.models.specialty_propagation import SpecialtyPropagationTask
+from app.models.catalog_change import CatalogChange
+from app.models.university_similarity import UniversitySimilarity
+from app.models.specialty_leaderboard import SpecialtyLeaderboard
+
+
+DOCUMENT_MODELS = [University, Specialty, RecommendationJob, SpecialtyPropagationTask, CatalogChange,
+                   UniversitySimilarity, SpecialtyLeaderboard]
 
 
 class Database:
     client: AsyncIOMotorClient = None
+    # Process that created `client`; a forked worker must not reuse it
+    pid: int = None
+    # Index sync state: "pending", "ready" or "failed"
+    indexes: str = "pending"
+    index_sync_seconds: Optional[float] = None
+    index_task: Optional[asyncio.Task] = None
 
 
 db = Database()
 
+# Indexes that reads and writes depend on to be correct, not just fast: the
+# unique change log sequence (collisions are detected by it) and the
+# 2dsphere index $geoNear needs. Created before serving in every mode.
+REQUIRED_INDEXES = {"seq", "location_2dsphere"}
+
+
+class DeferredIndexInitializer(Initializer):
+    """
+    Beanie initializer that registers the models without touching their
+    indexes. Beanie syncs indexes model by model, two round trips each,
+    before init returns; `create_required_indexes` creates the
+    REQUIRED_INDEXES, and `sync_indexes` runs Beanie's sync for all models
+    at once, which can happen after the app has started serving.
+
+    Overrides `init_indexes` of Beanie's internal Initializer, which is why
+    requirements.txt pins beanie to an exact version.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.deferred: List[type] = []
+
+    async def init_indexes(self, cls, allow_index_dropping: bool = False):
+        self.deferred.append(cls)
+
+    async def create_required_indexes(self) -> None:
+        for cls in self.deferred:
+            required = [
+                index for index in getattr(cls.Settings, "indexes", [])
+                if isinstance(index, IndexModel) and index.document["name"] in REQUIRED_INDEXES
+            ]
+            if required:
+                await cls.get_motor_collection().create_indexes(required)
+
+    async def sync_indexes(self) -> None:
+        started = time.perf_counter()
+        try:
+            await asyncio.gather(*(
+                super(DeferredIndexInitializer, self).init_indexes(cls, self.allow_index_dropping)
+                for cls in self.deferred
+            ))
+        except Exception as e:
+            db.indexes = "failed"
+            print(f"[WARNING] Index sync failed: {str(e)[:100]}")
+            return
+        db.indexes = "ready"
+        db.index_sync_seconds = round(time.perf_counter() - started, 3)
+        print(f"[OK] Indexes in sync for {len(self.deferred)} collections ({db.index_sync_seconds}s)")
+
 
 async def connect_to_mongo():
-    db.client = AsyncIOMotorClient(settings.mongodb_url)
-    await init_beanie(
-        database=db.client[settings.database_name],
-        document_models=[University, Specialty]
-    )
+    if db.client is not None and db.pid == os.getpid():
+        return
+    db.client = AsyncIOMotorClient(settings.mongodb_url, event_listeners=[slow_query_log])
+    db.pid = os.getpid()
+    slow_query_log.start(db.client)
+    initializer = DeferredIndexInitializer(database=db.client[settings.database_name], document_models=DOCUMENT_MODELS)
+    await initializer
+    # Fails startup rather than serving without them
+    await initializer.create_required_indexes()
+
+    # "background" serves right away: only a fresh database lacks the sort and
+    # filter indexes meanwhile, so those reads are slower; "startup" waits
+    db.indexes = "pending"
+    if settings.mongo_index_sync == "startup":
+        await initializer.sync_indexes()
+    else:
+        db.index_task = asyncio.create_task(initializer.sync_indexes())
     print(f"Connected to MongoDB: {settings.database_name}")
 
 
 async def close_mongo_connection():
-    if db.client:
+    if db.index_task is not None:
+        db.index_task.cancel()
+        await asyncio.gather(db.index_task, return_exceptions=True)
+        db.index_task = None
+    if db.client and db.pid == os.getpid():
+        slow_query_log.stop()
         db.client.close()
         print("MongoDB connection closed")
+    db.client = None
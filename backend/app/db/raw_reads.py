@@ -0,0 +1,67 @@
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Type
+from bson import ObjectId
+from pydantic import BaseModel
+from pydantic_core import PydanticUndefined
+from app.models.specialty import Specialty
+from app.models.university import University, UniversityRequirements
+
+_MISSING = object()
+
+
+class RawReader:
+    """
+    Reads a model's collection as plain dicts, skipping pydantic hydration.
+
+    Documents are projected to the model's fields and shaped like the model's
+    JSON output: every field present (defaults filled in), `_id` as a string,
+    `exclude`d fields such as `revision_id` left out, nested models shaped the
+    same way. Values are otherwise returned as stored, which is only safe for
+    data that was written through the models in the first place.
+    """
+
+    def __init__(self, model: Type[BaseModel], nested: Optional[Dict[str, "RawReader"]] = None):
+        self.model = model
+        nested = nested or {}
+        self.fields: List[Tuple[str, Any, Any, Optional[RawReader]]] = []
+        for name, info in model.model_fields.items():
+            if info.exclude:
+                continue
+            default = None if info.default is PydanticUndefined else info.default
+            self.fields.append((info.alias or name, default, info.default_factory, nested.get(name)))
+        self.projection = {key: 1 for key, _, _, _ in self.fields}
+
+    def shape(self, doc: Dict[str, Any]) -> Dict[str, Any]:
+        shaped = {}
+        for key, default, factory, nested in self.fields:
+            value = doc.get(key, _MISSING)
+            if value is _MISSING:
+                value = factory() if factory else default
+            elif isinstance(value, ObjectId):
+                value = str(value)
+            elif nested is not None and value:
+                value = [nested.shape(item) for item in value]
+            shaped[key] = value
+        return shaped
+
+    async def find(
+        self,
+        query: Dict[str, Any],
+        sort: Optional[Sequence[Tuple[str, int]]] = None,
+        skip: int = 0,
+        limit: int = 0
+    ) -> List[Dict[str, Any]]:
+        cursor = self.model.get_motor_collection().find(query, self.projection)
+        if sort:
+            cursor = cursor.sort(list(sort))
+        if skip:
+            cursor = cursor.skip(skip)
+        if limit:
+            cursor = cursor.limit(limit)
+        return [self.shape(doc) async for doc in cursor]
+
+    async def count(self, query: Dict[str, Any]) -> int:
+        return await self.model.get_motor_collection().count_documents(query)
+
+
+university_reader = RawReader(University, {"requirements": RawReader(UniversityRequirements)})
+specialty_reader = RawReader(Specialty)
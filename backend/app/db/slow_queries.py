@@ -0,0 +1,188 @@
+import asyncio
+import contextvars
+import json
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, Optional, Tuple
+from pymongo import monitoring
+from app.core.config import settings
+
+# Commands worth timing; inserts are excluded (their documents would be held until they finish)
+TIMED_COMMANDS = {"find", "aggregate", "count", "distinct", "findAndModify", "update", "delete"}
+
+# Parts of a command that make up its shape
+SHAPE_FIELDS = ("filter", "query", "pipeline", "sort", "projection", "key", "updates", "deletes")
+
+# Values kept verbatim when normalizing: directions and inclusion flags, not data
+LITERAL_KEYS = {"sort", "$sort", "projection", "$project"}
+
+# Driver and session fields an explain must not carry
+EXPLAIN_DROP = {"lsid", "$clusterTime", "$db", "$readPreference", "txnNumber", "readConcern", "writeConcern", "maxTimeMS"}
+
+# MaxTimeMSExpired
+TIMEOUT_CODE = 50
+
+
+def normalize(value: Any, literal: bool = False) -> Any:
+    """Query shape: structure and operators kept, values replaced by "?"."""
+    if isinstance(value, dict):
+        return {key: normalize(item, literal or key in LITERAL_KEYS) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        if not value:
+            return []
+        # Pipelines and $and/$or branches differ per element, $in lists don't
+        if all(isinstance(item, dict) for item in value):
+            return [normalize(item, literal) for item in value]
+        return ["?"]
+    return value if literal else "?"
+
+
+def plan_summary(explain: Dict[str, Any]) -> str:
+    """Stages of the winning plan, leaf last, with index names: "FETCH <- IXSCAN ranking_tuition_acceptance"."""
+    winning = _find_key(explain, "winningPlan")
+    if winning is None:
+        return "unknown"
+    if "queryPlan" in winning:
+        winning = winning["queryPlan"]
+    stages = []
+    stage: Optional[Dict[str, Any]] = winning
+    while stage:
+        name = stage.get("stage", "?")
+        if stage.get("indexName"):
+            name += f" {stage['indexName']}"
+        stages.append(name)
+        children = stage.get("inputStages") or []
+        stage = stage.get("inputStage") or (children[0] if children else None)
+    return " <- ".join(stages)
+
+
+def _find_key(value: Any, key: str) -> Any:
+    if isinstance(value, dict):
+        if key in value:
+            return value[key]
+        value = list(value.values())
+    if isinstance(value, list):
+        for item in value:
+            found = _find_key(item, key)
+            if found is not None:
+                return found
+    return None
+
+
+class SlowQueryLog(monitoring.CommandListener):
+    """
+    Command listener recording MongoDB commands slower than `slow_query_ms`,
+    and every command that hit its deadline, with the normalized query shape,
+    the duration and a summary of the winning plan.
+
+    Listener callbacks run on the driver's threads and only do dictionary work.
+    Plans come from an `explain` run later on the event loop, once per shape
+    every `slow_query_explain_interval_seconds`, outside any request deadline.
+    Entries are printed and the most recent ones kept for /health.
+    """
+
+    def __init__(self):
+        self.threshold_ms = settings.slow_query_ms
+        self.explain_enabled = settings.slow_query_explain
+        self.explain_interval = settings.slow_query_explain_interval_seconds
+        self.entries: Deque[Dict[str, Any]] = deque(maxlen=settings.slow_query_log_size)
+        self.logged = 0
+        self.timeouts = 0
+        self._started: Dict[Tuple[Any, int], Tuple[str, Any]] = {}
+        self._plans: Dict[str, Tuple[float, str]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._client = None
+
+    def start(self, client) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._client = client
+
+    def stop(self) -> None:
+        self._loop = None
+        self._client = None
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        if event.command_name in TIMED_COMMANDS:
+            self._started[(event.connection_id, event.request_id)] = (event.database_name, event.command)
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        self._finish(event, timed_out=False)
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        failure = event.failure if isinstance(event.failure, dict) else {}
+        self._finish(event, timed_out=failure.get("code") == TIMEOUT_CODE)
+
+    def _finish(self, event, timed_out: bool) -> None:
+        started = self._started.pop((event.connection_id, event.request_id), None)
+        if started is None:
+            return
+        duration_ms = event.duration_micros / 1000
+        if duration_ms < self.threshold_ms and not timed_out:
+            return
+
+        database, command = started
+        shape = {key: normalize(command[key]) for key in SHAPE_FIELDS if key in command}
+        entry = {
+            "at": datetime.utcnow().isoformat(),
+            "command": event.command_name,
+            "collection": command.get(event.command_name),
+            "shape": shape,
+            "duration_ms": round(duration_ms, 1),
+            "max_time_ms": command.get("maxTimeMS"),
+            "timed_out": timed_out,
+            "plan": None
+        }
+        self.logged += 1
+        self.timeouts += timed_out
+        self.entries.append(entry)
+
+        loop = self._loop
+        if loop is None or not self.explain_enabled:
+            self._print(entry)
+            return
+        # Fresh context: the explain must not inherit the request's deadline
+        loop.call_soon_threadsafe(self._explain_later, database, command, entry, context=contextvars.Context())
+
+    def _explain_later(self, database: str, command: Any, entry: Dict[str, Any]) -> None:
+        asyncio.ensure_future(self._explain(database, command, entry))
+
+    async def _explain(self, database: str, command: Any, entry: Dict[str, Any]) -> None:
+        key = json.dumps([entry["collection"], entry["command"], entry["shape"]], sort_keys=True, default=str)
+        cached = self._plans.get(key)
+        now = time.monotonic()
+        if cached and now - cached[0] < self.explain_interval:
+            entry["plan"] = cached[1]
+        elif self._client is not None:
+            # Same shape slow again while this explain runs: reuse, don't explain twice
+            self._plans[key] = (now, "explain pending")
+            try:
+                explained = {k: v for k, v in command.items() if k not in EXPLAIN_DROP}
+                result = await self._client[database].command(
+                    {"explain": explained, "verbosity": "queryPlanner"}
+                )
+                entry["plan"] = plan_summary(result)
+            except Exception as e:
+                entry["plan"] = f"explain failed: {str(e)[:60]}"
+            self._plans[key] = (now, entry["plan"])
+        self._print(entry)
+
+    @staticmethod
+    def _print(entry: Dict[str, Any]) -> None:
+        label = "QUERY DEADLINE" if entry["timed_out"] else "SLOW QUERY"
+        shape = json.dumps(entry["shape"], default=str, separators=(",", ":"))
+        print(
+            f"[{label}] {entry['duration_ms']} ms {entry['collection']}.{entry['command']} "
+            f"{shape[:300]} plan: {entry['plan'] or 'n/a'}"
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "threshold_ms": self.threshold_ms,
+            "logged": self.logged,
+            "timeouts": self.timeouts,
+            "recent": list(self.entries)[-5:]
+        }
+
+
+slow_query_log = SlowQueryLog()
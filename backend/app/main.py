@@ -1,23 +1,75 @@
-from fastapi import FastAPI
+import asyncio
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from pymongo.errors import PyMongoError
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from app.core.config import settings
-from app.db.mongodb import connect_to_mongo, close_mongo_connection
-from app.routers import universities, specialties, ai_router
+from app.core.compression import CompressionMiddleware, compressed_cache
+from app.core.deadlines import DeadlineMiddleware, deadline_stats, record_timeout
+from app.core.loop_monitor import loop_monitor
+from app.core.offload import shutdown_offload
+from app.core.rate_limit import RateLimitMiddleware, rate_limiter
+from app.core.singleflight import singleflight_stats
+from app.db.mongodb import connect_to_mongo, close_mongo_connection, db
+from app.db.invalidation import invalidation_bus
+from app.db.slow_queries import slow_query_log
+from app.services.catalog_snapshot import catalog_snapshot
+from app.services.change_log import change_log
+from app.services.similarity import similarity_index
+from app.services.leaderboards import leaderboard_index
+from app.services.static_catalog import StaticCatalogMiddleware, static_catalog
+from app.services.specialty_propagation import SpecialtyPropagationService
+from app.routers import universities, specialties, ai_router, changes
+from app.ai.agent import ai_agent
+from app.ai.batch_jobs import batch_job_manager
+from app.ai.context7_client import context7_client
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
+    await loop_monitor.start()
+    if settings.rate_limit_enabled:
+        rate_limiter.open()
+    await context7_client.open()
     try:
         await connect_to_mongo()
         print("[OK] MongoDB connected successfully")
+        await invalidation_bus.start()
+        resumed = await SpecialtyPropagationService.resume_pending()
+        if resumed:
+            print(f"[OK] Resumed {resumed} specialty propagation(s)")
+        # Independent of each other; the snapshot load is the long one
+        await asyncio.gather(
+            catalog_snapshot.start(),
+            change_log.start(),
+            similarity_index.start(),
+            leaderboard_index.start(),
+            static_catalog.start(),
+            batch_job_manager.start()
+        )
     except Exception as e:
         print(f"[WARNING] MongoDB connection failed: {str(e)[:100]}")
         print("[WARNING] API will run in demo mode without database")
     yield
     # Shutdown
+    await batch_job_manager.stop()
+    # Batch work resumes from its lease; requests still waiting on the LLM get to finish
+    if not await ai_agent.gateway.drain(settings.llm_drain_seconds):
+        print("[WARNING] AI calls still running after drain timeout")
+    await ai_agent.gateway.close()
+    await catalog_snapshot.stop()
+    await change_log.stop()
+    await similarity_index.stop()
+    await leaderboard_index.stop()
+    await static_catalog.stop()
+    await invalidation_bus.stop()
+    await context7_client.close()
+    await rate_limiter.close()
     await close_mongo_connection()
+    shutdown_offload()
+    await loop_monitor.stop()
 
 
 app = FastAPI(
@@ -27,6 +79,17 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Innermost: requests rejected by the rate limiter never start a deadline
+app.add_middleware(DeadlineMiddleware)
+
+# Inside CORS, so 429s carry CORS headers and browsers can read Retry-After
+if settings.rate_limit_enabled:
+    app.add_middleware(RateLimitMiddleware)
+
+# Static catalog pages skip rate limiting, as they would behind a CDN
+if settings.static_catalog_enabled and settings.static_catalog_mode != "off":
+    app.add_middleware(StaticCatalogMiddleware)
+
 # CORS configuration
 app.add_middleware(
     CORSMiddleware,
@@ -34,12 +97,26 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Retry-After"],
 )
 
+if settings.compression_enabled:
+    app.add_middleware(CompressionMiddleware)
+
+@app.exception_handler(PyMongoError)
+async def mongo_error_handler(request: Request, exc: PyMongoError):
+    # Deadline exceeded (maxTimeMS on the server, or the driver's own timeout)
+    if exc.timeout:
+        record_timeout()
+        return JSONResponse(status_code=504, content={"detail": "Query deadline exceeded"})
+    raise exc
+
+
 # Include routers
 app.include_router(universities.router, prefix="/api")
 app.include_router(specialties.router, prefix="/api")
 app.include_router(ai_router.router, prefix="/api")
+app.include_router(changes.router, prefix="/api")
 
 
 @app.get("/")
@@ -51,7 +128,9 @@ async def root():
         "endpoints": {
             "universities": "/api/universities",
             "specialties": "/api/specialties",
+            "changes": "/api/changes",
             "ai_recommendations": "/api/ai/recommend",
+            "ai_batch_recommendations": "/api/ai/recommend/batch",
             "ai_comparison": "/api/ai/compare"
         }
     }
@@ -62,5 +141,17 @@ async def health_check():
     return {
         "status": "healthy",
         "database": "connected",
-        "version": settings.app_version
+        "indexes": {"state": db.indexes, "sync_seconds": db.index_sync_seconds},
+        "version": settings.app_version,
+        "coalescing": singleflight_stats(),
+        "catalog_snapshot": catalog_snapshot.stats(),
+        "similarity": similarity_index.stats(),
+        "leaderboards": leaderboard_index.stats(),
+        "static_catalog": static_catalog.stats(),
+        "invalidation": invalidation_bus.stats(),
+        "compression_cache": compressed_cache.stats(),
+        "rate_limit": rate_limiter.stats(),
+        "deadlines": deadline_stats(),
+        "slow_queries": slow_query_log.stats(),
+        "event_loop": loop_monitor.stats()
     }
@@ -0,0 +1,19 @@
+from datetime import datetime
+from beanie import Document
+from pydantic import Field
+from pymongo import ASCENDING, IndexModel
+
+
+class CatalogChange(Document):
+    seq: int = Field(..., description="Monotonic sequence number, unique across the log")
+    collection: str = Field(..., description="universities or specialties")
+    document_id: str = Field(..., description="Id of the changed document")
+    operation: str = Field(..., description="upsert or delete")
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+    class Settings:
+        name = "catalog_changes"
+        indexes = [
+            IndexModel([("seq", ASCENDING)], name="seq", unique=True),
+            "created_at"
+        ]
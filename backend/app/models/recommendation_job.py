@@ -0,0 +1,36 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from beanie import Document
+from pydantic import BaseModel, Field
+
+
+class StudentProfile(BaseModel):
+    student_id: str = Field(..., description="Counselor-assigned student identifier")
+    query: str = Field(..., description="Student's question or requirements")
+    user_score: Optional[float] = Field(None, ge=0, le=1600, description="Student's test score (SAT/equivalent)")
+    preferred_country: Optional[str] = Field(None, description="Preferred country")
+    preferred_specialty: Optional[str] = Field(None, description="Preferred field of study")
+
+
+class RecommendationJob(Document):
+    status: str = Field("queued", description="queued, running, completed or failed")
+    mode: str = Field("auto", description="Recommendation mode used for every student")
+    students: List[StudentProfile] = Field(default_factory=list)
+    # One slot per student, filled in as results arrive; None means not done yet
+    results: List[Optional[Dict[str, Any]]] = Field(default_factory=list)
+    total: int = 0
+    completed: int = 0
+    failed: int = 0
+    error: Optional[str] = None
+    worker_id: Optional[str] = Field(None, description="Worker currently holding the job")
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    heartbeat_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Settings:
+        name = "recommendation_jobs"
+        indexes = [
+            "status",
+            "created_at"
+        ]
@@ -0,0 +1,28 @@
+from datetime import datetime
+from typing import List, Optional
+from beanie import Document
+from pydantic import BaseModel, Field
+
+
+class LeaderboardEntry(BaseModel):
+    university_id: str
+    value: float = Field(..., description="The board's metric: ranking, minimum score or tuition in USD")
+
+
+class SpecialtyLeaderboard(Document):
+    """
+    Precomputed top universities of one specialty, lowest value first, one
+    board per metric; `id` is the specialty id as it appears in
+    `University.requirements`.
+    """
+
+    id: Optional[str] = None
+    specialty_name: str
+    universities: int = Field(0, description="Universities with a requirement for the specialty")
+    ranking: List[LeaderboardEntry] = Field(default_factory=list)
+    min_score: List[LeaderboardEntry] = Field(default_factory=list)
+    tuition: List[LeaderboardEntry] = Field(default_factory=list)
+    computed_at: datetime = Field(default_factory=datetime.utcnow)
+
+    class Settings:
+        name = "specialty_leaderboards"
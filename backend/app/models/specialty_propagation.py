@@ -0,0 +1,20 @@
+from datetime import datetime
+from typing import Optional
+from beanie import Document, PydanticObjectId
+from pydantic import Field
+
+
+class SpecialtyPropagationTask(Document):
+    specialty_id: str = Field(..., description="Renamed or deleted specialty")
+    operation: str = Field(..., description="rename or delete")
+    old_name: str = Field(..., description="Specialty name before the change")
+    new_name: Optional[str] = Field(None, description="New name for renames")
+    status: str = Field("running", description="running or completed")
+    last_id: Optional[PydanticObjectId] = Field(None, description="Last university _id processed")
+    modified: int = 0
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+    class Settings:
+        name = "specialty_propagations"
+        indexes = ["status"]
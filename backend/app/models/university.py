@@ -1,6 +1,7 @@
-from typing import List, Optional
+from typing import List, Literal, Optional
 from beanie import Document, Link
 from pydantic import BaseModel, Field, HttpUrl
+from pymongo import ASCENDING, GEOSPHERE, IndexModel
 from app.models.specialty import Specialty
 
 
@@ -12,6 +13,16 @@ class UniversityRequirements(BaseModel):
     additional_requirements: Optional[str] = Field(None, description="Additional requirements")
 
 
+class GeoPoint(BaseModel):
+    type: Literal["Point"] = "Point"
+    coordinates: List[float] = Field(
+        ...,
+        min_length=2,
+        max_length=2,
+        description="[longitude, latitude] in degrees"
+    )
+
+
 class University(Document):
     name: str = Field(..., description="University name")
     country: str = Field(..., description="Country")
@@ -28,14 +39,58 @@ class University(Document):
     tuition_fee_usd: Optional[float] = Field(None, ge=0, description="Annual tuition in USD")
     student_count: Optional[int] = Field(None, ge=0, description="Total student count")
     acceptance_rate: Optional[float] = Field(None, ge=0, le=100, description="Acceptance rate percentage")
+    location: Optional[GeoPoint] = Field(
+        None,
+        description="City location from the bundled gazetteer, for near-me search"
+    )
 
     class Settings:
         name = "universities"
         indexes = [
             "name",
             "country",
-            "specialties",
-            "ranking"
+            # Keyset pages of /universities/scroll in the default sort order
+            IndexModel([("name", ASCENDING), ("_id", ASCENDING)], name="name_id"),
+            # Range filters: each index leads with one range field and carries
+            # the others as trailing keys, so bounds on a second field are
+            # checked in the index before any document is fetched. The first
+            # one also serves plain ranking sorts and ranges.
+            IndexModel(
+                [("ranking", ASCENDING), ("tuition_fee_usd", ASCENDING), ("acceptance_rate", ASCENDING)],
+                name="ranking_tuition_acceptance"
+            ),
+            IndexModel(
+                [("tuition_fee_usd", ASCENDING), ("ranking", ASCENDING), ("acceptance_rate", ASCENDING)],
+                name="tuition_ranking_acceptance"
+            ),
+            IndexModel(
+                [("acceptance_rate", ASCENDING), ("ranking", ASCENDING), ("tuition_fee_usd", ASCENDING)],
+                name="acceptance_ranking_tuition"
+            ),
+            IndexModel(
+                [("student_count", ASCENDING), ("ranking", ASCENDING)],
+                name="student_count_ranking"
+            ),
+            # $geoNear for the list endpoint's near= filter
+            IndexModel([("location", GEOSPHERE)], name="location_2dsphere"),
+            # Multikey on the specialty id array, one per sort order for
+            # /specialties/{id}/universities; _id keeps cursor pages stable
+            IndexModel(
+                [("specialties", ASCENDING), ("name", ASCENDING), ("_id", ASCENDING)],
+                name="specialties_name"
+            ),
+            IndexModel(
+                [("specialties", ASCENDING), ("ranking", ASCENDING), ("_id", ASCENDING)],
+                name="specialties_ranking"
+            ),
+            IndexModel(
+                [("specialties", ASCENDING), ("tuition_fee_usd", ASCENDING), ("_id", ASCENDING)],
+                name="specialties_tuition_fee"
+            ),
+            IndexModel(
+                [("specialties", ASCENDING), ("acceptance_rate", ASCENDING), ("_id", ASCENDING)],
+                name="specialties_acceptance_rate"
+            )
         ]
 
     class Config:
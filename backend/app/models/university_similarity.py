@@ -0,0 +1,19 @@
+from datetime import datetime
+from typing import List
+from beanie import Document
+from pydantic import BaseModel, Field
+
+
+class SimilarNeighbour(BaseModel):
+    university_id: str
+    score: float = Field(..., description="Cosine similarity of the feature vectors")
+
+
+class UniversitySimilarity(Document):
+    """Precomputed nearest neighbours of one university; `id` is the university's id."""
+
+    neighbours: List[SimilarNeighbour] = Field(default_factory=list)
+    computed_at: datetime = Field(default_factory=datetime.utcnow)
+
+    class Settings:
+        name = "university_similarities"
@@ -1,17 +1,41 @@
+import math
+from datetime import datetime
 from typing import Optional, List
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, status
+from beanie import PydanticObjectId
 from pydantic import BaseModel, Field
 from app.ai.agent import ai_agent
+from app.ai.batch_jobs import batch_job_manager
+from app.core.config import settings
+from app.models.recommendation_job import RecommendationJob, StudentProfile
 
 router = APIRouter(prefix="/ai", tags=["AI Agent"])
 
 
+def _raise_for_failure(result: dict, action: str) -> None:
+    """Turn a failed agent result into an HTTP error, keeping gateway status codes."""
+    headers = None
+    if result.get("retry_after") is not None:
+        headers = {"Retry-After": str(max(1, math.ceil(result["retry_after"])))}
+
+    raise HTTPException(
+        status_code=result.get("status_code", 500),
+        detail=f"AI {action} failed: {result.get('error', 'Unknown error')}",
+        headers=headers
+    )
+
+
 class RecommendationRequest(BaseModel):
     session_id: str = Field(..., description="Unique session identifier for context tracking")
     query: str = Field(..., description="User's question or requirements")
     user_score: Optional[float] = Field(None, ge=0, le=1600, description="User's test score (SAT/equivalent)")
     preferred_country: Optional[str] = Field(None, description="Preferred country")
     preferred_specialty: Optional[str] = Field(None, description="Preferred field of study")
+    mode: str = Field(
+        "auto",
+        pattern="^(auto|llm|offline)$",
+        description="auto: LLM with offline fallback, llm: LLM only, offline: local ranking only"
+    )
 
     class Config:
         json_schema_extra = {
@@ -43,6 +67,51 @@ class ComparisonRequest(BaseModel):
         }
 
 
+class BatchRecommendationRequest(BaseModel):
+    students: List[StudentProfile] = Field(..., min_length=1, description="Students to recommend for")
+    mode: str = Field(
+        "auto",
+        pattern="^(auto|llm|offline)$",
+        description="Recommendation mode applied to every student"
+    )
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "students": [
+                    {
+                        "student_id": "student_1",
+                        "query": "Strong CS program with research opportunities",
+                        "user_score": 1450,
+                        "preferred_country": "USA",
+                        "preferred_specialty": "Computer Science"
+                    }
+                ],
+                "mode": "auto"
+            }
+        }
+
+
+class BatchJobStatus(BaseModel):
+    status: str
+    total: int
+    completed: int
+    failed: int
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+    finished_at: Optional[datetime] = None
+
+
+def _job_status(job_id: PydanticObjectId, job: BatchJobStatus) -> dict:
+    done = job.completed + job.failed
+    return {
+        "job_id": str(job_id),
+        **job.model_dump(),
+        "progress": round(done / job.total, 4) if job.total else 1.0
+    }
+
+
 @router.post("/recommend")
 async def recommend_universities(request: RecommendationRequest):
     """
@@ -64,16 +133,56 @@ async def recommend_universities(request: RecommendationRequest):
         user_query=request.query,
         user_score=request.user_score,
         preferred_country=request.preferred_country,
-        preferred_specialty=request.preferred_specialty
+        preferred_specialty=request.preferred_specialty,
+        mode=request.mode
     )
 
     if not result.get("success"):
+        _raise_for_failure(result, "recommendation")
+
+    return result
+
+
+@router.post("/recommend/batch", status_code=status.HTTP_202_ACCEPTED)
+async def create_batch_recommendation(request: BatchRecommendationRequest):
+    """
+    Queue recommendations for a whole class of students.
+
+    Returns a job id immediately. Students sharing a (country, specialty) pair
+    share one candidate fetch; progress and results are persisted so the job
+    survives restarts.
+    """
+    if not batch_job_manager.running:
+        raise HTTPException(status_code=503, detail="Batch jobs require a database connection")
+    if len(request.students) > settings.batch_max_students:
         raise HTTPException(
-            status_code=500,
-            detail=f"AI recommendation failed: {result.get('error', 'Unknown error')}"
+            status_code=422,
+            detail=f"A batch can contain at most {settings.batch_max_students} students"
         )
 
-    return result
+    job = await batch_job_manager.submit(request.students, mode=request.mode)
+    return {"job_id": str(job.id), "status": job.status, "total": job.total}
+
+
+@router.get("/recommend/batch/{job_id}")
+async def get_batch_recommendation_status(job_id: PydanticObjectId):
+    """Job status and progress, without the (possibly large) results."""
+    job = await RecommendationJob.find_one(RecommendationJob.id == job_id).project(BatchJobStatus)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return _job_status(job_id, job)
+
+
+@router.get("/recommend/batch/{job_id}/result")
+async def get_batch_recommendation_result(job_id: PydanticObjectId):
+    """Per-student results; students not processed yet are returned as null."""
+    job = await RecommendationJob.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {
+        **_job_status(job_id, BatchJobStatus(**job.model_dump())),
+        "results": job.results
+    }
 
 
 @router.post("/compare")
@@ -97,10 +206,7 @@ async def compare_universities(request: ComparisonRequest):
     )
 
     if not result.get("success"):
-        raise HTTPException(
-            status_code=500,
-            detail=f"AI comparison failed: {result.get('error', 'Unknown error')}"
-        )
+        _raise_for_failure(result, "comparison")
 
     return result
 
@@ -110,15 +216,18 @@ async def ai_health_check():
     """
     Check AI agent health and OpenAI connectivity.
     """
-    openai_configured = bool(ai_agent.client.api_key)
+    openai_configured = bool(ai_agent.gateway.api_key)
 
     return {
         "status": "operational" if openai_configured else "degraded",
         "openai_configured": openai_configured,
         "model": ai_agent.model,
         "session_storage": "in-memory",
+        "gateway": ai_agent.gateway.stats(),
+        "coalescing": ai_agent.llm_flight.stats(),
         "capabilities": [
             "university_recommendations",
+            "offline_recommendations",
             "university_comparison",
             "conversation_tracking",
             "personalized_advice"
@@ -0,0 +1,39 @@
+from typing import Any, Dict, List, Optional
+from fastapi import APIRouter, Query
+from pydantic import BaseModel
+from app.core.responses import raw_json_response
+from app.services.change_log import change_log
+
+router = APIRouter(prefix="/changes", tags=["Changes"])
+
+
+class CatalogChangeEntry(BaseModel):
+    seq: int
+    collection: str
+    id: str
+    operation: str
+    # Current document for upserts, absent for deletes
+    document: Optional[Dict[str, Any]] = None
+
+
+class ChangesPage(BaseModel):
+    since: int
+    next_since: int
+    resync_required: bool
+    has_more: bool
+    changes: List[CatalogChangeEntry]
+
+
+@router.get("", response_model=ChangesPage)
+async def get_changes(since: int = Query(0, ge=0, description="next_since from the previous call")):
+    """
+    Catalog changes after `since`, one entry per changed document.
+
+    Start with `since=0`, apply `changes` (upsert the document or delete the
+    id), store `next_since`, and call again; repeat immediately while
+    `has_more`. With nothing new the response is an empty page; a change
+    still being written ends the page early and arrives on a later poll. When
+    `resync_required` is true the cursor is too old: refetch the full lists,
+    then continue from `next_since`.
+    """
+    return raw_json_response(await change_log.changes_since(since))
@@ -1,12 +1,48 @@
-from typing import List
+from datetime import datetime
+from typing import List, Optional
 from fastapi import APIRouter, HTTPException, status, Query
 from beanie import PydanticObjectId
+from pydantic import BaseModel
+from app.core.config import settings
+from app.core.responses import LeanSerializer, raw_json_response
 from app.models.specialty import Specialty
+from app.models.university import University, UniversityRequirements
 from app.services.specialty_service import SpecialtyService
+from app.services.university_service import UniversityService
+from app.services.specialty_propagation import SpecialtyPropagationService
 
 router = APIRouter(prefix="/specialties", tags=["Specialties"])
 
 
+class SpecialtyUniversity(BaseModel):
+    university: University
+    requirement: Optional[UniversityRequirements] = None
+
+
+class SpecialtyUniversitiesPage(BaseModel):
+    items: List[SpecialtyUniversity]
+    page_size: int
+    next_cursor: Optional[str] = None
+
+
+class LeaderboardUniversity(BaseModel):
+    university: University
+    value: float
+
+
+class SpecialtyLeaderboardResponse(BaseModel):
+    specialty_id: str
+    specialty_name: str
+    by: str
+    universities: int
+    computed_at: Optional[datetime] = None
+    items: List[LeaderboardUniversity]
+
+
+_specialty_json = LeanSerializer(Specialty)
+_specialty_universities_json = LeanSerializer(SpecialtyUniversitiesPage)
+
+
 @router.post("/", response_model=Specialty, status_code=status.HTTP_201_CREATED)
 async def create_specialty(specialty: Specialty):
     return await SpecialtyService.create_specialty(specialty.model_dump(exclude={"id"}))
@@ -17,12 +53,24 @@ async def get_specialties(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100)
 ):
-    return await SpecialtyService.get_all_specialties(skip=skip, limit=limit)
+    return raw_json_response(await SpecialtyService.get_all_specialties(skip=skip, limit=limit, raw=True))
 
 
 @router.get("/search", response_model=List[Specialty])
 async def search_specialties(query: str = Query(..., min_length=1)):
-    return await SpecialtyService.search_specialties(query)
+    return raw_json_response(await SpecialtyService.search_specialties(query, raw=True))
+
+
+@router.get("/consistency")
+async def check_specialty_consistency():
+    """Count universities whose denormalized specialty names are out of date."""
+    return await SpecialtyPropagationService.check_consistency()
+
+
+@router.post("/consistency/repair")
+async def repair_specialty_consistency():
+    """Rewrite out-of-date denormalized specialty names in bulk."""
+    return await SpecialtyPropagationService.repair_consistency()
 
 
 @router.get("/{specialty_id}", response_model=Specialty)
@@ -30,7 +78,80 @@ async def get_specialty(specialty_id: PydanticObjectId):
     specialty = await SpecialtyService.get_specialty(specialty_id)
     if not specialty:
         raise HTTPException(status_code=404, detail="Specialty not found")
-    return specialty
+    return _specialty_json.response(specialty)
+
+
+@router.get("/{specialty_id}/universities", response_model=SpecialtyUniversitiesPage)
+async def get_specialty_universities(
+    specialty_id: PydanticObjectId,
+    page_size: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    sort_by: str = Query("name", regex="^(name|ranking|tuition_fee|acceptance_rate)$"),
+    sort_order: str = Query("asc", regex="^(asc|desc)$")
+):
+    """
+    Universities offering a specialty, with that specialty's requirements inline.
+    """
+    specialty = await SpecialtyService.get_specialty(specialty_id)
+    if not specialty:
+        raise HTTPException(status_code=404, detail="Specialty not found")
+
+    try:
+        universities, next_cursor = await UniversityService.get_universities_by_specialty(
+            str(specialty_id),
+            limit=page_size,
+            cursor=cursor,
+            sort_by=sort_by,
+            sort_order=1 if sort_order == "asc" else -1
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    items = [
+        SpecialtyUniversity.model_construct(
+            university=university,
+            requirement=next(
+                (req for req in university.requirements if req.specialty_id == str(specialty_id)),
+                None
+            )
+        )
+        for university in universities
+    ]
+
+    return _specialty_universities_json.response(
+        SpecialtyUniversitiesPage.model_construct(items=items, page_size=page_size, next_cursor=next_cursor)
+    )
+
+
+@router.get("/{specialty_id}/leaderboard", response_model=SpecialtyLeaderboardResponse)
+async def get_specialty_leaderboard(
+    specialty_id: str,
+    by: str = Query("ranking", regex="^(ranking|min_score|tuition)$"),
+    limit: int = Query(20, ge=1, le=settings.leaderboard_size)
+):
+    """
+    Top universities for a specialty, lowest value first: best world ranking,
+    lowest minimum score (easiest admission) or lowest tuition. Precomputed
+    and kept up to date after university changes.
+    """
+    board = await SpecialtyService.get_leaderboard(specialty_id, by, limit)
+    if board is None:
+        specialty = (
+            await SpecialtyService.get_specialty(PydanticObjectId(specialty_id))
+            if PydanticObjectId.is_valid(specialty_id) else None
+        )
+        if not specialty:
+            raise HTTPException(status_code=404, detail="Specialty not found")
+        # No university offers it, or not computed yet
+        board = {
+            "specialty_id": specialty_id,
+            "specialty_name": specialty.name,
+            "by": by,
+            "universities": 0,
+            "computed_at": None,
+            "items": []
+        }
+    return raw_json_response(board)
 
 
 @router.put("/{specialty_id}", response_model=Specialty)
@@ -1,9 +1,11 @@
-from typing import List, Optional
-from fastapi import APIRouter, HTTPException, status, Query
+from typing import List, Optional, Tuple
+from fastapi import APIRouter, HTTPException, Response, status, Query
 from beanie import PydanticObjectId
 from pydantic import BaseModel, Field
+from app.core.config import settings
+from app.core.responses import LeanSerializer, raw_json_response
 from app.models.university import University
-from app.services.university_service import UniversityService
+from app.services.university_service import GeoFilter, RangeFilters, UniversityService
 
 router = APIRouter(prefix="/universities", tags=["Universities"])
 
@@ -16,6 +18,37 @@ class PaginatedResponse(BaseModel):
     total_pages: int
 
 
+class UniversityCursorPage(BaseModel):
+    items: List[University]
+    page_size: int
+    next_cursor: Optional[str] = None
+    # Only counted for the first page (no cursor)
+    total: Optional[int] = None
+
+
+class BatchGetRequest(BaseModel):
+    ids: List[str] = Field(..., min_length=1, max_length=100)
+
+
+class BatchGetResponse(BaseModel):
+    items: List[Optional[University]]
+    missing: List[str]
+
+
+# Read endpoints serialize straight to JSON: list, search and batch reads use
+# the services' raw mode, the rest go through LeanSerializer
+_university_json = LeanSerializer(University)
+
+
+class SimilarUniversity(BaseModel):
+    university: University
+    score: float
+
+
+class SimilarUniversitiesResponse(BaseModel):
+    items: List[SimilarUniversity]
+
+
 class AddSpecialtyRequest(BaseModel):
     specialty_id: str
     specialty_name: str
@@ -24,6 +57,19 @@ class AddSpecialtyRequest(BaseModel):
     additional_requirements: Optional[str] = None
 
 
+def _range_filters(*bounds: Tuple[str, Optional[float], Optional[float]]) -> RangeFilters:
+    ranges: RangeFilters = {}
+    for field, low, high in bounds:
+        if low is not None and high is not None and low > high:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"min_{field} must not exceed max_{field}"
+            )
+        if low is not None or high is not None:
+            ranges[field] = (low, high)
+    return ranges
+
+
 @router.post("/", response_model=University, status_code=status.HTTP_201_CREATED)
 async def create_university(university: University):
     return await UniversityService.create_university(university.model_dump(exclude={"id"}))
@@ -36,12 +82,47 @@ async def get_universities(
     country: Optional[str] = Query(None),
     specialty: Optional[str] = Query(None),
     min_score: Optional[float] = Query(None, ge=0, le=800),
-    sort_by: str = Query("name", regex="^(name|ranking|tuition_fee|acceptance_rate)$"),
-    sort_order: str = Query("asc", regex="^(asc|desc)$")
+    sort_by: str = Query("name", regex="^(name|ranking|tuition_fee|acceptance_rate|distance)$"),
+    sort_order: str = Query("asc", regex="^(asc|desc)$"),
+    min_tuition_fee_usd: Optional[float] = Query(None, ge=0),
+    max_tuition_fee_usd: Optional[float] = Query(None, ge=0),
+    min_ranking: Optional[int] = Query(None, ge=1),
+    max_ranking: Optional[int] = Query(None, ge=1),
+    min_acceptance_rate: Optional[float] = Query(None, ge=0, le=100),
+    max_acceptance_rate: Optional[float] = Query(None, ge=0, le=100),
+    min_student_count: Optional[int] = Query(None, ge=0),
+    max_student_count: Optional[int] = Query(None, ge=0),
+    near: Optional[str] = Query(None, description="lat,lon in degrees, e.g. 48.14,11.58"),
+    radius_km: Optional[float] = Query(None, gt=0, le=20100)
 ):
     skip = (page - 1) * page_size
     sort_order_int = 1 if sort_order == "asc" else -1
 
+    ranges = _range_filters(
+        ("tuition_fee_usd", min_tuition_fee_usd, max_tuition_fee_usd),
+        ("ranking", min_ranking, max_ranking),
+        ("acceptance_rate", min_acceptance_rate, max_acceptance_rate),
+        ("student_count", min_student_count, max_student_count)
+    )
+
+    geo: Optional[GeoFilter] = None
+    if near is not None:
+        try:
+            latitude, longitude = (float(part) for part in near.split(","))
+        except ValueError:
+            latitude = longitude = float("nan")
+        if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="near must be 'lat,lon' with -90 <= lat <= 90 and -180 <= lon <= 180"
+            )
+        geo = (latitude, longitude, radius_km)
+    elif radius_km is not None or sort_by == "distance":
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="radius_km and sort_by=distance require near"
+        )
+
     universities, total = await UniversityService.get_all_universities(
         skip=skip,
         limit=page_size,
@@ -49,23 +130,120 @@ async def get_universities(
         specialty=specialty,
         min_score=min_score,
         sort_by=sort_by,
-        sort_order=sort_order_int
+        sort_order=sort_order_int,
+        ranges=ranges or None,
+        near=geo,
+        raw=True
     )
 
     total_pages = (total + page_size - 1) // page_size
 
-    return PaginatedResponse(
-        items=universities,
-        total=total,
-        page=page,
-        page_size=page_size,
-        total_pages=total_pages
+    return raw_json_response({
+        "items": universities,
+        "total": total,
+        "page": page,
+        "page_size": page_size,
+        "total_pages": total_pages
+    })
+
+
+@router.get("/scroll", response_model=UniversityCursorPage)
+async def scroll_universities(
+    page_size: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    country: Optional[str] = Query(None),
+    specialty: Optional[str] = Query(None),
+    min_score: Optional[float] = Query(None, ge=0, le=800),
+    sort_by: str = Query("name", regex="^(name|ranking|tuition_fee|acceptance_rate)$"),
+    sort_order: str = Query("asc", regex="^(asc|desc)$"),
+    min_tuition_fee_usd: Optional[float] = Query(None, ge=0),
+    max_tuition_fee_usd: Optional[float] = Query(None, ge=0),
+    min_ranking: Optional[int] = Query(None, ge=1),
+    max_ranking: Optional[int] = Query(None, ge=1),
+    min_acceptance_rate: Optional[float] = Query(None, ge=0, le=100),
+    max_acceptance_rate: Optional[float] = Query(None, ge=0, le=100),
+    min_student_count: Optional[int] = Query(None, ge=0),
+    max_student_count: Optional[int] = Query(None, ge=0)
+):
+    """
+    The list filters with cursor pagination, for infinite scrolling. Pass the
+    same filters and sort with each page's `next_cursor`; it is null on the
+    last page.
+    """
+    ranges = _range_filters(
+        ("tuition_fee_usd", min_tuition_fee_usd, max_tuition_fee_usd),
+        ("ranking", min_ranking, max_ranking),
+        ("acceptance_rate", min_acceptance_rate, max_acceptance_rate),
+        ("student_count", min_student_count, max_student_count)
     )
 
+    try:
+        universities, next_cursor, total = await UniversityService.scroll_universities(
+            limit=page_size,
+            cursor=cursor,
+            country=country,
+            specialty=specialty,
+            min_score=min_score,
+            sort_by=sort_by,
+            sort_order=1 if sort_order == "asc" else -1,
+            ranges=ranges or None,
+            raw=True
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    return raw_json_response({
+        "items": universities,
+        "page_size": page_size,
+        "next_cursor": next_cursor,
+        "total": total
+    })
+
 
 @router.get("/search", response_model=List[University])
 async def search_universities(query: str = Query(..., min_length=1)):
-    return await UniversityService.search_universities(query)
+    return raw_json_response(await UniversityService.search_universities(query, raw=True))
+
+
+async def _get_batch(ids: List[str]) -> Response:
+    parsed: List[Optional[PydanticObjectId]] = []
+    for raw_id in ids:
+        try:
+            parsed.append(PydanticObjectId(raw_id))
+        except Exception:
+            # Malformed ids are reported as misses, like unknown ones
+            parsed.append(None)
+
+    found = await UniversityService.get_universities_by_ids(
+        [i for i in parsed if i is not None],
+        raw=True
+    )
+    items = [found.get(university_id) if university_id else None for university_id in parsed]
+
+    return raw_json_response({
+        "items": items,
+        "missing": [raw_id for raw_id, item in zip(ids, items) if item is None]
+    })
+
+
+@router.get("/batch", response_model=BatchGetResponse)
+async def get_universities_batch(
+    ids: str = Query(..., min_length=1, description="Comma-separated university ids (max 100)")
+):
+    """
+    Fetch many universities in one request. Items follow the requested order;
+    unknown ids are null in `items` and listed in `missing`.
+    """
+    id_list = [raw_id.strip() for raw_id in ids.split(",") if raw_id.strip()]
+    if not id_list or len(id_list) > 100:
+        raise HTTPException(status_code=422, detail="Provide between 1 and 100 ids")
+    return await _get_batch(id_list)
+
+
+@router.post("/batch", response_model=BatchGetResponse)
+async def post_universities_batch(request: BatchGetRequest):
+    """Same as GET /universities/batch, for id lists too long for a query string."""
+    return await _get_batch(request.ids)
 
 
 @router.get("/{university_id}", response_model=University)
@@ -73,7 +251,22 @@ async def get_university(university_id: PydanticObjectId):
     university = await UniversityService.get_university(university_id)
     if not university:
         raise HTTPException(status_code=404, detail="University not found")
-    return university
+    return _university_json.response(university)
+
+
+@router.get("/{university_id}/similar", response_model=SimilarUniversitiesResponse)
+async def get_similar_universities(
+    university_id: PydanticObjectId,
+    limit: int = Query(6, ge=1, le=settings.similarity_top_k)
+):
+    """Most similar universities by specialties, country, ranking, cost, selectivity and size."""
+    items = await UniversityService.get_similar_universities(university_id, limit)
+    if items is None:
+        if not await UniversityService.get_university(university_id):
+            raise HTTPException(status_code=404, detail="University not found")
+        # Not computed yet (new university, refresh pending)
+        items = []
+    return raw_json_response({"items": items})
 
 
 @router.put("/{university_id}", response_model=University)
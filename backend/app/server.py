@@ -0,0 +1,80 @@
+"""
+Production entrypoint: `python -m app.server`.
+
+Runs uvicorn's process manager with `SERVER_WORKERS` workers (by default one
+per CPU the process may use: its CPU affinity, capped by the cgroup CPU quota
+of the container), uvloop and httptools, no reload. Each worker is a fresh process
+that imports the app and runs `lifespan` itself, so database and AI clients
+are never shared across workers. On SIGTERM uvicorn stops accepting
+connections, waits up to `SERVER_GRACEFUL_SHUTDOWN_SECONDS` for open requests,
+then `lifespan` drains in-flight AI calls before closing the clients.
+"""
+import importlib.util
+import math
+import os
+from pathlib import Path
+from typing import Optional
+import uvicorn
+from app.core.config import settings
+
+
+CGROUP_ROOT = Path("/sys/fs/cgroup")
+
+
+def _cgroup_cpu_limit(root: Path = CGROUP_ROOT) -> Optional[int]:
+    """CPUs allowed by the cgroup quota (v2 `cpu.max`, v1 `cpu.cfs_quota_us`), None if unlimited."""
+    try:
+        quota, period = (root / "cpu.max").read_text().split()[:2]
+    except (OSError, ValueError):
+        try:
+            quota = (root / "cpu" / "cpu.cfs_quota_us").read_text().strip()
+            period = (root / "cpu" / "cpu.cfs_period_us").read_text().strip()
+        except OSError:
+            return None
+    try:
+        quota_us, period_us = int(quota), int(period)
+    except ValueError:  # "max"
+        return None
+    if quota_us <= 0 or period_us <= 0:
+        return None
+    return max(math.ceil(quota_us / period_us), 1)
+
+
+def available_cpus(root: Path = CGROUP_ROOT) -> int:
+    """CPUs this process may run on, which in a container is not os.cpu_count()."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    limit = _cgroup_cpu_limit(root)
+    return min(cpus, limit) if limit else cpus
+
+
+def worker_count() -> int:
+    return settings.server_workers or available_cpus()
+
+
+def _available(module: str, fallback: str) -> str:
+    if importlib.util.find_spec(module) is None:
+        print(f"[WARNING] {module} is not installed, using {fallback}")
+        return fallback
+    return module
+
+
+def main() -> None:
+    uvicorn.run(
+        "app.main:app",
+        host=settings.server_host,
+        port=settings.server_port,
+        workers=worker_count(),
+        loop=_available("uvloop", "asyncio"),
+        http=_available("httptools", "h11"),
+        backlog=settings.server_backlog,
+        timeout_keep_alive=settings.server_keepalive_seconds,
+        timeout_graceful_shutdown=settings.server_graceful_shutdown_seconds,
+        reload=False
+    )
+
+
+if __name__ == "__main__":
+    main()
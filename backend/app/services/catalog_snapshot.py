@@ -0,0 +1,395 @@
+import asyncio
+import bisect
+import re
+import time
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from app.core.config import settings
+from app.db.invalidation import CATALOG_COLLECTIONS, InvalidationEvent, invalidation_bus
+from app.models.specialty import Specialty
+from app.models.university import University
+
+# Same field mapping as UniversityService.get_all_universities
+SORT_FIELDS = {
+    "name": "name",
+    "ranking": "ranking",
+    "tuition_fee": "tuition_fee_usd",
+    "acceptance_rate": "acceptance_rate"
+}
+
+
+class UniversityRecord:
+    """Read-optimized view of one university, built once per snapshot."""
+
+    __slots__ = ("id", "document", "country", "specialty_names", "min_score", "search_fields", "_raw")
+
+    def __init__(self, university: University):
+        self.id = university.id
+        self.document = university
+        self.country = university.country
+        self.specialty_names = tuple(university.specialty_names)
+        scores = [req.minimum_score for req in university.requirements]
+        # `requirements.minimum_score <= x` matches when any requirement does
+        self.min_score = min(scores) if scores else None
+        self.search_fields = tuple(
+            value for value in (university.name, university.description, university.city) if value
+        )
+        self._raw: Optional[Dict[str, Any]] = None
+
+    @property
+    def raw(self) -> Dict[str, Any]:
+        """The document as a JSON-shaped dict (raw read mode), built on first use."""
+        if self._raw is None:
+            self._raw = self.document.model_dump(mode="json", by_alias=True)
+        return self._raw
+
+
+class CatalogIndex:
+    """
+    Immutable snapshot of the catalog: records in `_id` order, posting lists per
+    country and specialty name, and precomputed sort orders for every sortable
+    field. A refresh builds a new index and swaps it in with one assignment, so
+    readers never observe a half-built state.
+    """
+
+    __slots__ = (
+        "version", "loaded_at", "records", "by_id", "by_country", "by_specialty",
+        "sort_orders", "specialties", "specialty_by_id", "_specialties_raw"
+    )
+
+    def __init__(self, universities: List[University], specialties: List[Specialty], version: int):
+        # `version` is a per-process generation number, bumped on every rebuild
+        self.version = version
+        self.loaded_at = time.time()
+        self.records = [UniversityRecord(u) for u in universities]
+        self.by_id = {record.id: record for record in self.records}
+
+        self.by_country: Dict[str, List[int]] = {}
+        self.by_specialty: Dict[str, List[int]] = {}
+        for position, record in enumerate(self.records):
+            self.by_country.setdefault(record.country, []).append(position)
+            for name in set(record.specialty_names):
+                self.by_specialty.setdefault(name, []).append(position)
+
+        self.sort_orders: Dict[str, List[int]] = {}
+        for field in SORT_FIELDS.values():
+            values = [getattr(record.document, field) for record in self.records]
+            # MongoDB puts null/missing first in ascending order
+            self.sort_orders[field] = sorted(
+                range(len(self.records)),
+                key=lambda i: (values[i] is not None, values[i] if values[i] is not None else 0)
+            )
+
+        self.specialties = specialties
+        self.specialty_by_id = {specialty.id: specialty for specialty in specialties}
+        self._specialties_raw: Optional[List[Dict[str, Any]]] = None
+
+    def _specialty_raw(self, position: int) -> Dict[str, Any]:
+        if self._specialties_raw is None:
+            self._specialties_raw = [s.model_dump(mode="json", by_alias=True) for s in self.specialties]
+        return self._specialties_raw[position]
+
+    @staticmethod
+    def _match_postings(postings: Dict[str, List[int]], pattern: str) -> Optional[Set[int]]:
+        """Union of posting lists whose key matches a case-insensitive regex, like `$regex` with `i`."""
+        try:
+            regex = re.compile(pattern, re.IGNORECASE)
+        except re.error:
+            return None
+        matched: Set[int] = set()
+        for key, positions in postings.items():
+            if regex.search(key):
+                matched.update(positions)
+        return matched
+
+    def _candidates(
+        self,
+        country: Optional[str],
+        specialty: Optional[str],
+        min_score: Optional[float],
+        ranges: Optional[Dict[str, Tuple[Optional[float], Optional[float]]]]
+    ) -> Tuple[bool, Optional[Set[int]]]:
+        """
+        Positions matching the filters, None meaning all of them. The flag is
+        False when a pattern isn't a valid regex, for Mongo to answer.
+        """
+        candidates: Optional[Set[int]] = None
+
+        for postings, pattern in ((self.by_country, country), (self.by_specialty, specialty)):
+            if not pattern:
+                continue
+            matched = self._match_postings(postings, pattern)
+            if matched is None:
+                return False, None
+            candidates = matched if candidates is None else candidates & matched
+
+        if min_score is not None:
+            within = {
+                position for position, record in enumerate(self.records)
+                if record.min_score is not None and record.min_score <= min_score
+            } if candidates is None else {
+                position for position in candidates
+                if self.records[position].min_score is not None
+                and self.records[position].min_score <= min_score
+            }
+            candidates = within
+
+        for field, (low, high) in (ranges or {}).items():
+            if low is None and high is None:
+                continue
+            pool = range(len(self.records)) if candidates is None else candidates
+            candidates = {
+                position for position in pool
+                if self._in_range(getattr(self.records[position].document, field), low, high)
+            }
+
+        return True, candidates
+
+    def list_universities(
+        self,
+        skip: int,
+        limit: int,
+        country: Optional[str],
+        specialty: Optional[str],
+        min_score: Optional[float],
+        sort_by: str,
+        sort_order: int,
+        ranges: Optional[Dict[str, Tuple[Optional[float], Optional[float]]]] = None,
+        raw: bool = False
+    ) -> Optional[Tuple[List[Any], int]]:
+        """
+        Returns None when the query can't be answered from the snapshot. With
+        `raw`, items are JSON-shaped dicts instead of documents.
+        """
+        matched, candidates = self._candidates(country, specialty, min_score, ranges)
+        if not matched:
+            return None
+
+        ascending = self.sort_orders[SORT_FIELDS.get(sort_by, "name")]
+
+        if candidates is None:
+            total = len(self.records)
+            if sort_order == -1:
+                page = [ascending[total - 1 - k] for k in range(skip, min(skip + limit, total))]
+            else:
+                page = ascending[skip:skip + limit]
+            return [self._item(self.records[i], raw) for i in page], total
+
+        order: Iterable[int] = reversed(ascending) if sort_order == -1 else ascending
+
+        page: List[Any] = []
+        seen = 0
+        for position in order:
+            if position not in candidates:
+                continue
+            if seen >= skip:
+                page.append(self._item(self.records[position], raw))
+                if len(page) >= limit:
+                    break
+            seen += 1
+        return page, len(candidates)
+
+    def scroll_universities(
+        self,
+        limit: int,
+        after: Optional[Tuple[Any, Any]],
+        country: Optional[str],
+        specialty: Optional[str],
+        min_score: Optional[float],
+        sort_by: str,
+        sort_order: int,
+        ranges: Optional[Dict[str, Tuple[Optional[float], Optional[float]]]] = None,
+        raw: bool = False
+    ) -> Optional[Tuple[List[Any], Optional[Tuple[Any, Any]], int]]:
+        """
+        Keyset page of `limit` items strictly after the (value, _id) position
+        `after`, in the same (field, _id) order as the Mongo path. Returns the
+        items, the position of the last one when more follow, and the total.
+        Returns None when the query can't be answered from the snapshot.
+        """
+        matched, candidates = self._candidates(country, specialty, min_score, ranges)
+        if not matched:
+            return None
+
+        field = SORT_FIELDS.get(sort_by, "name")
+        ascending = self.sort_orders[field]
+
+        def position_key(position: int) -> Tuple[bool, Any, Any]:
+            record = self.records[position]
+            value = getattr(record.document, field)
+            return value is not None, value if value is not None else 0, record.id
+
+        start, stop = 0, len(ascending)
+        if after is not None:
+            value, document_id = after
+            target = (value is not None, value if value is not None else 0, document_id)
+            try:
+                if sort_order == -1:
+                    stop = bisect.bisect_left(ascending, target, key=position_key)
+                else:
+                    start = bisect.bisect_right(ascending, target, key=position_key)
+            except TypeError as e:
+                # Cursor value of another type than the field, e.g. from another sort_by
+                raise ValueError("Invalid cursor") from e
+
+        order: Iterable[int] = (
+            (ascending[k] for k in range(stop - 1, start - 1, -1)) if sort_order == -1
+            else (ascending[k] for k in range(start, stop))
+        )
+
+        page: List[int] = []
+        for position in order:
+            if candidates is not None and position not in candidates:
+                continue
+            page.append(position)
+            if len(page) > limit:
+                break
+
+        next_after = None
+        if len(page) > limit:
+            page = page[:limit]
+            last = self.records[page[-1]]
+            next_after = (getattr(last.document, field), last.id)
+
+        total = len(self.records) if candidates is None else len(candidates)
+        return [self._item(self.records[i], raw) for i in page], next_after, total
+
+    @staticmethod
+    def _item(record: UniversityRecord, raw: bool) -> Any:
+        return record.raw if raw else record.document
+
+    @staticmethod
+    def _in_range(value: Optional[float], low: Optional[float], high: Optional[float]) -> bool:
+        # Like $gte/$lte, a missing value never matches a bound
+        if value is None:
+            return False
+        return (low is None or value >= low) and (high is None or value <= high)
+
+    def search_universities(self, query: str, raw: bool = False) -> Optional[List[Any]]:
+        try:
+            regex = re.compile(query, re.IGNORECASE)
+        except re.error:
+            return None
+        return [
+            self._item(record, raw) for record in self.records
+            if any(regex.search(value) for value in record.search_fields)
+        ]
+
+    def list_specialties(self, skip: int, limit: int, raw: bool = False) -> List[Any]:
+        positions = range(skip, min(skip + limit, len(self.specialties)))
+        if raw:
+            return [self._specialty_raw(i) for i in positions]
+        return [self.specialties[i] for i in positions]
+
+    def search_specialties(self, query: str, raw: bool = False) -> Optional[List[Any]]:
+        try:
+            regex = re.compile(query, re.IGNORECASE)
+        except re.error:
+            return None
+        return [
+            self._specialty_raw(i) if raw else specialty
+            for i, specialty in enumerate(self.specialties)
+            if regex.search(specialty.name) or (specialty.description and regex.search(specialty.description))
+        ]
+
+
+class CatalogSnapshot:
+    """
+    Optional in-process copy of the whole catalog (`CATALOG_SNAPSHOT_ENABLED`).
+
+    Loaded in `lifespan`, it answers list, filter, sort, detail and search reads
+    for universities and specialties without touching MongoDB. It subscribes to
+    the invalidation bus and rebuilds after catalog changes, so every worker
+    follows the same change stream (or version counter without a replica set).
+
+    Until a rebuild includes a change, point reads of the changed document
+    (`is_current`) go to MongoDB. This process's own writes are marked as
+    soon as they are made, so a client reads back what it just wrote; list
+    and search reads catch up with the rebuild, after the debounce.
+    """
+
+    def __init__(self):
+        self.enabled = settings.catalog_snapshot_enabled
+        self.debounce = settings.catalog_snapshot_debounce_seconds
+        self.index: Optional[CatalogIndex] = None
+        self._generation = 0
+        # Changes not in the index yet: (collection, document id) or a whole collection -> change number
+        self._changes = 0
+        self._pending: Dict[Tuple[str, str], int] = {}
+        self._pending_resets: Dict[str, int] = {}
+        self._stale = asyncio.Event()
+        self._reloader_task: Optional[asyncio.Task] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.index is not None
+
+    def on_invalidation(self, event: InvalidationEvent) -> None:
+        if not self.ready:
+            return
+        self._changes += 1
+        if event.is_reset or event.document_id is None:
+            self._pending_resets[event.collection] = self._changes
+        else:
+            self._pending[(event.collection, event.document_id)] = self._changes
+        self._stale.set()
+
+    def is_current(self, collection: str, document_id: Any) -> bool:
+        """Whether the index has the latest known version of a document."""
+        return collection not in self._pending_resets and (collection, str(document_id)) not in self._pending
+
+    async def start(self) -> None:
+        if not self.enabled:
+            return
+        await self.reload()
+        print(f"[OK] Catalog snapshot loaded: {len(self.index.records)} universities, "
+              f"{len(self.index.specialties)} specialties")
+        invalidation_bus.subscribe(self.on_invalidation, CATALOG_COLLECTIONS)
+        invalidation_bus.subscribe_writes(self.on_invalidation)
+        self._reloader_task = asyncio.create_task(self._reloader())
+
+    async def stop(self) -> None:
+        if self._reloader_task:
+            self._reloader_task.cancel()
+            await asyncio.gather(self._reloader_task, return_exceptions=True)
+            self._reloader_task = None
+
+    async def reload(self) -> None:
+        # Changes made before the reads start are in what they return
+        included = self._changes
+        universities, specialties = await asyncio.gather(
+            University.find_all().sort("_id").to_list(),
+            Specialty.find_all().sort("_id").to_list()
+        )
+        self._generation += 1
+        self.index = CatalogIndex(universities, specialties, self._generation)
+        self._pending = {key: change for key, change in self._pending.items() if change > included}
+        self._pending_resets = {
+            collection: change for collection, change in self._pending_resets.items() if change > included
+        }
+
+    async def _reloader(self) -> None:
+        while True:
+            await self._stale.wait()
+            # Coalesce bursts of writes into one rebuild
+            await asyncio.sleep(self.debounce)
+            self._stale.clear()
+            try:
+                await self.reload()
+            except Exception as e:
+                print(f"[WARNING] Catalog snapshot reload failed: {str(e)[:100]}")
+
+    def stats(self) -> dict:
+        if not self.ready:
+            return {"enabled": self.enabled, "ready": False}
+        return {
+            "enabled": self.enabled,
+            "ready": True,
+            "version": self.index.version,
+            "loaded_at": self.index.loaded_at,
+            "universities": len(self.index.records),
+            "specialties": len(self.index.specialties),
+            "pending_changes": len(self._pending) + len(self._pending_resets)
+        }
+
+
+catalog_snapshot = CatalogSnapshot()
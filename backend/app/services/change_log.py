@@ -0,0 +1,197 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError
+from app.core.config import settings
+from app.db.invalidation import CATALOG_META_COLLECTION
+from app.db.raw_reads import specialty_reader, university_reader
+from app.models.catalog_change import CatalogChange
+
+# MongoDB's duplicate key error code
+DUPLICATE_KEY = 11000
+
+READERS = {
+    "universities": university_reader,
+    "specialties": specialty_reader
+}
+
+
+class ChangeLog:
+    """
+    Persistent, sequenced log of catalog writes for delta sync.
+
+    Every university and specialty write appends `upsert` or `delete` entries
+    numbered from a counter in `catalog_meta`. Clients call
+    `GET /api/changes?since=<seq>` and get the current state of each changed
+    document (or a tombstone), deduplicated per document. Entries older than
+    `change_log_retention_days` are compacted away; a client whose cursor
+    falls before the oldest retained entry, or any client after a bulk write
+    that isn't logged per document, is told to resync.
+
+    Sequence numbers are allocated before the entry is inserted, so a reader
+    may briefly see seq N+1 without N. Reading stops at such a gap unless the
+    entries after it are older than `change_log_settle_seconds` (the missing
+    insert failed for good), so a cursor never skips a change still in flight.
+    A page cut short by such a gap reports `has_more: false`: the change shows
+    up on the client's next regular poll instead of in a tight loop.
+    """
+
+    def __init__(self):
+        self.retention = timedelta(days=settings.change_log_retention_days)
+        self.settle = timedelta(seconds=settings.change_log_settle_seconds)
+        self.page_size = settings.change_log_page_size
+        self.compaction_interval = settings.change_log_compaction_seconds
+        self._compactor: Optional[asyncio.Task] = None
+
+    def _meta(self):
+        return CatalogChange.get_motor_collection().database[CATALOG_META_COLLECTION]
+
+    async def start(self) -> None:
+        self._compactor = asyncio.create_task(self._compact_periodically())
+
+    async def stop(self) -> None:
+        if self._compactor:
+            self._compactor.cancel()
+            await asyncio.gather(self._compactor, return_exceptions=True)
+            self._compactor = None
+
+    async def _allocate(self, count: int) -> int:
+        """Reserve `count` sequence numbers; returns the first."""
+        doc = await self._meta().find_one_and_update(
+            {"_id": "changes"},
+            {"$inc": {"seq": count}, "$setOnInsert": {"min_seq": 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return doc["seq"] - count + 1
+
+    async def record(self, collection: str, operation: str, document_ids: List[Any]) -> None:
+        if not document_ids:
+            return
+        first = await self._allocate(len(document_ids))
+        now = datetime.utcnow()
+        entries = [
+            CatalogChange(
+                seq=first + offset,
+                collection=collection,
+                document_id=str(document_id),
+                operation=operation,
+                created_at=now
+            )
+            for offset, document_id in enumerate(document_ids)
+        ]
+        try:
+            # Unordered, so a collision only loses the colliding entries
+            await CatalogChange.insert_many(entries, ordered=False)
+        except BulkWriteError as e:
+            if any(error.get("code") != DUPLICATE_KEY for error in e.details.get("writeErrors", [])):
+                raise
+            # Only possible if the counter was reset under a live log
+            print("[WARNING] Change log sequence collision, clients will resync")
+            await self.record_reset()
+
+    async def record_reset(self) -> None:
+        """Invalidate every client cursor, for bulk writes not logged per document."""
+        doc = await self._meta().find_one_and_update(
+            {"_id": "changes"},
+            {"$inc": {"seq": 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        await self._meta().update_one({"_id": "changes"}, {"$max": {"min_seq": doc["seq"] + 1}})
+
+    async def _state(self) -> Dict[str, int]:
+        doc = await self._meta().find_one({"_id": "changes"})
+        return {"seq": doc.get("seq", 0), "min_seq": doc.get("min_seq", 1)} if doc else {"seq": 0, "min_seq": 1}
+
+    async def changes_since(self, since: int) -> Dict[str, Any]:
+        state = await self._state()
+        if since > state["seq"] or since < state["min_seq"] - 1:
+            # Cursor from the future (log reset) or older than what's retained
+            return {
+                "since": since,
+                "next_since": state["seq"],
+                "resync_required": True,
+                "has_more": False,
+                "changes": []
+            }
+
+        entries = await CatalogChange.get_motor_collection().find(
+            {"seq": {"$gt": since}}
+        ).sort("seq", 1).limit(self.page_size).to_list(length=None)
+
+        settled_before = datetime.utcnow() - self.settle
+        expected = since + 1
+        accepted: List[Dict[str, Any]] = []
+        in_flight = False
+        for entry in entries:
+            if entry["seq"] != expected and entry["created_at"] > settled_before:
+                in_flight = True
+                break
+            accepted.append(entry)
+            expected = entry["seq"] + 1
+        next_since = accepted[-1]["seq"] if accepted else since
+
+        # Only the latest entry per document matters
+        latest: Dict[tuple, Dict[str, Any]] = {}
+        for entry in accepted:
+            latest[(entry["collection"], entry["document_id"])] = entry
+        changes = sorted(latest.values(), key=lambda entry: entry["seq"])
+
+        documents: Dict[tuple, Dict[str, Any]] = {}
+        for collection, reader in READERS.items():
+            ids = [e["document_id"] for e in changes if e["collection"] == collection and e["operation"] == "upsert"]
+            if ids:
+                for doc in await reader.find({"_id": {"$in": [ObjectId(i) for i in ids]}}):
+                    documents[(collection, doc["_id"])] = doc
+
+        result = []
+        for entry in changes:
+            key = (entry["collection"], entry["document_id"])
+            document = documents.get(key)
+            change = {
+                "seq": entry["seq"],
+                "collection": entry["collection"],
+                "id": entry["document_id"],
+                # Upserted, then deleted before this read: the delete entry follows later
+                "operation": "upsert" if document is not None else "delete"
+            }
+            if document is not None:
+                change["document"] = document
+            result.append(change)
+
+        return {
+            "since": since,
+            "next_since": next_since,
+            "resync_required": False,
+            # Only a full page can be followed by more; entries still being
+            # inserted arrive on a later poll, so clients don't spin on them
+            "has_more": not in_flight and len(entries) == self.page_size and next_since < state["seq"],
+            "changes": result
+        }
+
+    async def compact(self) -> int:
+        """Drop entries past retention; returns how many were removed."""
+        cutoff = datetime.utcnow() - self.retention
+        collection = CatalogChange.get_motor_collection()
+        boundary = await collection.find_one({"created_at": {"$lt": cutoff}}, sort=[("seq", -1)])
+        if boundary is None:
+            return 0
+        await self._meta().update_one({"_id": "changes"}, {"$max": {"min_seq": boundary["seq"] + 1}})
+        result = await collection.delete_many({"seq": {"$lte": boundary["seq"]}})
+        return result.deleted_count
+
+    async def _compact_periodically(self) -> None:
+        while True:
+            try:
+                removed = await self.compact()
+                if removed:
+                    print(f"[OK] Compacted {removed} change log entries")
+            except Exception as e:
+                print(f"[WARNING] Change log compaction failed: {str(e)[:100]}")
+            await asyncio.sleep(self.compaction_interval)
+
+
+change_log = ChangeLog()
@@ -0,0 +1,240 @@
+import asyncio
+import heapq
+import os
+import socket
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+from bson import ObjectId
+from pymongo import DeleteOne, ReplaceOne
+from pymongo.errors import DuplicateKeyError
+from app.core.config import settings
+from app.core.offload import offload
+from app.db.invalidation import CATALOG_META_COLLECTION, InvalidationEvent, invalidation_bus
+from app.models.specialty_leaderboard import SpecialtyLeaderboard
+from app.models.university import University
+
+MEMBER_PROJECTION = {
+    "name": 1, "ranking": 1, "tuition_fee_usd": 1,
+    "requirements.specialty_id": 1, "requirements.specialty_name": 1, "requirements.minimum_score": 1
+}
+
+# Top-level fields the boards depend on; updates touching none of them are ignored
+MEMBER_FIELDS = {"name", "ranking", "tuition_fee_usd", "requirements"}
+
+
+@dataclass(frozen=True)
+class Member:
+    """What the boards need of one university."""
+
+    name: str
+    ranking: Optional[float]
+    tuition: Optional[float]
+    # specialty id -> (specialty name, lowest minimum score for it)
+    requirements: Dict[str, Tuple[str, float]]
+
+
+def to_member(doc: Dict[str, Any]) -> Member:
+    requirements: Dict[str, Tuple[str, float]] = {}
+    for req in doc.get("requirements") or []:
+        specialty_id, score = req.get("specialty_id"), req.get("minimum_score")
+        if not specialty_id or score is None:
+            continue
+        known = requirements.get(specialty_id)
+        if known is None or score < known[1]:
+            requirements[specialty_id] = (req.get("specialty_name") or "", score)
+    return Member(doc.get("name") or "", doc.get("ranking"), doc.get("tuition_fee_usd"), requirements)
+
+
+# Board name -> value of a member for a specialty; lowest first, members without a value left out
+METRICS: Dict[str, Callable[[Member, str], Optional[float]]] = {
+    "ranking": lambda member, specialty_id: member.ranking,
+    "min_score": lambda member, specialty_id: member.requirements[specialty_id][1],
+    "tuition": lambda member, specialty_id: member.tuition
+}
+
+
+def build_boards(
+    members: Dict[str, Member],
+    by_specialty: Dict[str, Set[str]],
+    size: int,
+    computed_at: datetime
+) -> List[Dict[str, Any]]:
+    """Leaderboard documents for each of `by_specialty`: the `size` lowest values per metric, ties by name and id."""
+    boards = []
+    for specialty_id, university_ids in sorted(by_specialty.items()):
+        board: Dict[str, Any] = {
+            "_id": specialty_id,
+            "specialty_name": next(
+                members[university_id].requirements[specialty_id][0] for university_id in sorted(university_ids)
+            ),
+            "universities": len(university_ids),
+            "computed_at": computed_at
+        }
+        for metric, value_of in METRICS.items():
+            scored = (
+                (value, members[university_id].name, university_id)
+                for university_id in university_ids
+                if (value := value_of(members[university_id], specialty_id)) is not None
+            )
+            board[metric] = [
+                {"university_id": university_id, "value": value}
+                for value, _, university_id in heapq.nsmallest(size, scored)
+            ]
+        boards.append(board)
+    return boards
+
+
+class LeaderboardIndex:
+    """
+    Maintains `specialty_leaderboards`: per specialty, the top universities by
+    ranking, by lowest minimum score and by tuition, served by
+    `GET /specialties/{id}/leaderboard` with one point read.
+
+    Membership and minimum scores come from `University.requirements`.
+    University changes arrive from the invalidation bus and are debounced. One
+    worker at a time (a lease in `catalog_meta`) recomputes. It keeps what the
+    boards need of every university in memory, so a change reads only the
+    changed universities and rebuilds only the boards of specialties they
+    were or are in. On startup, a reset, or after taking over from another
+    worker it reads them all and rebuilds every board.
+    """
+
+    def __init__(self):
+        self.enabled = settings.leaderboard_enabled
+        self.size = settings.leaderboard_size
+        self.debounce = settings.leaderboard_debounce_seconds
+        self.lease = timedelta(seconds=settings.leaderboard_lease_seconds)
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._pending: Set[str] = set()
+        self._full = True
+        self._changed = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        # State of the last computation in this process, used for incremental runs
+        self._members: Optional[Dict[str, Member]] = None
+        self._by_specialty: Dict[str, Set[str]] = {}
+        self.last_run: Dict[str, Any] = {}
+
+    async def start(self) -> None:
+        if not self.enabled:
+            return
+        invalidation_bus.subscribe(self.on_invalidation, ["universities"])
+        self._changed.set()
+        self._task = asyncio.create_task(self._worker())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def on_invalidation(self, event: InvalidationEvent) -> None:
+        if event.is_reset or event.document_id is None:
+            self._full = True
+        elif event.updated_fields and not {f.split(".")[0] for f in event.updated_fields} & MEMBER_FIELDS:
+            return
+        else:
+            self._pending.add(event.document_id)
+        self._changed.set()
+
+    async def _worker(self) -> None:
+        while True:
+            await self._changed.wait()
+            await asyncio.sleep(self.debounce)
+            self._changed.clear()
+            changed, full = self._pending, self._full
+            self._pending, self._full = set(), False
+            try:
+                if not await self._acquire_lease():
+                    # Another worker computes; start from scratch if we take over later
+                    self._members = None
+                    continue
+                await self.refresh(changed, full)
+            except Exception as e:
+                self._full = True
+                print(f"[WARNING] Leaderboard refresh failed: {str(e)[:100]}")
+
+    async def _acquire_lease(self) -> bool:
+        now = datetime.utcnow()
+        meta = SpecialtyLeaderboard.get_motor_collection().database[CATALOG_META_COLLECTION]
+        try:
+            await meta.update_one(
+                {"_id": "leaderboard_leader", "$or": [{"owner": self.owner}, {"expires_at": {"$lt": now}}]},
+                {"$set": {"owner": self.owner, "expires_at": now + self.lease}},
+                upsert=True
+            )
+            return True
+        except DuplicateKeyError:
+            return False
+
+    async def refresh(self, changed: Set[str], full: bool = False) -> None:
+        started = datetime.utcnow()
+        collection = University.get_motor_collection()
+
+        if full or self._members is None:
+            docs = await collection.find({}, MEMBER_PROJECTION).to_list(length=None)
+            self._members = {str(doc["_id"]): to_member(doc) for doc in docs}
+            self._by_specialty = {}
+            for university_id, member in self._members.items():
+                for specialty_id in member.requirements:
+                    self._by_specialty.setdefault(specialty_id, set()).add(university_id)
+            affected = set(self._by_specialty)
+            removed = None
+        else:
+            docs = await collection.find(
+                {"_id": {"$in": [ObjectId(university_id) for university_id in changed]}}, MEMBER_PROJECTION
+            ).to_list(length=None)
+            affected = self._apply({str(doc["_id"]): to_member(doc) for doc in docs}, changed)
+            removed = {specialty_id for specialty_id in affected if not self._by_specialty.get(specialty_id)}
+            for specialty_id in removed:
+                self._by_specialty.pop(specialty_id, None)
+            affected -= removed
+
+        # Only what the rebuilt boards need, it may be pickled to another process
+        scope = {specialty_id: self._by_specialty[specialty_id] for specialty_id in affected}
+        members = {university_id: self._members[university_id] for ids in scope.values() for university_id in ids}
+        boards = await offload(build_boards, members, scope, self.size, started)
+        await self._write(boards, removed)
+        self.last_run = {
+            "at": started.isoformat(),
+            "mode": "full" if removed is None else "incremental",
+            "boards": len(boards),
+            "specialties": len(self._by_specialty),
+            "seconds": round((datetime.utcnow() - started).total_seconds(), 3)
+        }
+
+    def _apply(self, current: Dict[str, Member], changed: Set[str]) -> Set[str]:
+        """Swap in the changed universities' members; returns the specialties whose boards may differ."""
+        affected: Set[str] = set()
+        for university_id in changed:
+            old, new = self._members.get(university_id), current.get(university_id)
+            if old == new:
+                continue
+            if old is not None:
+                del self._members[university_id]
+                for specialty_id in old.requirements:
+                    self._by_specialty[specialty_id].discard(university_id)
+                affected.update(old.requirements)
+            if new is not None:
+                self._members[university_id] = new
+                for specialty_id in new.requirements:
+                    self._by_specialty.setdefault(specialty_id, set()).add(university_id)
+                affected.update(new.requirements)
+        return affected
+
+    async def _write(self, boards: List[Dict[str, Any]], removed: Optional[Set[str]]) -> None:
+        """Replace rebuilt boards; drop boards of specialties left empty (all stale boards after a full run)."""
+        collection = SpecialtyLeaderboard.get_motor_collection()
+        operations: List[Any] = [ReplaceOne({"_id": board["_id"]}, board, upsert=True) for board in boards]
+        operations += [DeleteOne({"_id": specialty_id}) for specialty_id in removed or ()]
+        for start in range(0, len(operations), 1000):
+            await collection.bulk_write(operations[start:start + 1000], ordered=False)
+
+        if removed is None:
+            await collection.delete_many({"_id": {"$nin": [board["_id"] for board in boards]}})
+
+    def stats(self) -> Dict[str, Any]:
+        return {"enabled": self.enabled, "size": self.size, "last_run": self.last_run}
+
+
+leaderboard_index = LeaderboardIndex()
@@ -0,0 +1,356 @@
+import asyncio
+import os
+import socket
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Set, Tuple
+import numpy as np
+from bson import ObjectId
+from pymongo import ReplaceOne
+from pymongo.errors import DuplicateKeyError
+from app.core.config import settings
+from app.core.offload import offload
+from app.db.invalidation import CATALOG_META_COLLECTION, InvalidationEvent, invalidation_bus
+from app.models.university import University
+from app.models.university_similarity import UniversitySimilarity
+
+FEATURE_PROJECTION = {
+    "specialties": 1, "country": 1, "ranking": 1,
+    "tuition_fee_usd": 1, "acceptance_rate": 1, "student_count": 1
+}
+
+# Numeric features and whether they are compared on a log scale
+NUMERIC_FEATURES = (
+    ("ranking", True),
+    ("tuition_fee_usd", True),
+    ("acceptance_rate", False),
+    ("student_count", True)
+)
+
+# Relative weight of each feature block in the cosine similarity
+FEATURE_WEIGHTS = {"specialties": 1.0, "country": 0.5, "numeric": 1.0}
+
+# Rows per matrix product, bounds the similarity block to CHUNK x N floats
+CHUNK = 512
+
+
+@dataclass(frozen=True)
+class FeatureSpace:
+    """What the matrix columns mean, fixed from one full build to the next."""
+
+    specialties: Tuple[str, ...]
+    countries: Tuple[str, ...]
+    bounds: Tuple[Tuple[float, float], ...]
+    # Scaled value given to a missing number, per numeric feature
+    means: Tuple[float, ...]
+
+    def covers(self, doc: Dict[str, Any]) -> bool:
+        """Whether the document's specialties and country all have a column."""
+        return (
+            all(s in self.specialties for s in doc.get("specialties") or [])
+            and (not doc.get("country") or doc["country"] in self.countries)
+        )
+
+
+def numeric_columns(docs: List[Dict[str, Any]]) -> np.ndarray:
+    """The numeric features, log-scaled where configured; NaN where missing."""
+    numeric = np.array(
+        [[doc.get(field) if doc.get(field) is not None else np.nan for field, _ in NUMERIC_FEATURES]
+         for doc in docs],
+        dtype=float
+    ).reshape(len(docs), len(NUMERIC_FEATURES))
+    for j, (_, log_scale) in enumerate(NUMERIC_FEATURES):
+        if log_scale:
+            numeric[:, j] = np.log1p(np.clip(numeric[:, j], 0, None))
+    return numeric
+
+
+def feature_space(docs: List[Dict[str, Any]]) -> FeatureSpace:
+    specialties = tuple(sorted({s for doc in docs for s in doc.get("specialties") or []}))
+    countries = tuple(sorted({doc["country"] for doc in docs if doc.get("country")}))
+    numeric = numeric_columns(docs)
+    bounds, means = [], []
+    for j in range(len(NUMERIC_FEATURES)):
+        present = numeric[:, j][~np.isnan(numeric[:, j])]
+        low, high = (float(present.min()), float(present.max())) if present.size else (0.0, 0.0)
+        bounds.append((low, high))
+        means.append(float(np.mean((present - low) / (high - low))) if present.size and high > low else 0.5)
+    return FeatureSpace(specialties, countries, tuple(bounds), tuple(means))
+
+
+def encode(docs: List[Dict[str, Any]], space: FeatureSpace) -> np.ndarray:
+    """
+    One L2-normalized row per university: specialty one-hot (each row spread
+    over its specialties), country one-hot, and min-max scaled ranking,
+    tuition, acceptance rate and student count. Missing numbers take the
+    column mean, so they neither attract nor repel; numbers outside the
+    space's bounds are clamped to them. Every specialty and country must be
+    covered by the space.
+    """
+    n = len(docs)
+    specialty_block = np.zeros((n, len(space.specialties)))
+    specialty_column = {s: j for j, s in enumerate(space.specialties)}
+    country_block = np.zeros((n, len(space.countries)))
+    country_column = {c: j for j, c in enumerate(space.countries)}
+    for i, doc in enumerate(docs):
+        for s in set(doc.get("specialties") or []):
+            specialty_block[i, specialty_column[s]] = 1.0
+        if doc.get("country"):
+            country_block[i, country_column[doc["country"]]] = 1.0
+    counts = specialty_block.sum(axis=1, keepdims=True)
+    specialty_block = np.divide(specialty_block, np.sqrt(counts), out=specialty_block, where=counts > 0)
+
+    numeric = numeric_columns(docs)
+    for j, ((low, high), mean) in enumerate(zip(space.bounds, space.means)):
+        column = numeric[:, j]
+        scaled = np.clip((column - low) / (high - low), 0.0, 1.0) if high > low else np.full(n, 0.5)
+        numeric[:, j] = np.where(np.isnan(column), mean, scaled)
+    numeric /= np.sqrt(len(NUMERIC_FEATURES))
+
+    matrix = np.hstack([
+        specialty_block * FEATURE_WEIGHTS["specialties"],
+        country_block * FEATURE_WEIGHTS["country"],
+        numeric * FEATURE_WEIGHTS["numeric"]
+    ])
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return np.divide(matrix, norms, out=matrix, where=norms > 0)
+
+
+def build_features(docs: List[Dict[str, Any]]) -> Tuple[List[str], np.ndarray, FeatureSpace]:
+    """Feature space of the whole catalog and its matrix, rows in `docs` order."""
+    space = feature_space(docs)
+    return [str(doc["_id"]) for doc in docs], encode(docs, space), space
+
+
+def top_k(matrix: np.ndarray, rows: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Indices and cosine scores of the k nearest other rows for each of `rows`, best first."""
+    k = min(k, matrix.shape[0] - 1)
+    indices = np.empty((len(rows), max(k, 0)), dtype=np.int64)
+    scores = np.empty((len(rows), max(k, 0)))
+    if k <= 0:
+        return indices, scores
+
+    for start in range(0, len(rows), CHUNK):
+        chunk = rows[start:start + CHUNK]
+        sims = matrix[chunk] @ matrix.T
+        sims[np.arange(len(chunk)), chunk] = -np.inf
+        candidates = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+        candidate_scores = np.take_along_axis(sims, candidates, axis=1)
+        order = np.argsort(-candidate_scores, axis=1, kind="stable")
+        indices[start:start + len(chunk)] = np.take_along_axis(candidates, order, axis=1)
+        scores[start:start + len(chunk)] = np.take_along_axis(candidate_scores, order, axis=1)
+    return indices, scores
+
+
+class SimilarityIndex:
+    """
+    Maintains `university_similarities`: the top-k most similar universities
+    for each university, served by `GET /universities/{id}/similar` with one
+    point read.
+
+    University changes arrive from the invalidation bus and are debounced. One
+    worker at a time (a lease in `catalog_meta`) recomputes. It keeps the
+    feature matrix in memory, so a change reads only the changed universities
+    and replaces their rows; the feature space (columns and numeric bounds)
+    stays as the last full build set it, values outside the bounds clamped.
+    It then recomputes only rows that can be affected: the changed
+    universities, rows that listed a changed or deleted one, and rows where a
+    changed one now beats their k-th neighbour. That check is one product of
+    the changed rows against the matrix, O(changed x N). On startup, a reset,
+    after taking over from another worker, or when a change brings a new
+    specialty or country, it reads everything and rebuilds in one vectorized
+    pass, which also resets the bounds.
+    """
+
+    def __init__(self):
+        self.enabled = settings.similarity_enabled
+        self.k = settings.similarity_top_k
+        self.debounce = settings.similarity_debounce_seconds
+        self.lease = timedelta(seconds=settings.similarity_lease_seconds)
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._pending: Set[str] = set()
+        self._full = True
+        self._changed = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        # State of the last computation in this process, used for incremental runs
+        self._space: Optional[FeatureSpace] = None
+        self._ids: List[str] = []
+        self._matrix: Optional[np.ndarray] = None
+        self._lists: Dict[str, List[Tuple[str, float]]] = {}
+        self.last_run: Dict[str, Any] = {}
+
+    async def start(self) -> None:
+        if not self.enabled:
+            return
+        invalidation_bus.subscribe(self.on_invalidation, ["universities"])
+        self._changed.set()
+        self._task = asyncio.create_task(self._worker())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def on_invalidation(self, event: InvalidationEvent) -> None:
+        if event.is_reset or event.document_id is None:
+            self._full = True
+        else:
+            self._pending.add(event.document_id)
+        self._changed.set()
+
+    async def _worker(self) -> None:
+        while True:
+            await self._changed.wait()
+            await asyncio.sleep(self.debounce)
+            self._changed.clear()
+            changed, full = self._pending, self._full
+            self._pending, self._full = set(), False
+            try:
+                if not await self._acquire_lease():
+                    # Another worker computes; start from scratch if we take over later
+                    self._space = None
+                    continue
+                await self.refresh(changed, full)
+            except Exception as e:
+                self._full = True
+                print(f"[WARNING] Similarity refresh failed: {str(e)[:100]}")
+
+    async def _acquire_lease(self) -> bool:
+        now = datetime.utcnow()
+        meta = UniversitySimilarity.get_motor_collection().database[CATALOG_META_COLLECTION]
+        try:
+            await meta.update_one(
+                {"_id": "similarity_leader", "$or": [{"owner": self.owner}, {"expires_at": {"$lt": now}}]},
+                {"$set": {"owner": self.owner, "expires_at": now + self.lease}},
+                upsert=True
+            )
+            return True
+        except DuplicateKeyError:
+            return False
+
+    async def refresh(self, changed: Set[str], full: bool = False) -> None:
+        started = datetime.utcnow()
+        collection = University.get_motor_collection()
+
+        docs: List[Dict[str, Any]] = []
+        if not full and self._space is not None:
+            docs = await collection.find(
+                {"_id": {"$in": [ObjectId(university_id) for university_id in changed]}}, FEATURE_PROJECTION
+            ).to_list(length=None)
+            # A new specialty or country needs a column of its own
+            full = not all(self._space.covers(doc) for doc in docs)
+
+        if full or self._space is None:
+            docs = await collection.find({}, FEATURE_PROJECTION).sort("_id", 1).to_list(length=None)
+            self._ids, self._matrix, self._space = await offload(build_features, docs)
+            rows = np.arange(len(self._ids))
+            removed = None
+        else:
+            removed = self._apply(docs, changed)
+            rows = self._affected_rows(self._ids, self._matrix, changed, removed)
+
+        ids = self._ids
+        indices, scores = await offload(top_k, self._matrix, rows, self.k)
+        if removed is None:
+            self._lists = {}
+        for row, neighbour_rows, neighbour_scores in zip(rows, indices, scores):
+            self._lists[ids[row]] = [
+                (ids[j], round(float(score), 4)) for j, score in zip(neighbour_rows, neighbour_scores)
+            ]
+        for university_id in removed or ():
+            self._lists.pop(university_id, None)
+
+        await self._write([ids[row] for row in rows], removed, ids)
+        self.last_run = {
+            "at": started.isoformat(),
+            "mode": "full" if removed is None else "incremental",
+            "rows": int(len(rows)),
+            "universities": len(ids),
+            "seconds": round((datetime.utcnow() - started).total_seconds(), 3)
+        }
+
+    def _apply(self, docs: List[Dict[str, Any]], changed: Set[str]) -> Set[str]:
+        """Swap the changed universities' rows into the matrix; returns the ids deleted from it."""
+        current = {str(doc["_id"]): doc for doc in docs}
+        position = {university_id: i for i, university_id in enumerate(self._ids)}
+        removed = {university_id for university_id in changed if university_id not in current}
+
+        if current:
+            rows = encode(list(current.values()), self._space)
+            added = []
+            for university_id, row in zip(current, rows):
+                if university_id in position:
+                    self._matrix[position[university_id]] = row
+                else:
+                    added.append((university_id, row))
+            if added:
+                self._ids = self._ids + [university_id for university_id, _ in added]
+                self._matrix = np.vstack([self._matrix, np.array([row for _, row in added])])
+
+        gone = [position[university_id] for university_id in removed if university_id in position]
+        if gone:
+            self._matrix = np.delete(self._matrix, gone, axis=0)
+            self._ids = [university_id for university_id in self._ids if university_id not in removed]
+        return removed
+
+    def _affected_rows(
+        self,
+        ids: List[str],
+        matrix: np.ndarray,
+        changed: Set[str],
+        removed: Set[str]
+    ) -> np.ndarray:
+        position = {university_id: i for i, university_id in enumerate(ids)}
+        touched = {university_id for university_id in changed if university_id in position}
+        touched |= {university_id for university_id in ids if university_id not in self._lists}
+        gone = changed | removed
+
+        affected = {position[university_id] for university_id in touched}
+        for university_id, neighbours in self._lists.items():
+            if university_id in position and any(n in gone for n, _ in neighbours):
+                affected.add(position[university_id])
+
+        if touched:
+            # A changed university may now outrank someone's current k-th neighbour
+            kth = np.array([
+                self._lists[u][-1][1] if len(self._lists.get(u, ())) >= min(self.k, len(ids) - 1) else -np.inf
+                for u in ids
+            ])
+            touched_rows = np.array(sorted(position[u] for u in touched))
+            sims = matrix[touched_rows] @ matrix.T
+            sims[np.arange(len(touched_rows)), touched_rows] = -np.inf
+            affected.update(np.nonzero((sims > kth[None, :]).any(axis=0))[0].tolist())
+        return np.array(sorted(affected), dtype=np.int64)
+
+    async def _write(self, updated: List[str], removed: Optional[Set[str]], ids: List[str]) -> None:
+        """Upsert recomputed rows; drop rows of deleted universities (all stale rows after a full run)."""
+        collection = UniversitySimilarity.get_motor_collection()
+        now = datetime.utcnow()
+        operations = [
+            ReplaceOne(
+                {"_id": ObjectId(university_id)},
+                {
+                    "neighbours": [
+                        {"university_id": neighbour, "score": score}
+                        for neighbour, score in self._lists[university_id]
+                    ],
+                    "computed_at": now
+                },
+                upsert=True
+            )
+            for university_id in updated
+        ]
+        for start in range(0, len(operations), 1000):
+            await collection.bulk_write(operations[start:start + 1000], ordered=False)
+
+        if removed is None:
+            await collection.delete_many({"_id": {"$nin": [ObjectId(i) for i in ids]}})
+        elif removed:
+            await collection.delete_many({"_id": {"$in": [ObjectId(i) for i in removed]}})
+
+    def stats(self) -> Dict[str, Any]:
+        return {"enabled": self.enabled, "top_k": self.k, "last_run": self.last_run}
+
+
+similarity_index = SimilarityIndex()
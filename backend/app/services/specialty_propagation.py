@@ -0,0 +1,243 @@
+from datetime import datetime
+from typing import Any, Dict, List
+from app.core.config import settings
+from app.db.invalidation import invalidation_bus
+from app.models.specialty_propagation import SpecialtyPropagationTask
+from app.models.university import University
+from app.services.change_log import change_log
+
+
+def _current_name(id_expr: Any, fallback_expr: Any) -> Dict[str, Any]:
+    """Aggregation expression: the specialty's name from `_current`, or the fallback if unknown."""
+    return {"$let": {
+        "vars": {"match": {"$filter": {
+            "input": "$_current",
+            "as": "s",
+            "cond": {"$eq": ["$$s.id", id_expr]}
+        }}},
+        "in": {"$cond": [
+            {"$gt": [{"$size": "$$match"}, 0]},
+            {"$arrayElemAt": ["$$match.name", 0]},
+            fallback_expr
+        ]}
+    }}
+
+
+def _drift_pipeline() -> List[Dict[str, Any]]:
+    """
+    Universities whose denormalized specialty names differ from `specialties`.
+
+    Ids that don't resolve to a specialty keep their stored name; removing
+    dangling references is left to delete propagation.
+    """
+    return [
+        {"$lookup": {
+            "from": "specialties",
+            "let": {"ids": {"$setUnion": [
+                {"$ifNull": ["$specialties", []]},
+                {"$ifNull": ["$requirements.specialty_id", []]}
+            ]}},
+            "pipeline": [
+                {"$project": {"_id": 0, "id": {"$toString": "$_id"}, "name": 1}},
+                {"$match": {"$expr": {"$in": ["$id", "$$ids"]}}}
+            ],
+            "as": "_current"
+        }},
+        {"$addFields": {
+            # specialties[i] and specialty_names[i] describe the same specialty
+            "_expected_names": {"$map": {
+                "input": {"$range": [0, {"$size": {"$ifNull": ["$specialties", []]}}]},
+                "as": "i",
+                "in": _current_name(
+                    {"$arrayElemAt": ["$specialties", "$$i"]},
+                    {"$arrayElemAt": ["$specialty_names", "$$i"]}
+                )
+            }},
+            "_expected_requirements": {"$map": {
+                "input": {"$ifNull": ["$requirements", []]},
+                "as": "req",
+                "in": {"$mergeObjects": [
+                    "$$req",
+                    {"specialty_name": _current_name("$$req.specialty_id", "$$req.specialty_name")}
+                ]}
+            }}
+        }},
+        {"$match": {"$expr": {"$or": [
+            {"$ne": ["$_expected_names", {"$ifNull": ["$specialty_names", []]}]},
+            {"$ne": ["$_expected_requirements", {"$ifNull": ["$requirements", []]}]}
+        ]}}}
+    ]
+
+
+class SpecialtyPropagationService:
+    """
+    Keeps `University.specialty_names` and `UniversityRequirements.specialty_name`
+    in line with `Specialty.name`.
+
+    Renames and deletes are applied with one `update_many` per batch of
+    `specialty_propagation_batch_size` universities, walking `_id` order. Each
+    batch is checkpointed in `specialty_propagations`, so an interrupted run
+    resumes after the last finished batch; the updates are idempotent, so a
+    batch replayed after a crash is harmless.
+    """
+
+    @staticmethod
+    async def propagate_rename(specialty_id: str, old_name: str, new_name: str) -> int:
+        if old_name == new_name:
+            return 0
+        task = SpecialtyPropagationTask(
+            specialty_id=specialty_id,
+            operation="rename",
+            old_name=old_name,
+            new_name=new_name
+        )
+        await task.insert()
+        return await SpecialtyPropagationService.run(task)
+
+    @staticmethod
+    async def propagate_delete(specialty_id: str, old_name: str) -> int:
+        task = SpecialtyPropagationTask(
+            specialty_id=specialty_id,
+            operation="delete",
+            old_name=old_name
+        )
+        await task.insert()
+        return await SpecialtyPropagationService.run(task)
+
+    @staticmethod
+    def _filter(task: SpecialtyPropagationTask) -> Dict[str, Any]:
+        return {"$or": [
+            {"specialties": task.specialty_id},
+            {"requirements.specialty_id": task.specialty_id}
+        ]}
+
+    @staticmethod
+    def _update(task: SpecialtyPropagationTask) -> List[Dict[str, Any]]:
+        """
+        Pipeline update keyed on the specialty id: `specialty_names` is rebuilt
+        position by position from `specialties`, so two specialties sharing a
+        name stay apart and the arrays stay aligned.
+        """
+        positions = {"$range": [0, {"$size": {"$ifNull": ["$specialties", []]}}]}
+        is_target = {"$eq": [{"$arrayElemAt": ["$specialties", "$$i"]}, task.specialty_id]}
+        name_at = {"$arrayElemAt": ["$specialty_names", "$$i"]}
+        requirements = {"$ifNull": ["$requirements", []]}
+
+        if task.operation == "rename":
+            return [{"$set": {
+                "specialty_names": {"$map": {
+                    "input": positions,
+                    "as": "i",
+                    "in": {"$cond": [is_target, task.new_name, name_at]}
+                }},
+                "requirements": {"$map": {
+                    "input": requirements,
+                    "as": "req",
+                    "in": {"$cond": [
+                        {"$eq": ["$$req.specialty_id", task.specialty_id]},
+                        {"$mergeObjects": ["$$req", {"specialty_name": task.new_name}]},
+                        "$$req"
+                    ]}
+                }}
+            }}]
+        # Every expression in one $set reads the document as it was before it
+        return [{"$set": {
+            "specialty_names": {"$map": {
+                "input": {"$filter": {"input": positions, "as": "i", "cond": {"$not": [is_target]}}},
+                "as": "i",
+                "in": name_at
+            }},
+            "specialties": {"$filter": {
+                "input": {"$ifNull": ["$specialties", []]},
+                "as": "s",
+                "cond": {"$ne": ["$$s", task.specialty_id]}
+            }},
+            "requirements": {"$filter": {
+                "input": requirements,
+                "as": "req",
+                "cond": {"$ne": ["$$req.specialty_id", task.specialty_id]}
+            }}
+        }}]
+
+    @staticmethod
+    async def run(task: SpecialtyPropagationTask) -> int:
+        collection = University.get_motor_collection()
+        match = SpecialtyPropagationService._filter(task)
+        update = SpecialtyPropagationService._update(task)
+        batch_size = settings.specialty_propagation_batch_size
+
+        while True:
+            batch_filter = dict(match)
+            if task.last_id is not None:
+                batch_filter["_id"] = {"$gt": task.last_id}
+            ids = [
+                doc["_id"] async for doc in
+                collection.find(batch_filter, {"_id": 1}).sort("_id", 1).limit(batch_size)
+            ]
+            if not ids:
+                break
+
+            result = await collection.update_many({"_id": {"$in": ids}}, update)
+            await change_log.record("universities", "upsert", ids)
+            await task.set({
+                SpecialtyPropagationTask.last_id: ids[-1],
+                SpecialtyPropagationTask.modified: task.modified + result.modified_count,
+                SpecialtyPropagationTask.updated_at: datetime.utcnow()
+            })
+
+        await task.set({
+            SpecialtyPropagationTask.status: "completed",
+            SpecialtyPropagationTask.updated_at: datetime.utcnow()
+        })
+        if task.modified:
+            await invalidation_bus.notify("universities", "reset")
+        return task.modified
+
+    @staticmethod
+    async def resume_pending() -> int:
+        """Finish propagations interrupted by a restart."""
+        tasks = await SpecialtyPropagationTask.find(
+            SpecialtyPropagationTask.status == "running"
+        ).sort("created_at").to_list()
+        for task in tasks:
+            await SpecialtyPropagationService.run(task)
+        return len(tasks)
+
+    @staticmethod
+    async def check_consistency(sample_size: int = 20) -> Dict[str, Any]:
+        """Count drifted universities without loading them, with a few sample ids."""
+        pipeline = _drift_pipeline() + [{"$facet": {
+            "count": [{"$count": "drifted"}],
+            "sample": [{"$limit": sample_size}, {"$project": {"_id": 1, "name": 1}}]
+        }}]
+        result = await University.get_motor_collection().aggregate(pipeline).to_list(length=1)
+        facet = result[0] if result else {"count": [], "sample": []}
+        return {
+            "drifted": facet["count"][0]["drifted"] if facet["count"] else 0,
+            "sample": [{"id": str(doc["_id"]), "name": doc.get("name")} for doc in facet["sample"]]
+        }
+
+    @staticmethod
+    async def repair_consistency() -> Dict[str, Any]:
+        """Rewrite drifted names server-side with `$merge`; no documents leave the database."""
+        report = await SpecialtyPropagationService.check_consistency()
+        if not report["drifted"]:
+            return {**report, "repaired": 0}
+
+        pipeline = _drift_pipeline() + [
+            {"$project": {
+                "specialty_names": "$_expected_names",
+                "requirements": "$_expected_requirements"
+            }},
+            {"$merge": {
+                "into": University.get_collection_name(),
+                "on": "_id",
+                "whenMatched": "merge",
+                "whenNotMatched": "discard"
+            }}
+        ]
+        await University.get_motor_collection().aggregate(pipeline).to_list(length=None)
+        await invalidation_bus.notify("universities", "reset")
+        # $merge doesn't report which documents it rewrote
+        await change_log.record_reset()
+        return {**report, "repaired": report["drifted"]}
@@ -1,6 +1,16 @@
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Union
 from beanie import PydanticObjectId
 from app.models.specialty import Specialty
+from app.models.specialty_leaderboard import SpecialtyLeaderboard
+from app.db.invalidation import invalidation_bus
+from app.db.raw_reads import specialty_reader
+from app.services.change_log import change_log
+from app.services.catalog_snapshot import catalog_snapshot
+from app.services.specialty_propagation import SpecialtyPropagationService
+from app.services.university_service import UniversityService
+
+# With `raw=True` reads return JSON-shaped dicts instead of documents, see RawReader
+SpecialtyItem = Union[Specialty, Dict[str, Any]]
 
 
 class SpecialtyService:
@@ -8,14 +18,24 @@ class SpecialtyService:
     async def create_specialty(specialty_data: dict) -> Specialty:
         specialty = Specialty(**specialty_data)
         await specialty.insert()
+        await invalidation_bus.notify("specialties", "insert", specialty.id)
+        await change_log.record("specialties", "upsert", [specialty.id])
         return specialty
 
     @staticmethod
     async def get_specialty(specialty_id: PydanticObjectId) -> Optional[Specialty]:
+        if catalog_snapshot.ready and catalog_snapshot.is_current("specialties", specialty_id):
+            specialty = catalog_snapshot.index.specialty_by_id.get(specialty_id)
+            if specialty:
+                return specialty
         return await Specialty.get(specialty_id)
 
     @staticmethod
-    async def get_all_specialties(skip: int = 0, limit: int = 100) -> List[Specialty]:
+    async def get_all_specialties(skip: int = 0, limit: int = 100, raw: bool = False) -> List[SpecialtyItem]:
+        if catalog_snapshot.ready:
+            return catalog_snapshot.index.list_specialties(skip, limit, raw=raw)
+        if raw:
+            return await specialty_reader.find({}, skip=skip, limit=limit)
         return await Specialty.find_all().skip(skip).limit(limit).to_list()
 
     @staticmethod
@@ -24,7 +44,13 @@ class SpecialtyService:
         if not specialty:
             return None
 
+        old_name = specialty.name
         await specialty.set(specialty_data)
+        await invalidation_bus.notify("specialties", "update", specialty.id, list(specialty_data))
+        await change_log.record("specialties", "upsert", [specialty.id])
+
+        if specialty.name != old_name:
+            await SpecialtyPropagationService.propagate_rename(str(specialty.id), old_name, specialty.name)
         return specialty
 
     @staticmethod
@@ -34,13 +60,50 @@ class SpecialtyService:
             return False
 
         await specialty.delete()
+        await invalidation_bus.notify("specialties", "delete", specialty_id)
+        await change_log.record("specialties", "delete", [specialty_id])
+        await SpecialtyPropagationService.propagate_delete(str(specialty_id), specialty.name)
         return True
 
     @staticmethod
-    async def search_specialties(query: str) -> List[Specialty]:
-        return await Specialty.find(
-            {"$or": [
-                {"name": {"$regex": query, "$options": "i"}},
-                {"description": {"$regex": query, "$options": "i"}}
-            ]}
-        ).to_list()
+    async def get_leaderboard(specialty_id: str, by: str, limit: int) -> Optional[Dict[str, Any]]:
+        """
+        The first `limit` entries of a precomputed leaderboard (see
+        LeaderboardIndex) with the universities as raw documents; None if
+        there is no board for the specialty.
+        """
+        board = await SpecialtyLeaderboard.get_motor_collection().find_one(
+            {"_id": specialty_id},
+            {"specialty_name": 1, "universities": 1, "computed_at": 1, by: {"$slice": limit}}
+        )
+        if board is None:
+            return None
+        entries = board.get(by) or []
+        university_ids = [PydanticObjectId(entry["university_id"]) for entry in entries]
+        found = await UniversityService.get_universities_by_ids(university_ids, raw=True)
+        return {
+            "specialty_id": specialty_id,
+            "specialty_name": board["specialty_name"],
+            "by": by,
+            "universities": board["universities"],
+            "computed_at": board["computed_at"],
+            "items": [
+                {"university": found[university_id], "value": entry["value"]}
+                for university_id, entry in zip(university_ids, entries)
+                if university_id in found
+            ]
+        }
+
+    @staticmethod
+    async def search_specialties(query: str, raw: bool = False) -> List[SpecialtyItem]:
+        if catalog_snapshot.ready:
+            result = catalog_snapshot.index.search_specialties(query, raw=raw)
+            if result is not None:
+                return result
+        search = {"$or": [
+            {"name": {"$regex": query, "$options": "i"}},
+            {"description": {"$regex": query, "$options": "i"}}
+        ]}
+        if raw:
+            return await specialty_reader.find(search)
+        return await Specialty.find(search).to_list()
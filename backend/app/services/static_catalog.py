@@ -0,0 +1,483 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+from urllib.parse import parse_qsl
+from beanie import PydanticObjectId
+from pydantic_core import to_json
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
+from app.core.compression import available_encoders, negotiate
+from app.core.config import settings
+from app.core.offload import offload
+from app.core.responses import LeanSerializer
+from app.db.invalidation import CATALOG_COLLECTIONS, InvalidationEvent, invalidation_bus
+from app.models.specialty import Specialty
+from app.models.university import University
+from app.services.catalog_snapshot import SORT_FIELDS, CatalogIndex
+
+MANIFEST = "manifest.json"
+
+# File suffix of each pre-compressed variant
+SUFFIXES = {"zstd": ".zst", "br": ".br", "gzip": ".gz"}
+
+# Page size of GET /api/specialties/ without parameters
+SPECIALTY_PAGE_SIZE = 100
+
+OBJECT_ID = re.compile(r"[0-9a-f]{24}")
+
+# Manifest entry: {"file": relative path, "etag": content hash, "encodings": [...]}
+Entry = Dict[str, Any]
+
+# Same serializer as GET /universities/{id}
+_university_json = LeanSerializer(University)
+
+_compressors: Optional[Dict[str, Callable[[bytes], bytes]]] = None
+
+
+def list_key(sort_by: str, sort_order: str, page: int) -> str:
+    return f"universities/list/{sort_by}-{sort_order}/{page}"
+
+
+def detail_key(university_id: Any) -> str:
+    return f"universities/{university_id}"
+
+
+def specialties_key(page: int) -> str:
+    return f"specialties/list/{page}"
+
+
+def content_hash(body: bytes) -> str:
+    return hashlib.blake2b(body, digest_size=8).hexdigest()
+
+
+def _as_int(value: str) -> Optional[int]:
+    try:
+        return int(value)
+    except ValueError:
+        return None
+
+
+def _precompressors() -> Dict[str, Callable[[bytes], bytes]]:
+    global _compressors
+    if _compressors is None:
+        # Compressed once, served many times: maximum levels
+        _compressors = available_encoders(zstd_level=19, brotli_quality=11, gzip_level=9)
+    return _compressors
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(data)
+    os.replace(temporary, path)
+
+
+def write_files(root: str, files: List[Tuple[str, bytes]]) -> List[List[str]]:
+    """
+    Write each body and its pre-compressed variants (only those smaller than
+    the body) under `root`; returns the encodings written per file. Names are
+    content-addressed, so a file that already exists is complete: the plain
+    file is written last.
+    """
+    written = []
+    for name, body in files:
+        path = os.path.join(root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        encodings = []
+        for encoding, compress in _precompressors().items():
+            variant = path + SUFFIXES[encoding]
+            if not os.path.exists(variant):
+                compressed = compress(body)
+                if len(compressed) >= len(body):
+                    continue
+                _write_atomic(variant, compressed)
+            encodings.append(encoding)
+        if not os.path.exists(path):
+            _write_atomic(path, body)
+        written.append(encodings)
+    return written
+
+
+def read_file(root: str, name: str, encoding: Optional[str]) -> Optional[bytes]:
+    try:
+        with open(os.path.join(root, name) + (SUFFIXES[encoding] if encoding else ""), "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def load_manifest(root: str) -> Dict[str, Entry]:
+    try:
+        with open(os.path.join(root, MANIFEST), "rb") as f:
+            return json.load(f).get("entries", {})
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(root: str, manifest: Dict[str, Any]) -> None:
+    os.makedirs(root, exist_ok=True)
+    _write_atomic(os.path.join(root, MANIFEST), json.dumps(manifest, separators=(",", ":")).encode())
+
+
+def remove_unreferenced(root: str, referenced: Set[str], older_than: float) -> int:
+    """
+    Delete files no manifest entry points to, once they are `older_than`
+    seconds old: CDN caches and clients holding an old manifest or redirect
+    keep working for that long.
+    """
+    cutoff = time.time() - older_than
+    removed = 0
+    for directory, _, files in os.walk(root):
+        for file in files:
+            path = os.path.join(directory, file)
+            name = os.path.relpath(path, root).replace(os.sep, "/")
+            for suffix in SUFFIXES.values():
+                name = name.removesuffix(suffix)
+            if name == MANIFEST or name in referenced:
+                continue
+            try:
+                if os.stat(path).st_mtime < cutoff:
+                    os.remove(path)
+                    removed += 1
+            except OSError:
+                pass
+    return removed
+
+
+class StaticCatalog:
+    """
+    Pre-rendered copy of the hot anonymous reads, for a CDN or the API itself
+    to serve as static files (`STATIC_CATALOG_ENABLED`).
+
+    Renders the first `static_catalog_max_list_pages` pages of the university
+    list for each of `static_catalog_sorts` at the default page size, every
+    university's detail and the specialty list, byte for byte as the routes
+    would answer them, into `static_catalog_dir`. Each file is named by its
+    content hash and stored with zstd, br and gzip variants next to it;
+    `manifest.json` maps each page to its current file.
+
+    Catalog changes arrive from the invalidation bus. The affected pages are
+    withdrawn at once, so the API answers them itself, and re-rendered after a
+    debounce: the changed universities' details, the list pages (all of them
+    are rendered in memory, only those whose hash changed are written) and the
+    specialty list when specialties changed. Files no longer referenced are
+    deleted after `static_catalog_retention_seconds`.
+
+    Every worker renders from MongoDB on its own, like the catalog snapshot
+    reloads; content-addressed names mean only the first one writes a file.
+    """
+
+    def __init__(self):
+        self.enabled = settings.static_catalog_enabled
+        self.mode = settings.static_catalog_mode
+        self.root = settings.static_catalog_dir
+        self.base_url = settings.static_catalog_base_url.rstrip("/")
+        self.page_size = settings.static_catalog_page_size
+        self.max_pages = settings.static_catalog_max_list_pages
+        self.debounce = settings.static_catalog_debounce_seconds
+        self.retention = settings.static_catalog_retention_seconds
+        self.sorts: List[Tuple[str, str]] = []
+        for spec in settings.static_catalog_sorts.split(","):
+            sort_by, _, sort_order = spec.strip().partition(":")
+            if sort_by in SORT_FIELDS and sort_order in ("asc", "desc"):
+                self.sorts.append((sort_by, sort_order))
+        # Entries served right now; empty until the first build of this process
+        self.entries: Dict[str, Entry] = {}
+        # Entries of the last manifest written, current or not
+        self._written: Dict[str, Entry] = {}
+        self._pending: Set[str] = set()
+        self._full = True
+        self._specialties_changed = False
+        self._changed = asyncio.Event()
+        self._building = False
+        self._late_events: List[InvalidationEvent] = []
+        self._task: Optional[asyncio.Task] = None
+        self.last_build: Dict[str, Any] = {}
+        self.counters = {"served": 0, "redirected": 0, "not_modified": 0}
+
+    async def start(self) -> None:
+        if not self.enabled:
+            return
+        if self.mode == "redirect" and not self.base_url:
+            print("[WARNING] STATIC_CATALOG_BASE_URL is not set, serving the static catalog from the API")
+            self.mode = "serve"
+        invalidation_bus.subscribe(self.on_invalidation, CATALOG_COLLECTIONS)
+        self._changed.set()
+        self._task = asyncio.create_task(self._worker())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def on_invalidation(self, event: InvalidationEvent) -> None:
+        self._withdraw(event)
+        if self._building:
+            # The running build may have read the catalog before this change
+            self._late_events.append(event)
+        if event.collection == "specialties":
+            self._specialties_changed = True
+        elif event.is_reset or event.document_id is None:
+            self._full = True
+        else:
+            self._pending.add(event.document_id)
+        self._changed.set()
+
+    def _withdraw(self, event: InvalidationEvent) -> None:
+        if event.collection == "specialties":
+            prefixes: Tuple[str, ...] = ("specialties/",)
+        elif event.is_reset or event.document_id is None:
+            prefixes = ("universities/",)
+        else:
+            prefixes = ("universities/list/",)
+            self.entries.pop(detail_key(event.document_id), None)
+        self.entries = {key: entry for key, entry in self.entries.items() if not key.startswith(prefixes)}
+
+    async def _worker(self) -> None:
+        while True:
+            await self._changed.wait()
+            await asyncio.sleep(self.debounce)
+            self._changed.clear()
+            changed, full, specialties = self._pending, self._full, self._specialties_changed
+            self._pending, self._full, self._specialties_changed = set(), False, False
+            try:
+                await self.build(None if full else changed, specialties=specialties or full)
+            except Exception as e:
+                self._full = True
+                print(f"[WARNING] Static catalog build failed: {str(e)[:100]}")
+
+    async def build(self, changed: Optional[Set[str]] = None, specialties: bool = True) -> Dict[str, Any]:
+        """
+        Render and write the catalog. `changed` limits detail pages to those
+        university ids (None renders all of them); list pages are always
+        rendered, specialty pages when `specialties` is set.
+        """
+        started = time.perf_counter()
+        self._building = True
+        self._late_events = []
+        try:
+            if not self._written:
+                # Files of an earlier run that are still current are kept
+                self._written = await offload(load_manifest, self.root)
+            universities, specialty_docs = await asyncio.gather(
+                University.find_all().sort("_id").to_list(),
+                Specialty.find_all().sort("_id").to_list()
+            )
+            index = CatalogIndex(universities, specialty_docs, 0)
+            bodies, removed = self._render(index, changed, specialties or changed is None)
+
+            if changed is None:
+                entries: Dict[str, Entry] = {}
+            else:
+                stale = ("universities/list/", "specialties/") if specialties else ("universities/list/",)
+                entries = {
+                    key: entry for key, entry in self._written.items()
+                    if not key.startswith(stale) and key not in removed
+                }
+            to_write = []
+            for key, body in bodies.items():
+                etag = content_hash(body)
+                previous = self._written.get(key)
+                if previous and previous["etag"] == etag:
+                    entries[key] = previous
+                else:
+                    to_write.append((key, etag, body))
+
+            encodings = await offload(
+                write_files, self.root, [(f"{key}.{etag}.json", body) for key, etag, body in to_write]
+            )
+            for (key, etag, _), written in zip(to_write, encodings):
+                entries[key] = {"file": f"{key}.{etag}.json", "etag": etag, "encodings": written}
+
+            if entries != self._written or changed is None:
+                await offload(save_manifest, self.root, {
+                    "generated_at": datetime.utcnow().isoformat(),
+                    "page_size": self.page_size,
+                    "sorts": [f"{sort_by}:{sort_order}" for sort_by, sort_order in self.sorts],
+                    "entries": entries
+                })
+            deleted = await offload(
+                remove_unreferenced, self.root, {entry["file"] for entry in entries.values()}, self.retention
+            )
+
+            self._written = entries
+            self.entries = dict(entries)
+            for event in self._late_events:
+                self._withdraw(event)
+        finally:
+            self._building = False
+            self._late_events = []
+
+        self.last_build = {
+            "at": datetime.utcnow().isoformat(),
+            "seconds": round(time.perf_counter() - started, 3),
+            "full": changed is None,
+            "rendered": len(bodies),
+            "written": len(to_write),
+            "deleted": deleted
+        }
+        return self.last_build
+
+    def _render(
+        self,
+        index: CatalogIndex,
+        changed: Optional[Set[str]],
+        specialties: bool
+    ) -> Tuple[Dict[str, bytes], Set[str]]:
+        """Response bodies by key, and the keys of deleted universities."""
+        bodies: Dict[str, bytes] = {}
+        size = self.page_size
+        for sort_by, sort_order in self.sorts:
+            page = 1
+            while True:
+                items, total = index.list_universities(
+                    (page - 1) * size, size, None, None, None, sort_by, 1 if sort_order == "asc" else -1, raw=True
+                )
+                # Same body as GET /universities/
+                bodies[list_key(sort_by, sort_order, page)] = to_json({
+                    "items": items,
+                    "total": total,
+                    "page": page,
+                    "page_size": size,
+                    "total_pages": (total + size - 1) // size
+                })
+                if page * size >= total or page >= self.max_pages:
+                    break
+                page += 1
+
+        removed: Set[str] = set()
+        if changed is None:
+            records = index.records
+        else:
+            records = []
+            for university_id in changed:
+                record = index.by_id.get(PydanticObjectId(university_id))
+                if record is None:
+                    removed.add(detail_key(university_id))
+                else:
+                    records.append(record)
+        for record in records:
+            bodies[detail_key(record.id)] = _university_json.dump(record.document)
+
+        if specialties:
+            page = 1
+            while True:
+                skip = (page - 1) * SPECIALTY_PAGE_SIZE
+                bodies[specialties_key(page)] = to_json(index.list_specialties(skip, SPECIALTY_PAGE_SIZE, raw=True))
+                if skip + SPECIALTY_PAGE_SIZE >= len(index.specialties):
+                    break
+                page += 1
+        return bodies, removed
+
+    def key_for(self, path: str, query: str) -> Optional[str]:
+        """Manifest key of a GET request, or None when it isn't one the catalog covers."""
+        pairs = parse_qsl(query, keep_blank_values=True)
+        params = dict(pairs)
+        if len(params) != len(pairs):
+            return None
+
+        if path == "/api/universities/":
+            if not params.keys() <= {"page", "page_size", "sort_by", "sort_order"}:
+                return None
+            page = _as_int(params.get("page", "1"))
+            sort = (params.get("sort_by", "name"), params.get("sort_order", "asc"))
+            if page is None or _as_int(params.get("page_size", "20")) != self.page_size or sort not in self.sorts:
+                return None
+            return list_key(sort[0], sort[1], page)
+
+        if path == "/api/specialties/":
+            if not params.keys() <= {"skip", "limit"}:
+                return None
+            skip = _as_int(params.get("skip", "0"))
+            if skip is None or skip % SPECIALTY_PAGE_SIZE or _as_int(params.get("limit", "100")) != SPECIALTY_PAGE_SIZE:
+                return None
+            return specialties_key(skip // SPECIALTY_PAGE_SIZE + 1)
+
+        if path.startswith("/api/universities/") and not query:
+            university_id = path[len("/api/universities/"):]
+            if OBJECT_ID.fullmatch(university_id):
+                return detail_key(university_id)
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        if not self.enabled:
+            return {"enabled": False}
+        return {
+            "enabled": True,
+            "mode": self.mode,
+            "serving": len(self.entries),
+            "files": len(self._written),
+            "last_build": self.last_build,
+            **self.counters
+        }
+
+
+static_catalog = StaticCatalog()
+
+
+class StaticCatalogMiddleware:
+    """
+    Answers GET requests covered by the static catalog without reaching the
+    routers. In "serve" mode the pre-compressed file matching Accept-Encoding
+    is sent with its content hash as ETag (304 on If-None-Match); in
+    "redirect" mode a 307 points at the file under `static_catalog_base_url`,
+    where a CDN serves it as immutable. Anything else goes through: other
+    parameters, deep pages, and pages withdrawn while a change is rendered.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.catalog = static_catalog
+        self.cache_control = f"public, max-age={settings.static_catalog_max_age_seconds}".encode()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "GET" or not self.catalog.entries:
+            await self.app(scope, receive, send)
+            return
+        key = self.catalog.key_for(scope["path"], scope["query_string"].decode("latin-1"))
+        entry = self.catalog.entries.get(key) if key else None
+        if entry is None:
+            await self.app(scope, receive, send)
+            return
+
+        if self.catalog.mode == "redirect":
+            self.catalog.counters["redirected"] += 1
+            await self._send(send, 307, [
+                (b"location", f"{self.catalog.base_url}/{entry['file']}".encode()),
+                (b"cache-control", b"no-cache")
+            ])
+            return
+
+        etag = f'"{entry["etag"]}"'
+        headers = Headers(scope=scope)
+        common = [(b"etag", etag.encode()), (b"cache-control", self.cache_control), (b"vary", b"Accept-Encoding")]
+        if etag in (tag.strip() for tag in headers.get("if-none-match", "").split(",")):
+            self.catalog.counters["not_modified"] += 1
+            await self._send(send, 304, common)
+            return
+
+        encoding = negotiate(headers.get("accept-encoding", ""), entry["encodings"])
+        body = await offload(read_file, self.catalog.root, entry["file"], encoding)
+        if body is None:
+            # Deleted or not synced to this host: let the API answer
+            await self.app(scope, receive, send)
+            return
+        self.catalog.counters["served"] += 1
+        if encoding:
+            common.append((b"content-encoding", encoding.encode()))
+        await self._send(send, 200, [(b"content-type", b"application/json"), *common], body)
+
+    @staticmethod
+    async def _send(send: Send, status: int, headers: List[Tuple[bytes, bytes]], body: bytes = b"") -> None:
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [*headers, (b"content-length", str(len(body)).encode())]
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -1,20 +1,171 @@
-from typing import List, Optional, Dict, Any
+import base64
+import json
+from typing import List, Optional, Dict, Any, Tuple, Union
 from beanie import PydanticObjectId
 from beanie.operators import In, GTE, LTE
+from app.core.config import settings
+from app.core.gazetteer import locate
+from app.core.singleflight import get_singleflight, make_key
 from app.models.university import University
+from app.models.university_similarity import UniversitySimilarity
+from app.db.invalidation import invalidation_bus
+from app.db.raw_reads import university_reader
+from app.services.change_log import change_log
+from app.services.catalog_snapshot import catalog_snapshot
+
+# Identical concurrent catalog reads share one Mongo round trip. It runs under
+# the longest deadline a client may ask for, never the first caller's; each
+# caller still stops waiting at its own.
+_catalog_flight = get_singleflight("catalog", settings.query_deadline_max_ms / 1000)
+
+SORT_FIELDS = {
+    "name": "name",
+    "ranking": "ranking",
+    "tuition_fee": "tuition_fee_usd",
+    "acceptance_rate": "acceptance_rate"
+}
+
+# Numeric fields accepting min_/max_ range filters
+RANGE_FIELDS = ("tuition_fee_usd", "ranking", "acceptance_rate", "student_count")
+
+# field -> (lower bound, upper bound), either side optional
+RangeFilters = Dict[str, Tuple[Optional[float], Optional[float]]]
+
+# (latitude, longitude, radius in km or None for no limit)
+GeoFilter = Tuple[float, float, Optional[float]]
+
+# With `raw=True` reads return JSON-shaped dicts instead of documents, see RawReader
+UniversityItem = Union[University, Dict[str, Any]]
+
+
+def range_conditions(ranges: Optional[RangeFilters]) -> List[Dict[str, Any]]:
+    conditions = []
+    for field, (low, high) in sorted((ranges or {}).items()):
+        if field not in RANGE_FIELDS:
+            raise ValueError(f"Unsupported range field: {field}")
+        bounds = {}
+        if low is not None:
+            bounds["$gte"] = low
+        if high is not None:
+            bounds["$lte"] = high
+        if bounds:
+            conditions.append({field: bounds})
+    return conditions
+
+
+def with_location(university_data: dict, current: Optional[University] = None) -> dict:
+    """
+    Fill `location` from the gazetteer when the city or country is set and no
+    location was given. `current` supplies the other half on partial updates.
+    """
+    if university_data.get("location") is not None:
+        return university_data
+    if current is not None and "city" not in university_data and "country" not in university_data:
+        return university_data
+    city = university_data.get("city", current.city if current else None)
+    country = university_data.get("country", current.country if current else None)
+    return {**university_data, "location": locate(city, country)}
+
+
+def encode_cursor(value: Any, document_id: PydanticObjectId) -> str:
+    raw = json.dumps([value, str(document_id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[Any, PydanticObjectId]:
+    """Raises ValueError for malformed cursors."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        value, document_id = json.loads(base64.urlsafe_b64decode(padded))
+        return value, PydanticObjectId(document_id)
+    except Exception as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def _after_cursor(field: str, value: Any, document_id: PydanticObjectId, sort_order: int) -> dict:
+    """
+    Keyset condition for rows strictly after (value, _id) in (field, _id) order.
+    MongoDB sorts null before any value ascending, and after every value descending.
+    """
+    if sort_order == 1:
+        if value is None:
+            return {"$or": [{field: None, "_id": {"$gt": document_id}}, {field: {"$ne": None}}]}
+        return {"$or": [{field: {"$gt": value}}, {field: value, "_id": {"$gt": document_id}}]}
+
+    if value is None:
+        return {field: None, "_id": {"$lt": document_id}}
+    return {"$or": [
+        {field: {"$lt": value}},
+        {field: value, "_id": {"$lt": document_id}},
+        {field: None}
+    ]}
 
 
 class UniversityService:
     @staticmethod
     async def create_university(university_data: dict) -> University:
-        university = University(**university_data)
+        university = University(**with_location(university_data))
         await university.insert()
+        await invalidation_bus.notify("universities", "insert", university.id)
+        await change_log.record("universities", "upsert", [university.id])
         return university
 
     @staticmethod
     async def get_university(university_id: PydanticObjectId) -> Optional[University]:
+        if catalog_snapshot.ready and catalog_snapshot.is_current("universities", university_id):
+            record = catalog_snapshot.index.by_id.get(university_id)
+            if record:
+                return record.document
         return await University.get(university_id)
 
+    @staticmethod
+    async def get_universities_by_ids(
+        university_ids: List[PydanticObjectId],
+        raw: bool = False
+    ) -> Dict[PydanticObjectId, UniversityItem]:
+        """Fetch many universities with one `$in` query, keyed by id."""
+        found: Dict[PydanticObjectId, UniversityItem] = {}
+        missing = list(dict.fromkeys(university_ids))
+
+        if catalog_snapshot.ready:
+            for university_id in missing:
+                if not catalog_snapshot.is_current("universities", university_id):
+                    continue
+                record = catalog_snapshot.index.by_id.get(university_id)
+                if record:
+                    found[university_id] = record.raw if raw else record.document
+            missing = [university_id for university_id in missing if university_id not in found]
+
+        if not missing:
+            return found
+        if raw:
+            for doc in await university_reader.find({"_id": {"$in": missing}}):
+                found[PydanticObjectId(doc["_id"])] = doc
+        else:
+            for university in await University.find(In(University.id, missing)).to_list():
+                found[university.id] = university
+        return found
+
+    @staticmethod
+    async def get_similar_universities(
+        university_id: PydanticObjectId,
+        limit: int
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        Precomputed nearest neighbours (see SimilarityIndex) as raw documents
+        with their scores, best first; None if not computed for this id.
+        """
+        entry = await UniversitySimilarity.get(university_id)
+        if entry is None:
+            return None
+        neighbour_ids = [PydanticObjectId(n.university_id) for n in entry.neighbours[:limit]]
+        found = await UniversityService.get_universities_by_ids(neighbour_ids, raw=True)
+        return [
+            {"university": found[neighbour_id], "score": neighbour.score}
+            for neighbour_id, neighbour in zip(neighbour_ids, entry.neighbours)
+            if neighbour_id in found
+        ]
+
     @staticmethod
     async def get_all_universities(
         skip: int = 0,
@@ -23,9 +174,90 @@ class UniversityService:
         specialty: Optional[str] = None,
         min_score: Optional[float] = None,
         sort_by: str = "name",
-        sort_order: int = 1
+        sort_order: int = 1,
+        ranges: Optional[RangeFilters] = None,
+        near: Optional[GeoFilter] = None,
+        raw: bool = False
+    ) -> tuple[List[UniversityItem], int]:
+        """
+        `near` restricts to universities within the radius and allows
+        `sort_by="distance"`; it is always answered by Mongo's `$geoNear`.
+        """
+        params = dict(
+            skip=skip,
+            limit=limit,
+            country=country,
+            specialty=specialty,
+            min_score=min_score,
+            ranges=ranges,
+            sort_by=sort_by,
+            sort_order=sort_order,
+            raw=raw
+        )
+        if near is not None:
+            return await _catalog_flight.do(
+                make_key("universities.near", near=near, **params),
+                lambda: UniversityService._get_universities_near(near=near, **params)
+            )
+
+        if catalog_snapshot.ready:
+            result = catalog_snapshot.index.list_universities(**params)
+            if result is not None:
+                return result
+
+        return await _catalog_flight.do(
+            make_key("universities.list", **params),
+            lambda: UniversityService._get_all_universities(**params)
+        )
+
+    @staticmethod
+    async def get_recommendation_candidates(
+        limit: int,
+        country: Optional[str] = None,
+        specialty: Optional[str] = None,
+        min_score: Optional[float] = None
     ) -> tuple[List[University], int]:
-        query_filters = []
+        """
+        Universities for the recommendation engine to score, and how many match.
+        From the snapshot this is the whole filtered set; from Mongo it is the
+        `limit` best ranked, then unranked ones if fewer are ranked, so the cut
+        keeps the engine's strongest sortable signal instead of the first names.
+        """
+        if catalog_snapshot.ready:
+            index = catalog_snapshot.index
+            result = index.list_universities(
+                skip=0,
+                limit=len(index.records),
+                country=country,
+                specialty=specialty,
+                min_score=min_score,
+                sort_by="ranking",
+                sort_order=1
+            )
+            if result is not None:
+                return result
+
+        query_filters = UniversityService._list_filters(country, specialty, min_score, None)
+        total = await (University.find({"$and": query_filters}) if query_filters else University.find_all()).count()
+
+        universities = await University.find(
+            {"$and": query_filters + [{"ranking": {"$ne": None}}]}
+        ).sort("+ranking", "+_id").limit(limit).to_list()
+        if len(universities) < limit:
+            universities += await University.find(
+                {"$and": query_filters + [{"ranking": None}]}
+            ).sort("+_id").limit(limit - len(universities)).to_list()
+
+        return universities, total
+
+    @staticmethod
+    def _list_filters(
+        country: Optional[str],
+        specialty: Optional[str],
+        min_score: Optional[float],
+        ranges: Optional[RangeFilters]
+    ) -> List[Dict[str, Any]]:
+        query_filters = range_conditions(ranges)
 
         if country:
             query_filters.append({"country": {"$regex": country, "$options": "i"}})
@@ -36,6 +268,31 @@ class UniversityService:
         if min_score is not None:
             query_filters.append({"requirements.minimum_score": {"$lte": min_score}})
 
+        return query_filters
+
+    @staticmethod
+    async def _get_all_universities(
+        skip: int,
+        limit: int,
+        country: Optional[str],
+        specialty: Optional[str],
+        min_score: Optional[float],
+        ranges: Optional[RangeFilters],
+        sort_by: str,
+        sort_order: int,
+        raw: bool
+    ) -> tuple[List[UniversityItem], int]:
+        query_filters = UniversityService._list_filters(country, specialty, min_score, ranges)
+        sort_field = SORT_FIELDS.get(sort_by, "name")
+
+        if raw:
+            raw_query = {"$and": query_filters} if query_filters else {}
+            total = await university_reader.count(raw_query)
+            universities = await university_reader.find(
+                raw_query, sort=[(sort_field, sort_order)], skip=skip, limit=limit
+            )
+            return universities, total
+
         if query_filters:
             query = University.find({"$and": query_filters})
         else:
@@ -43,14 +300,6 @@ class UniversityService:
 
         total = await query.count()
 
-        sort_mapping = {
-            "name": "name",
-            "ranking": "ranking",
-            "tuition_fee": "tuition_fee_usd",
-            "acceptance_rate": "acceptance_rate"
-        }
-        sort_field = sort_mapping.get(sort_by, "name")
-
         if sort_order == -1:
             sort_query = f"-{sort_field}"
         else:
@@ -60,6 +309,177 @@ class UniversityService:
 
         return universities, total
 
+    @staticmethod
+    async def _get_universities_near(
+        near: GeoFilter,
+        skip: int,
+        limit: int,
+        country: Optional[str],
+        specialty: Optional[str],
+        min_score: Optional[float],
+        ranges: Optional[RangeFilters],
+        sort_by: str,
+        sort_order: int,
+        raw: bool
+    ) -> tuple[List[UniversityItem], int]:
+        """
+        One aggregation: `$geoNear` on the location_2dsphere index applies the
+        radius and the other filters (as its `query`), then a `$facet` sorts
+        and pages the matches and counts them in the same pass.
+        """
+        latitude, longitude, radius_km = near
+        query_filters = UniversityService._list_filters(country, specialty, min_score, ranges)
+        geo_near: Dict[str, Any] = {
+            "near": {"type": "Point", "coordinates": [longitude, latitude]},
+            "key": "location",
+            "spherical": True,
+            "distanceField": "distance_km",
+            "distanceMultiplier": 0.001,
+            "query": {"$and": query_filters} if query_filters else {}
+        }
+        if radius_km is not None:
+            geo_near["maxDistance"] = radius_km * 1000
+
+        sort_field = "distance_km" if sort_by == "distance" else SORT_FIELDS.get(sort_by, "name")
+        pipeline = [
+            {"$geoNear": geo_near},
+            {"$facet": {
+                "items": [
+                    {"$sort": {sort_field: sort_order}},
+                    {"$skip": skip},
+                    {"$limit": limit},
+                    {"$project": university_reader.projection}
+                ],
+                "total": [{"$count": "count"}]
+            }}
+        ]
+        result = await University.get_motor_collection().aggregate(pipeline).to_list(length=1)
+        docs, counted = result[0]["items"], result[0]["total"]
+        total = counted[0]["count"] if counted else 0
+
+        if raw:
+            return [university_reader.shape(doc) for doc in docs], total
+        return [University.model_validate(doc) for doc in docs], total
+
+    @staticmethod
+    async def scroll_universities(
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        country: Optional[str] = None,
+        specialty: Optional[str] = None,
+        min_score: Optional[float] = None,
+        sort_by: str = "name",
+        sort_order: int = 1,
+        ranges: Optional[RangeFilters] = None,
+        raw: bool = False
+    ) -> tuple[List[UniversityItem], Optional[str], Optional[int]]:
+        """
+        The filtered list keyset-paginated on (<sort field>, _id), for infinite
+        scrolling: each page starts after the cursor of the previous one, so
+        deep pages cost the same as the first and rows don't shift or repeat
+        when the catalog changes between pages. The total is only counted for
+        the first page (no cursor). Raises ValueError for malformed cursors.
+        """
+        after = decode_cursor(cursor) if cursor else None
+        params = dict(
+            limit=limit,
+            after=after,
+            country=country,
+            specialty=specialty,
+            min_score=min_score,
+            sort_by=sort_by,
+            sort_order=sort_order,
+            ranges=ranges,
+            raw=raw
+        )
+
+        if catalog_snapshot.ready:
+            result = catalog_snapshot.index.scroll_universities(**params)
+            if result is not None:
+                items, next_after, total = result
+                next_cursor = encode_cursor(*next_after) if next_after else None
+                return items, next_cursor, None if cursor else total
+
+        return await _catalog_flight.do(
+            make_key("universities.scroll", **params),
+            lambda: UniversityService._scroll_universities(**params)
+        )
+
+    @staticmethod
+    async def _scroll_universities(
+        limit: int,
+        after: Optional[Tuple[Any, PydanticObjectId]],
+        country: Optional[str],
+        specialty: Optional[str],
+        min_score: Optional[float],
+        sort_by: str,
+        sort_order: int,
+        ranges: Optional[RangeFilters],
+        raw: bool
+    ) -> tuple[List[UniversityItem], Optional[str], Optional[int]]:
+        query_filters = UniversityService._list_filters(country, specialty, min_score, ranges)
+        sort_field = SORT_FIELDS.get(sort_by, "name")
+        total = None
+        if after is None:
+            count_query = {"$and": query_filters} if query_filters else {}
+            total = await (university_reader.count(count_query) if raw else University.find(count_query).count())
+        else:
+            query_filters.append(_after_cursor(sort_field, after[0], after[1], sort_order))
+
+        query = {"$and": query_filters} if query_filters else {}
+        if raw:
+            universities = await university_reader.find(
+                query, sort=[(sort_field, sort_order), ("_id", sort_order)], limit=limit + 1
+            )
+        else:
+            direction = "+" if sort_order == 1 else "-"
+            universities = await University.find(query).sort(
+                f"{direction}{sort_field}", f"{direction}_id"
+            ).limit(limit + 1).to_list()
+
+        next_cursor = None
+        if len(universities) > limit:
+            universities = universities[:limit]
+            last = universities[-1]
+            if raw:
+                next_cursor = encode_cursor(last.get(sort_field), last["_id"])
+            else:
+                next_cursor = encode_cursor(getattr(last, sort_field), last.id)
+
+        return universities, next_cursor, total
+
+    @staticmethod
+    async def get_universities_by_specialty(
+        specialty_id: str,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        sort_by: str = "name",
+        sort_order: int = 1
+    ) -> tuple[List[University], Optional[str]]:
+        """
+        Universities whose `specialties` array holds `specialty_id`, keyset-paginated.
+        Served by the (specialties, <sort field>, _id) compound indexes.
+        """
+        sort_field = SORT_FIELDS.get(sort_by, "name")
+        query_filters: List[Dict[str, Any]] = [{"specialties": specialty_id}]
+
+        if cursor:
+            value, last_id = decode_cursor(cursor)
+            query_filters.append(_after_cursor(sort_field, value, last_id, sort_order))
+
+        direction = "+" if sort_order == 1 else "-"
+        universities = await University.find({"$and": query_filters}).sort(
+            f"{direction}{sort_field}", f"{direction}_id"
+        ).limit(limit + 1).to_list()
+
+        next_cursor = None
+        if len(universities) > limit:
+            universities = universities[:limit]
+            last = universities[-1]
+            next_cursor = encode_cursor(getattr(last, sort_field), last.id)
+
+        return universities, next_cursor
+
     @staticmethod
     async def update_university(
         university_id: PydanticObjectId,
@@ -69,7 +489,10 @@ class UniversityService:
         if not university:
             return None
 
+        university_data = with_location(university_data, university)
         await university.set(university_data)
+        await invalidation_bus.notify("universities", "update", university.id, list(university_data))
+        await change_log.record("universities", "upsert", [university.id])
         return university
 
     @staticmethod
@@ -79,17 +502,32 @@ class UniversityService:
             return False
 
         await university.delete()
+        await invalidation_bus.notify("universities", "delete", university_id)
+        await change_log.record("universities", "delete", [university_id])
         return True
 
     @staticmethod
-    async def search_universities(query: str) -> List[University]:
-        return await University.find(
-            {"$or": [
-                {"name": {"$regex": query, "$options": "i"}},
-                {"description": {"$regex": query, "$options": "i"}},
-                {"city": {"$regex": query, "$options": "i"}}
-            ]}
-        ).to_list()
+    async def search_universities(query: str, raw: bool = False) -> List[UniversityItem]:
+        if catalog_snapshot.ready:
+            result = catalog_snapshot.index.search_universities(query, raw=raw)
+            if result is not None:
+                return result
+
+        return await _catalog_flight.do(
+            make_key("universities.search", query=query, raw=raw),
+            lambda: UniversityService._search_universities(query, raw)
+        )
+
+    @staticmethod
+    async def _search_universities(query: str, raw: bool) -> List[UniversityItem]:
+        search = {"$or": [
+            {"name": {"$regex": query, "$options": "i"}},
+            {"description": {"$regex": query, "$options": "i"}},
+            {"city": {"$regex": query, "$options": "i"}}
+        ]}
+        if raw:
+            return await university_reader.find(search)
+        return await University.find(search).to_list()
 
     @staticmethod
     async def add_specialty_to_university(
@@ -120,6 +558,13 @@ class UniversityService:
             university.requirements.append(req)
 
         await university.save()
+        await invalidation_bus.notify(
+            "universities",
+            "update",
+            university.id,
+            ["specialties", "specialty_names", "requirements"]
+        )
+        await change_log.record("universities", "upsert", [university.id])
         return university
 
     @staticmethod
@@ -141,4 +586,11 @@ class UniversityService:
         ]
 
         await university.save()
+        await invalidation_bus.notify(
+            "universities",
+            "update",
+            university.id,
+            ["specialties", "specialty_names", "requirements"]
+        )
+        await change_log.record("universities", "upsert", [university.id])
         return university
@@ -0,0 +1,47 @@
+"""
+Fill in `location` for universities imported before near-me search existed,
+or through a tool that bypasses the API (Mongo Express, mongoimport).
+
+Usage: python backfill_locations.py
+
+Locations come from the offline gazetteer in app/data/cities.json; cities it
+doesn't know are listed so they can be added there. Each updated university is
+recorded in the change log for delta-sync clients. Workers that cache the
+catalog pick the change up through change streams; without a replica set,
+restart the API afterwards.
+"""
+import asyncio
+from pymongo import UpdateOne
+from app.core.gazetteer import locate
+from app.db.mongodb import close_mongo_connection, connect_to_mongo
+from app.models.university import University
+from app.services.change_log import change_log
+
+
+async def backfill_locations():
+    await connect_to_mongo()
+    try:
+        collection = University.get_motor_collection()
+        updates = []
+        located = []
+        unknown = set()
+        async for doc in collection.find({"location": None}, {"city": 1, "country": 1}):
+            location = locate(doc.get("city"), doc.get("country"))
+            if location is None:
+                unknown.add((doc.get("city"), doc.get("country")))
+                continue
+            updates.append(UpdateOne({"_id": doc["_id"]}, {"$set": {"location": location}}))
+            located.append(doc["_id"])
+
+        if updates:
+            await collection.bulk_write(updates, ordered=False)
+            await change_log.record("universities", "upsert", located)
+        print(f"Located {len(updates)} universities")
+        for city, country in sorted(unknown, key=str):
+            print(f"  ! Not in the gazetteer: {city}, {country}")
+    finally:
+        await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    asyncio.run(backfill_locations())
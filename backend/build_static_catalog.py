@@ -0,0 +1,30 @@
+"""
+Render the static catalog: the default university list pages, every
+university's detail and the specialty list, as content-hashed JSON files with
+zstd, br and gzip variants, plus manifest.json mapping each page to its file.
+
+Usage: python build_static_catalog.py
+
+Writes to STATIC_CATALOG_DIR (see .env.example); only files whose content
+changed since the last build are written, and files replaced more than
+STATIC_CATALOG_RETENTION_SECONDS ago are deleted. Sync the directory to the
+CDN afterwards. With STATIC_CATALOG_ENABLED the API keeps the same directory
+current on writes by itself.
+"""
+import asyncio
+from app.db.mongodb import close_mongo_connection, connect_to_mongo
+from app.services.static_catalog import static_catalog
+
+
+async def build_static_catalog():
+    await connect_to_mongo()
+    try:
+        result = await static_catalog.build()
+        print(f"Rendered {result['rendered']} pages into {static_catalog.root}/ in {result['seconds']}s: "
+              f"{result['written']} written, {result['deleted']} old files deleted")
+    finally:
+        await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    asyncio.run(build_static_catalog())
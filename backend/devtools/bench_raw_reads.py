@@ -0,0 +1,96 @@
+"""
+CPU cost of a university list request, Beanie documents versus raw read mode.
+
+Usage:
+    python -m devtools.bench_raw_reads [--limit 100] [--rounds 200]
+
+Runs against MONGODB_URL / DATABASE_NAME (seed it first) with the catalog
+snapshot off. Two measurements, both in CPU time (time.process_time) so
+network and server time don't count:
+
+  hydration   the same fetched page turned into a response body: model
+              validation + LeanSerializer versus RawReader.shape + to_json
+  request     UniversityService.get_all_universities plus serialization,
+              end to end, raw=False versus raw=True
+"""
+import argparse
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List
+from pydantic_core import to_json
+from app.core.responses import LeanSerializer
+from app.db.mongodb import close_mongo_connection, connect_to_mongo
+from app.db.raw_reads import university_reader
+from app.models.university import University
+from app.services.university_service import UniversityService
+
+_list_json = LeanSerializer(List[University])
+
+
+def report(label: str, seconds: float, rounds: int, baseline: float = None) -> float:
+    per_call = seconds / rounds * 1000
+    speedup = f"  {baseline / per_call:.1f}x" if baseline else ""
+    print(f"{label:<24} {per_call:8.3f} ms CPU{speedup}")
+    return per_call
+
+
+def hydrate_models(docs: List[Dict[str, Any]]) -> bytes:
+    return _list_json.dump([University.model_validate(doc) for doc in docs])
+
+
+def hydrate_raw(docs: List[Dict[str, Any]]) -> bytes:
+    return to_json([university_reader.shape(doc) for doc in docs])
+
+
+def run_hydration(docs: List[Dict[str, Any]], rounds: int) -> None:
+    print(f"hydration of a {len(docs)}-item page")
+    timings = []
+    for fn in (hydrate_models, hydrate_raw):
+        start = time.process_time()
+        for _ in range(rounds):
+            fn(docs)
+        timings.append(time.process_time() - start)
+    baseline = report("  documents", timings[0], rounds)
+    report("  raw", timings[1], rounds, baseline)
+
+
+async def cpu_time(fn: Callable[[], Awaitable[Any]], rounds: int) -> float:
+    start = time.process_time()
+    for _ in range(rounds):
+        await fn()
+    return time.process_time() - start
+
+
+async def run_request(limit: int, rounds: int) -> None:
+    async def documents():
+        items, _ = await UniversityService.get_all_universities(limit=limit, sort_by="ranking")
+        return _list_json.dump(items)
+
+    async def raw():
+        items, _ = await UniversityService.get_all_universities(limit=limit, sort_by="ranking", raw=True)
+        return to_json(items)
+
+    print(f"list request, limit={limit}")
+    baseline = report("  documents", await cpu_time(documents, rounds), rounds)
+    report("  raw", await cpu_time(raw, rounds), rounds, baseline)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    await connect_to_mongo()
+    try:
+        docs = await University.get_motor_collection().find().limit(args.limit).to_list(length=None)
+        if not docs:
+            raise SystemExit("[FAIL] universities collection is empty")
+        run_hydration(docs, args.rounds)
+        await run_request(args.limit, args.rounds)
+    finally:
+        await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
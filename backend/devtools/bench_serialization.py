@@ -0,0 +1,110 @@
+"""
+Serialization cost of one university list page, FastAPI's response_model path
+versus LeanSerializer.
+
+Usage:
+    python -m devtools.bench_serialization [--items 100] [--rounds 200]
+
+Needs MongoDB only for Beanie initialization; the page is built in memory.
+The "response_model" column is what a route returning PaginatedResponse used
+to cost: dump to dicts, validate against the response model, encode with
+jsonable_encoder and json.dumps. The "lean" column is LeanSerializer.
+"""
+import argparse
+import asyncio
+import time
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute, serialize_response
+from app.core.responses import LeanSerializer
+from app.db.mongodb import close_mongo_connection, connect_to_mongo
+from app.models.university import University, UniversityRequirements
+from app.routers.universities import PaginatedResponse, router
+
+_page_json = LeanSerializer(PaginatedResponse)
+
+
+def build_page(items: int) -> PaginatedResponse:
+    universities = [
+        University(
+            name=f"University {i}",
+            country="Kazakhstan",
+            city="Almaty",
+            description="A long enough description to look like real catalog data. " * 3,
+            website=f"https://university-{i}.example.edu",
+            ranking=i + 1,
+            specialties=[f"{j:024x}" for j in range(5)],
+            specialty_names=[f"Specialty {j}" for j in range(5)],
+            requirements=[
+                UniversityRequirements(
+                    specialty_id=f"{j:024x}",
+                    specialty_name=f"Specialty {j}",
+                    minimum_score=100 + j,
+                    exams=["UNT", "IELTS"]
+                )
+                for j in range(5)
+            ],
+            tuition_fee_usd=12000.0 + i,
+            student_count=10000 + i,
+            acceptance_rate=35.5
+        )
+        for i in range(items)
+    ]
+    return PaginatedResponse.model_construct(
+        items=universities, total=items, page=1, page_size=items, total_pages=1
+    )
+
+
+def list_route() -> APIRoute:
+    return next(r for r in router.routes if isinstance(r, APIRoute) and r.path == "/universities/"
+                and "GET" in r.methods)
+
+
+async def via_response_model(route: APIRoute, page: PaginatedResponse) -> bytes:
+    content = await serialize_response(
+        field=route.response_field,
+        response_content=page,
+        is_coroutine=True
+    )
+    return JSONResponse(content).body
+
+
+async def run(items: int, rounds: int) -> None:
+    page = build_page(items)
+    route = list_route()
+
+    before = await via_response_model(route, page)
+    after = _page_json.response(page).body
+    if before != after:
+        raise SystemExit("[FAIL] lean output differs from the response_model output")
+
+    async def measure(label, fn):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            await fn()
+        per_page = (time.perf_counter() - start) / rounds * 1000
+        print(f"{label:<16} {per_page:8.3f} ms per {items}-item page")
+        return per_page
+
+    async def lean():
+        return _page_json.response(page).body
+
+    slow = await measure("response_model", lambda: via_response_model(route, page))
+    fast = await measure("lean", lean)
+    print(f"[OK] {slow / fast:.1f}x faster, {len(after)} bytes per page")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    await connect_to_mongo()
+    try:
+        await run(args.items, args.rounds)
+    finally:
+        await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,101 @@
+"""
+Cold-start time: importing the app, and launching the server until its first 200.
+
+Usage:
+    python -m devtools.bench_startup [--runs 5] [--path /health]
+                                     [--max-import-ms 0] [--max-ready-ms 0]
+
+  import      `import app.main` in a fresh interpreter, also listing heavy
+              optional packages it pulled in (openai, httpx should not be:
+              the AI stack loads on first use)
+  first 200   `python -m app.server` with one worker on a spare port, from
+              process start until GET `--path` answers 200
+
+Each is the median of `--runs` fresh processes. With `--max-import-ms` or
+`--max-ready-ms` set, exits 1 when the median is over budget, so it can run
+in CI. Point MONGODB_URL at a reachable database to include the startup
+queries; without one the app starts in demo mode after the connect timeout.
+"""
+import argparse
+import json
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import time
+from typing import List, Tuple
+import httpx
+from devtools.load_test import free_port
+
+# Packages that only specific features need; none should load on import
+LAZY_MODULES = ("openai", "httpx")
+
+IMPORT_PROBE = f"""
+import json, sys, time
+started = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - started
+print(json.dumps({{"seconds": elapsed, "loaded": [m for m in {LAZY_MODULES!r} if m in sys.modules]}}))
+"""
+
+
+def measure_import() -> Tuple[float, List[str]]:
+    output = subprocess.run([sys.executable, "-c", IMPORT_PROBE], capture_output=True, text=True, check=True)
+    result = json.loads(output.stdout.strip().splitlines()[-1])
+    return result["seconds"], result["loaded"]
+
+
+def measure_first_200(path: str, timeout: float = 60.0) -> float:
+    port = free_port()
+    env = {**os.environ, "SERVER_WORKERS": "1", "SERVER_PORT": str(port), "SERVER_HOST": "127.0.0.1"}
+    started = time.perf_counter()
+    server = subprocess.Popen([sys.executable, "-m", "app.server"], env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=5.0) as client:
+            while time.perf_counter() - started < timeout:
+                try:
+                    if client.get(path).status_code == 200:
+                        return time.perf_counter() - started
+                except httpx.TransportError:
+                    pass
+                time.sleep(0.01)
+        raise RuntimeError(f"server did not answer 200 on {path} within {timeout}s")
+    finally:
+        server.send_signal(signal.SIGTERM)
+        try:
+            server.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+
+def check(label: str, median_ms: float, budget_ms: float) -> bool:
+    within = not budget_ms or median_ms <= budget_ms
+    budget = f" (budget {budget_ms:.0f} ms{'' if within else ', EXCEEDED'})" if budget_ms else ""
+    print(f"{label:<12} {median_ms:8.0f} ms median{budget}")
+    return within
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--path", default="/health")
+    parser.add_argument("--max-import-ms", type=float, default=0.0)
+    parser.add_argument("--max-ready-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    imports = [measure_import() for _ in range(args.runs)]
+    loaded = sorted({module for _, modules in imports for module in modules})
+    import_ms = statistics.median(seconds for seconds, _ in imports) * 1000
+    ready_ms = statistics.median(measure_first_200(args.path) for _ in range(args.runs)) * 1000
+
+    ok = check("import", import_ms, args.max_import_ms)
+    ok = check("first 200", ready_ms, args.max_ready_ms) and ok
+    if loaded:
+        print(f"[WARNING] Loaded at import although only needed on first use: {', '.join(loaded)}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
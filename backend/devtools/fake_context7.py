@@ -0,0 +1,84 @@
+"""
+In-memory stand-in for the Context7 memory API.
+
+Usage:
+    uvicorn devtools.fake_context7:app --port 8200
+
+Then run the backend with CONTEXT7_BASE_URL=http://localhost:8200 and any CONTEXT7_API_KEY.
+GET /stats reports how many requests and records arrived, to check batching and connection reuse.
+
+Environment knobs, for batch writes:
+    FAKE_CONTEXT7_LATENCY       seconds to sleep before answering (default 0)
+    FAKE_CONTEXT7_FAILURE_RATE  probability of answering 503 without storing the batch (default 0)
+"""
+import asyncio
+import os
+import random
+from collections import defaultdict
+from typing import Any, Dict, List
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+app = FastAPI(title="Fake Context7")
+
+LATENCY = float(os.getenv("FAKE_CONTEXT7_LATENCY", "0"))
+FAILURE_RATE = float(os.getenv("FAKE_CONTEXT7_FAILURE_RATE", "0"))
+
+contexts: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+stats = {"requests": 0, "batches": 0, "records": 0, "clients": set()}
+
+
+@app.middleware("http")
+async def count_requests(request: Request, call_next):
+    stats["requests"] += 1
+    if request.client:
+        # One entry per client port: a pooled client keeps this small
+        stats["clients"].add(f"{request.client.host}:{request.client.port}")
+    return await call_next(request)
+
+
+@app.post("/v1/context")
+async def store_context(record: Dict[str, Any]):
+    contexts[record["session_id"]].append(record)
+    stats["records"] += 1
+    return {"stored": True}
+
+
+@app.post("/v1/context/batch")
+async def store_context_batch(body: Dict[str, Any]):
+    await asyncio.sleep(LATENCY)
+    if random.random() < FAILURE_RATE:
+        return JSONResponse(status_code=503, content={"detail": "Injected failure"})
+
+    records = body.get("contexts", [])
+    for record in records:
+        contexts[record["session_id"]].append(record)
+    stats["batches"] += 1
+    stats["records"] += len(records)
+    return {"stored": len(records)}
+
+
+@app.post("/v1/context/search")
+async def search_context(body: Dict[str, Any]):
+    query = body.get("query", "").lower()
+    matches = [
+        record for record in contexts.get(body.get("session_id"), [])
+        if query in str(record.get("data", "")).lower()
+    ]
+    return {"results": matches[:body.get("limit", 5)]}
+
+
+@app.get("/v1/context/{session_id}")
+async def retrieve_context(session_id: str, limit: int = 10):
+    return {"contexts": contexts.get(session_id, [])[-limit:]}
+
+
+@app.delete("/v1/context/{session_id}")
+async def clear_context(session_id: str):
+    contexts.pop(session_id, None)
+    return {"cleared": True}
+
+
+@app.get("/stats")
+async def get_stats():
+    return {**stats, "clients": len(stats["clients"])}
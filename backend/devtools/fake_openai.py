@@ -0,0 +1,72 @@
+"""
+Minimal OpenAI-compatible server for exercising the LLM gateway locally.
+
+Usage:
+    FAKE_OPENAI_LATENCY=2 FAKE_OPENAI_FAILURE_RATE=0.3 \\
+        uvicorn devtools.fake_openai:app --port 8100
+
+Then run the backend with OPENAI_BASE_URL=http://localhost:8100/v1 and any OPENAI_API_KEY.
+
+Environment knobs:
+    FAKE_OPENAI_LATENCY       seconds to sleep before answering (default 0.2)
+    FAKE_OPENAI_FAILURE_RATE  probability of answering with FAKE_OPENAI_FAILURE_STATUS (default 0)
+    FAKE_OPENAI_FAILURE_STATUS  HTTP status used for failures, e.g. 500 or 429 (default 500)
+"""
+import asyncio
+import os
+import random
+import time
+import uuid
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+app = FastAPI(title="Fake OpenAI")
+
+LATENCY = float(os.getenv("FAKE_OPENAI_LATENCY", "0.2"))
+FAILURE_RATE = float(os.getenv("FAKE_OPENAI_FAILURE_RATE", "0"))
+FAILURE_STATUS = int(os.getenv("FAKE_OPENAI_FAILURE_STATUS", "500"))
+
+stats = {"requests": 0, "failures": 0, "in_flight": 0, "max_in_flight": 0}
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    stats["requests"] += 1
+    stats["in_flight"] += 1
+    stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+    try:
+        await asyncio.sleep(LATENCY)
+
+        if random.random() < FAILURE_RATE:
+            stats["failures"] += 1
+            headers = {"Retry-After": "1"} if FAILURE_STATUS == 429 else None
+            return JSONResponse(
+                status_code=FAILURE_STATUS,
+                content={"error": {"message": "Injected failure", "type": "server_error"}},
+                headers=headers
+            )
+
+        last_message = body.get("messages", [{}])[-1].get("content", "")
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "fake-model"),
+            "choices": [{
+                "index": 0,
+                "message": {
+                    "role": "assistant",
+                    "content": f"[fake] {len(last_message)} characters received"
+                },
+                "finish_reason": "stop"
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+        }
+    finally:
+        stats["in_flight"] -= 1
+
+
+@app.get("/stats")
+async def get_stats():
+    return stats
@@ -0,0 +1,119 @@
+"""
+Requests per second of the production server at different worker counts.
+
+Usage:
+    python -m devtools.load_test [--workers 1,2,4] [--path /api/universities/]
+                                 [--concurrency 64] [--duration 10]
+
+For each worker count, starts `python -m app.server` on a spare port with
+SERVER_WORKERS set, waits for /health, drives it with `--concurrency`
+keep-alive connections for `--duration` seconds, then stops it with SIGTERM.
+Point MONGODB_URL at a seeded database for the catalog paths; /health works
+without one. On a machine with N cores, throughput should grow roughly
+linearly up to N workers.
+"""
+import argparse
+import asyncio
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from typing import Dict, List
+import httpx
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def wait_ready(base_url: str, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get("/health")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"server at {base_url} did not become ready")
+
+
+async def drive(base_url: str, path: str, concurrency: int, duration: float) -> Dict[str, float]:
+    latencies: List[float] = []
+    errors = 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0) as client:
+        stop_at = time.monotonic() + duration
+
+        async def user() -> None:
+            nonlocal errors
+            while time.monotonic() < stop_at:
+                start = time.perf_counter()
+                try:
+                    response = await client.get(path)
+                    if response.status_code >= 400:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - start)
+
+        started = time.monotonic()
+        await asyncio.gather(*(user() for _ in range(concurrency)))
+        elapsed = time.monotonic() - started
+
+    latencies.sort()
+    count = len(latencies)
+    return {
+        "rps": count / elapsed,
+        "p50_ms": latencies[count // 2] * 1000 if count else 0.0,
+        "p99_ms": latencies[min(count - 1, int(count * 0.99))] * 1000 if count else 0.0,
+        "errors": errors
+    }
+
+
+async def run_for(workers: int, args: argparse.Namespace) -> Dict[str, float]:
+    port = free_port()
+    env = {**os.environ, "SERVER_WORKERS": str(workers), "SERVER_PORT": str(port), "SERVER_HOST": "127.0.0.1"}
+    server = subprocess.Popen([sys.executable, "-m", "app.server"], env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        await wait_ready(base_url)
+        # Warm up every worker before measuring
+        await drive(base_url, args.path, args.concurrency, 1.0)
+        return await drive(base_url, args.path, args.concurrency, args.duration)
+    finally:
+        server.send_signal(signal.SIGTERM)
+        try:
+            server.wait(timeout=60)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", default=f"1,{os.cpu_count() or 1}")
+    parser.add_argument("--path", default="/api/universities/")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=10.0)
+    args = parser.parse_args()
+
+    counts = sorted({int(n) for n in args.workers.split(",")})
+    print(f"{os.cpu_count()} CPU cores, GET {args.path}, {args.concurrency} connections, {args.duration}s")
+    print(f"{'workers':>7} {'req/s':>10} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7} {'scaling':>8}")
+    baseline = None
+    for workers in counts:
+        result = await run_for(workers, args)
+        baseline = baseline or result["rps"]
+        print(f"{workers:>7} {result['rps']:>10.0f} {result['p50_ms']:>8.1f} {result['p99_ms']:>8.1f} "
+              f"{result['errors']:>7} {result['rps'] / baseline:>7.2f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -6,9 +6,14 @@ Usage: python import_data.py
 
 import json
 import os
+import sys
 from pymongo import MongoClient
 from pymongo.errors import ConnectionFailure
 
+# Offline city gazetteer from the backend package, for university locations
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.core.gazetteer import locate  # noqa: E402
+
 # MongoDB connection settings
 MONGODB_URL = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
 DATABASE_NAME = os.getenv("DATABASE_NAME", "university_catalog")
@@ -70,6 +75,10 @@ def import_data():
     print("\n[2/2] Importing universities...")
     try:
         universities = load_json_file('universities.json')
+        for uni in universities:
+            uni.setdefault('location', locate(uni.get('city'), uni.get('country')))
+            if uni['location'] is None:
+                print(f"  ! {uni.get('city')} is not in app/data/cities.json, no location for near-me search")
 
         # Clear existing data (optional - comment out to preserve data)
         db.universities.delete_many({})
@@ -9,6 +9,7 @@ from beanie import init_beanie
 from app.models.university import University, UniversityRequirements
 from app.models.specialty import Specialty
 from app.core.config import settings
+from app.core.gazetteer import locate
 
 
 async def clear_collections():
@@ -122,10 +123,13 @@ async def load_universities(specialty_map):
             requirements=requirements,
             tuition_fee_usd=uni_data.get('tuition_fee_usd'),
             student_count=uni_data.get('student_count'),
-            acceptance_rate=uni_data.get('acceptance_rate')
+            acceptance_rate=uni_data.get('acceptance_rate'),
+            location=locate(uni_data['city'], uni_data['country'])
         )
         await university.insert()
         print(f"  ✓ Added university: {uni_data['name']} ({uni_data['country']})")
+        if university.location is None:
+            print(f"    ! {uni_data['city']} is not in app/data/cities.json, no location for near-me search")
 
     print(f"Total universities loaded: {len(universities_data)}")
 
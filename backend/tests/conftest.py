@@ -0,0 +1,58 @@
+import os
+
+# Settings are read on import; the tests never reach a real provider or database
+os.environ.setdefault("OPENAI_API_KEY", "test")
+
+import pytest  # noqa: E402
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def mock_db():
+    """Beanie on an in-memory mongomock database, in place of MongoDB."""
+    from beanie import init_beanie
+    from mongomock_motor import AsyncMongoMockClient
+    from app.core.config import settings
+    from app.db.mongodb import DOCUMENT_MODELS, db
+
+    client = AsyncMongoMockClient()
+    previous = db.client
+    db.client = client
+    await init_beanie(database=client[settings.database_name], document_models=DOCUMENT_MODELS)
+    yield client[settings.database_name]
+    db.client = previous
+
+
+@pytest.fixture
+async def mongod_db():
+    """Beanie on a scratch database of the real mongod at MONGODB_URL; skipped without one."""
+    url = os.environ.get("MONGODB_URL")
+    if not url:
+        pytest.skip("needs a mongod: set MONGODB_URL")
+
+    from beanie import init_beanie
+    from motor.motor_asyncio import AsyncIOMotorClient
+    from pymongo.errors import PyMongoError
+    from app.core.config import settings
+    from app.db.mongodb import DOCUMENT_MODELS, db
+
+    client = AsyncIOMotorClient(url, serverSelectionTimeoutMS=2000)
+    try:
+        await client.admin.command("ping")
+    except PyMongoError as e:
+        client.close()
+        pytest.skip(f"no mongod at MONGODB_URL: {str(e)[:100]}")
+
+    name = f"{settings.database_name}_test"
+    previous = db.client
+    db.client = client
+    await client.drop_database(name)
+    await init_beanie(database=client[name], document_models=DOCUMENT_MODELS)
+    yield client[name]
+    db.client = previous
+    await client.drop_database(name)
+    client.close()
@@ -0,0 +1,94 @@
+import asyncio
+import pytest
+from app.ai import batch_jobs
+from app.ai.batch_jobs import BatchJobManager
+from app.models.recommendation_job import RecommendationJob, StudentProfile
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def agent(monkeypatch):
+    """Recommendations that finish only once `release` is set."""
+
+    class Agent:
+        release = asyncio.Event()
+        calls = 0
+
+        async def recommend_from_candidates(self, universities, total, **kwargs):
+            Agent.calls += 1
+            await Agent.release.wait()
+            return {"success": True, "recommendations": []}
+
+    monkeypatch.setattr(batch_jobs, "ai_agent", Agent())
+    return Agent
+
+
+def manager(name: str) -> BatchJobManager:
+    manager = BatchJobManager()
+    manager.worker_id = name
+    manager.rescan_interval = 0.02
+    return manager
+
+
+async def wait_for_status(job_id, status: str, timeout: float = 2.0) -> RecommendationJob:
+    async def poll():
+        while True:
+            job = await RecommendationJob.get(job_id)
+            if job.status == status:
+                return job
+            await asyncio.sleep(0.01)
+    return await asyncio.wait_for(poll(), timeout)
+
+
+def students(count: int):
+    return [StudentProfile(student_id=f"s{i}", query="computer science") for i in range(count)]
+
+
+async def test_stop_hands_running_job_to_next_process(mock_db, agent):
+    first = manager("first")
+    await first.start()
+    job = await first.submit(students(2))
+    await wait_for_status(job.id, "running")
+    await first.stop()
+
+    job = await RecommendationJob.get(job.id)
+    assert job.status == "queued"
+    assert job.worker_id is None
+
+    agent.release.set()
+    second = manager("second")
+    await second.start()
+    try:
+        job = await wait_for_status(job.id, "completed")
+    finally:
+        await second.stop()
+    assert job.completed == 2
+    assert job.worker_id == "second"
+
+
+async def test_rescan_picks_up_jobs_queued_after_start(mock_db, agent):
+    agent.release.set()
+    running = manager("running")
+    await running.start()
+    try:
+        # Queued by another process, e.g. one that released it on shutdown
+        job = RecommendationJob(students=students(1), results=[None], total=1)
+        await job.insert()
+        job = await wait_for_status(job.id, "completed")
+    finally:
+        await running.stop()
+    assert job.completed == 1
+
+
+async def test_rescan_does_not_queue_a_job_twice(mock_db, agent):
+    idle = manager("idle")
+    idle.worker_count = 0
+    await idle.start()
+    try:
+        job = await idle.submit(students(1))
+        await asyncio.sleep(0.1)
+        assert idle._queue.qsize() == 1
+        assert job.id in idle._enqueued
+    finally:
+        await idle.stop()
@@ -0,0 +1,69 @@
+import pytest
+from app.db.invalidation import invalidation_bus
+from app.models.specialty import Specialty
+from app.models.university import University
+from app.services.catalog_snapshot import catalog_snapshot
+from app.services.specialty_service import SpecialtyService
+from app.services.university_service import UniversityService
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def snapshot(mock_db, monkeypatch):
+    """The snapshot over a seeded catalog, reloaded only when a test says so."""
+    monkeypatch.setattr(invalidation_bus, "_subscribers", [])
+    monkeypatch.setattr(invalidation_bus, "_write_handlers", [])
+    monkeypatch.setattr(catalog_snapshot, "enabled", True)
+    monkeypatch.setattr(catalog_snapshot, "debounce", 60.0)
+    await Specialty(name="Computer Science").insert()
+    await University(name="Old Name", country="Germany", city="Berlin").insert()
+    await catalog_snapshot.start()
+    yield catalog_snapshot
+    await catalog_snapshot.stop()
+    catalog_snapshot.index = None
+    catalog_snapshot._pending, catalog_snapshot._pending_resets = {}, {}
+
+
+async def test_university_update_is_read_back_before_the_rebuild(snapshot):
+    university = snapshot.index.records[0].document
+
+    await UniversityService.update_university(university.id, {"name": "New Name"})
+
+    assert snapshot.index.by_id[university.id].document.name == "Old Name"
+    assert (await UniversityService.get_university(university.id)).name == "New Name"
+    found = await UniversityService.get_universities_by_ids([university.id], raw=True)
+    assert found[university.id]["name"] == "New Name"
+
+
+async def test_deleted_university_is_gone_before_the_rebuild(snapshot):
+    university = snapshot.index.records[0].document
+
+    await UniversityService.delete_university(university.id)
+
+    assert await UniversityService.get_university(university.id) is None
+    assert await UniversityService.get_universities_by_ids([university.id]) == {}
+
+
+async def test_specialty_update_is_read_back_before_the_rebuild(snapshot):
+    specialty = snapshot.index.specialties[0]
+
+    await SpecialtyService.update_specialty(specialty.id, {"description": "Algorithms"})
+
+    assert (await SpecialtyService.get_specialty(specialty.id)).description == "Algorithms"
+
+
+async def test_rebuild_serves_the_change_from_the_snapshot_again(snapshot, monkeypatch):
+    university = snapshot.index.records[0].document
+    await UniversityService.update_university(university.id, {"name": "New Name"})
+    assert not snapshot.is_current("universities", university.id)
+
+    await snapshot.reload()
+
+    assert snapshot.is_current("universities", university.id)
+
+    async def no_mongo(*args, **kwargs):
+        raise AssertionError("read from MongoDB")
+
+    monkeypatch.setattr(University, "get", no_mongo)
+    assert (await UniversityService.get_university(university.id)).name == "New Name"
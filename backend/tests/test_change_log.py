@@ -0,0 +1,68 @@
+import pytest
+from app.models.catalog_change import CatalogChange
+from app.models.university import University
+from app.services.change_log import ChangeLog
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def log(mock_db):
+    return ChangeLog()
+
+
+async def university(name: str) -> University:
+    document = University(name=name, country="Germany", city="Berlin")
+    await document.insert()
+    return document
+
+
+async def test_pages_through_changes(log):
+    log.page_size = 2
+    documents = [await university(f"U{i}") for i in range(3)]
+    for document in documents:
+        await log.record("universities", "upsert", [document.id])
+
+    first = await log.changes_since(0)
+    assert [c["id"] for c in first["changes"]] == [str(d.id) for d in documents[:2]]
+    assert first["has_more"] is True
+
+    second = await log.changes_since(first["next_since"])
+    assert [c["id"] for c in second["changes"]] == [str(documents[2].id)]
+    assert second["has_more"] is False
+    assert second["changes"][0]["document"]["name"] == "U2"
+
+
+async def test_sequence_collision_forces_resync(log):
+    document = await university("U")
+    # An entry already holds the next sequence number, as after a counter reset
+    await CatalogChange(seq=1, collection="universities", document_id=str(document.id), operation="upsert").insert()
+
+    await log.record("universities", "upsert", [document.id])
+
+    page = await log.changes_since(0)
+    assert page["resync_required"] is True
+
+
+async def test_unsettled_gap_ends_page_without_has_more(log):
+    document = await university("U")
+    first = await log._allocate(2)
+    # seq `first` is still being inserted by another request; `first + 1` has landed
+    await CatalogChange(
+        seq=first + 1, collection="universities", document_id=str(document.id), operation="upsert"
+    ).insert()
+
+    page = await log.changes_since(0)
+    assert page["changes"] == []
+    assert page["next_since"] == 0
+    assert page["has_more"] is False
+
+
+async def test_trailing_in_flight_entry_does_not_report_more(log):
+    document = await university("U")
+    await log.record("universities", "upsert", [document.id])
+    await log._allocate(1)
+
+    page = await log.changes_since(0)
+    assert len(page["changes"]) == 1
+    assert page["has_more"] is False
@@ -0,0 +1,113 @@
+import asyncio
+from collections import defaultdict
+import httpx
+import pytest
+from app.ai.context7_client import Context7Client
+from devtools import fake_context7
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def fake(monkeypatch):
+    """devtools/fake_context7 served in-process, empty, answering at once and successfully by default."""
+    monkeypatch.setattr(fake_context7, "LATENCY", 0.0)
+    monkeypatch.setattr(fake_context7, "FAILURE_RATE", 0.0)
+    monkeypatch.setattr(fake_context7, "contexts", defaultdict(list))
+    monkeypatch.setattr(fake_context7, "stats", {"requests": 0, "batches": 0, "records": 0, "clients": set()})
+    return fake_context7
+
+
+@pytest.fixture
+async def client(fake):
+    client = Context7Client()
+    client.enabled = True
+    client.batch_size = 3
+    client.max_pending = 6
+    client._client = httpx.AsyncClient(transport=httpx.ASGITransport(app=fake.app), base_url="http://context7")
+    yield client
+    await client.close()
+
+
+def enqueue(client: Context7Client, numbers, session: str = "s1") -> None:
+    for number in numbers:
+        assert client.enqueue_context(session, {"n": number})
+
+
+def delivered(fake, session: str = "s1"):
+    return [record["data"]["n"] for record in fake.contexts[session]]
+
+
+async def in_flight(client: Context7Client) -> None:
+    while not client._sending:
+        await asyncio.sleep(0.001)
+
+
+async def test_store_context_flushes_full_batches(client, fake):
+    for number in range(4):
+        await client.store_context("s1", {"n": number})
+
+    assert fake.stats["batches"] == 1
+    assert delivered(fake) == [0, 1, 2]
+    assert len(client._pending) == 1
+
+
+async def test_periodic_flush_sends_a_partial_batch(client, fake):
+    client.flush_interval = 0.01
+    client._flusher = asyncio.create_task(client._flush_periodically())
+    enqueue(client, range(2))
+
+    await asyncio.sleep(0.1)
+
+    assert fake.stats["batches"] == 1
+    assert delivered(fake) == [0, 1]
+
+
+async def test_failed_batch_is_kept_for_the_next_flush(client, fake):
+    enqueue(client, range(5))
+    fake.FAILURE_RATE = 1.0
+    assert await client.flush() == 0
+    assert [record["data"]["n"] for record in client._pending] == [0, 1, 2, 3, 4]
+
+    fake.FAILURE_RATE = 0.0
+    assert await client.flush() == 5
+    assert delivered(fake) == [0, 1, 2, 3, 4]
+    assert fake.stats["batches"] == 2
+
+
+async def test_overflow_while_a_batch_is_in_flight_loses_nothing(client, fake):
+    fake.LATENCY = 0.05
+    enqueue(client, range(6))
+    flush = asyncio.create_task(client.flush())
+    await in_flight(client)
+
+    enqueue(client, range(6, 8))
+    await flush
+
+    assert delivered(fake) == list(range(8))
+
+
+async def test_failed_batch_goes_back_in_front_within_the_cap(client, fake):
+    fake.LATENCY = 0.05
+    fake.FAILURE_RATE = 1.0
+    enqueue(client, range(6))
+    flush = asyncio.create_task(client.flush())
+    await in_flight(client)
+
+    enqueue(client, range(6, 10))
+    await flush
+
+    # Over the cap the oldest are dropped, the rest keep their order
+    assert [record["data"]["n"] for record in client._pending] == [4, 5, 6, 7, 8, 9]
+
+
+async def test_read_waits_for_the_sessions_batch_in_flight(client, fake):
+    fake.LATENCY = 0.05
+    enqueue(client, range(2))
+    flush = asyncio.create_task(client.flush())
+    await in_flight(client)
+
+    contexts = await client.retrieve_context("s1")
+
+    assert [record["data"]["n"] for record in contexts] == [0, 1]
+    await flush
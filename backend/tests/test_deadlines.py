@@ -0,0 +1,59 @@
+import asyncio
+import pytest
+from app.core.deadlines import DeadlineMiddleware, deadline_stats
+
+pytestmark = pytest.mark.anyio
+
+
+class SlowApp:
+    """Answers after `release` is set, recording whether it got to finish."""
+
+    def __init__(self):
+        self.release = asyncio.Event()
+        self.finished = False
+
+    async def __call__(self, scope, receive, send):
+        await receive()
+        await self.release.wait()
+        self.finished = True
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+
+async def run_with_disconnect(method: str):
+    app = SlowApp()
+    disconnect = asyncio.Event()
+    incoming = [{"type": "http.request", "body": b"", "more_body": False}]
+
+    async def receive():
+        if incoming:
+            return incoming.pop(0)
+        await disconnect.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        pass
+
+    scope = {"type": "http", "method": method, "path": "/api/universities/", "headers": []}
+    request = asyncio.create_task(DeadlineMiddleware(app)(scope, receive, send))
+    await asyncio.sleep(0.01)
+    disconnect.set()
+    await asyncio.sleep(0.01)
+    app.release.set()
+    await asyncio.wait_for(request, timeout=1)
+    return app
+
+
+async def test_read_is_cancelled_when_client_disconnects():
+    cancelled = deadline_stats()["cancelled"]
+    app = await run_with_disconnect("GET")
+    assert not app.finished
+    assert deadline_stats()["cancelled"] == cancelled + 1
+
+
+@pytest.mark.parametrize("method", ["POST", "PUT", "DELETE"])
+async def test_write_runs_to_completion_when_client_disconnects(method):
+    cancelled = deadline_stats()["cancelled"]
+    app = await run_with_disconnect(method)
+    assert app.finished
+    assert deadline_stats()["cancelled"] == cancelled
@@ -0,0 +1,123 @@
+import asyncio
+import pytest
+from app.db import invalidation
+from app.db.invalidation import CATALOG_COLLECTIONS, InvalidationBus, InvalidationEvent
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def workers(mock_db):
+    """Two local-mode buses on one database, as two worker processes would run them."""
+    buses = []
+    for _ in range(2):
+        bus = InvalidationBus()
+        bus.mode = "local"
+        bus.poll_interval = 0.01
+        buses.append(bus)
+    for bus in buses:
+        await bus.start()
+    yield buses
+    for bus in buses:
+        await bus.stop()
+
+
+def recorder(bus: InvalidationBus, collections=None) -> list:
+    events = []
+    bus.subscribe(events.append, collections)
+    return events
+
+
+async def wait_for(condition, timeout: float = 1.0) -> None:
+    async def poll():
+        while not condition():
+            await asyncio.sleep(0.005)
+    await asyncio.wait_for(poll(), timeout)
+
+
+async def test_notify_publishes_to_subscribers_of_the_collection(workers):
+    first, _ = workers
+    universities = recorder(first, ["universities"])
+    specialties = recorder(first, ["specialties"])
+
+    await first.notify("universities", "update", "abc", ["name"])
+
+    assert universities == [InvalidationEvent("universities", "update", "abc", ("name",))]
+    assert specialties == []
+    assert first.active_mode == "local"
+
+
+async def test_other_workers_replay_the_change_from_the_version_poll(workers):
+    first, second = workers
+    first_events, second_events = recorder(first), recorder(second)
+
+    await first.notify("universities", "update", "abc", ["name"])
+    await wait_for(lambda: second_events)
+
+    assert second_events == [InvalidationEvent("universities", "update", "abc", ("name",))]
+    # The writer already saw its own event and doesn't get it again
+    await asyncio.sleep(0.05)
+    assert first_events == [InvalidationEvent("universities", "update", "abc", ("name",))]
+    assert len(second_events) == 1
+
+
+async def test_writer_replays_what_another_worker_wrote_in_between(workers):
+    first, second = workers
+    # Pollers off: only notify() can notice the other worker's write
+    for bus in workers:
+        await bus.stop()
+    first_events = recorder(first)
+
+    await second.notify("specialties", "update", "x")
+    await second.notify("universities", "delete", "y")
+    await first.notify("universities", "update", "abc")
+
+    assert first_events == [
+        InvalidationEvent("universities", "update", "abc"),
+        InvalidationEvent("specialties", "update", "x"),
+        InvalidationEvent("universities", "delete", "y")
+    ]
+
+
+async def test_worker_too_far_behind_gets_resets(workers, monkeypatch):
+    monkeypatch.setattr(invalidation, "RECENT_CHANGES", 2)
+    first, second = workers
+    await second.stop()
+    second_events = recorder(second)
+
+    for document_id in ("a", "b", "c"):
+        await first.notify("universities", "update", document_id)
+    await second.start()
+    second._seen_version = 0
+    await wait_for(lambda: second_events)
+
+    assert [event.collection for event in second_events] == list(CATALOG_COLLECTIONS)
+    assert all(event.is_reset for event in second_events)
+
+
+async def test_failing_handler_does_not_stop_the_others(workers, capsys):
+    first, _ = workers
+
+    def broken(event):
+        raise RuntimeError("boom")
+
+    first.subscribe(broken)
+    events = recorder(first)
+
+    await first.notify("universities", "delete", "abc")
+
+    assert events == [InvalidationEvent("universities", "delete", "abc")]
+    assert "[WARNING] Invalidation handler" in capsys.readouterr().out
+
+
+async def test_write_handlers_run_in_change_stream_mode_too(mock_db):
+    bus = InvalidationBus()
+    bus.active_mode = "change_stream"
+    writes, events = [], recorder(bus)
+    bus.subscribe_writes(writes.append)
+
+    await bus.notify("universities", "update", "abc", ["ranking"])
+
+    assert writes == [InvalidationEvent("universities", "update", "abc", ("ranking",))]
+    # Subscribers hear about it from the change stream instead
+    assert events == []
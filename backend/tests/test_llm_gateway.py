@@ -0,0 +1,121 @@
+import asyncio
+import httpx
+import pytest
+from openai import AsyncOpenAI
+from app.ai.llm_gateway import (
+    CircuitBreaker, LLMCircuitOpenError, LLMGateway, LLMGatewayError, LLMOverloadedError, LLMRateLimitedError
+)
+from devtools import fake_openai
+
+pytestmark = pytest.mark.anyio
+
+RESET_SECONDS = 0.05
+
+
+@pytest.fixture
+def fake(monkeypatch):
+    """devtools/fake_openai served in-process, answering at once and successfully by default."""
+    monkeypatch.setattr(fake_openai, "LATENCY", 0.0)
+    monkeypatch.setattr(fake_openai, "FAILURE_RATE", 0.0)
+    monkeypatch.setattr(fake_openai, "FAILURE_STATUS", 500)
+    monkeypatch.setattr(fake_openai, "stats", {"requests": 0, "failures": 0, "in_flight": 0, "max_in_flight": 0})
+    return fake_openai
+
+
+@pytest.fixture
+async def gateway(fake):
+    http_client = httpx.AsyncClient(transport=httpx.ASGITransport(app=fake.app))
+    client = AsyncOpenAI(api_key="test", base_url="http://fake-openai/v1", http_client=http_client, max_retries=0)
+    gateway = LLMGateway(client=client)
+    gateway.max_retries = 0
+    gateway.backoff_base = 0.001
+    gateway.backoff_max = 0.01
+    gateway.breaker = CircuitBreaker(failure_threshold=2, reset_timeout=RESET_SECONDS)
+    yield gateway
+    await http_client.aclose()
+
+
+async def ask(gateway: LLMGateway, timeout: float = 5.0):
+    return await gateway.chat("fake-model", [{"role": "user", "content": "hello"}], timeout=timeout)
+
+
+async def open_breaker(gateway: LLMGateway, fake) -> None:
+    fake.FAILURE_RATE = 1.0
+    for _ in range(gateway.breaker.failure_threshold):
+        with pytest.raises(LLMGatewayError):
+            await ask(gateway)
+    fake.FAILURE_RATE = 0.0
+    assert gateway.breaker.state == "open"
+
+
+async def test_success_passes_through(gateway, fake):
+    response = await ask(gateway)
+    assert response.choices[0].message.content.startswith("[fake]")
+    assert gateway.breaker.state == "closed"
+    assert fake.stats["requests"] == 1
+
+
+async def test_retries_then_translates_rate_limit(gateway, fake):
+    fake.FAILURE_RATE = 1.0
+    fake.FAILURE_STATUS = 429
+    gateway.max_retries = 2
+    gateway.breaker = CircuitBreaker(failure_threshold=10, reset_timeout=RESET_SECONDS)
+
+    with pytest.raises(LLMRateLimitedError):
+        await ask(gateway)
+    # The first attempt and two retries, each backing off (capped by backoff_max)
+    assert fake.stats["requests"] == 3
+
+
+async def test_open_breaker_fails_fast(gateway, fake):
+    await open_breaker(gateway, fake)
+    sent = fake.stats["requests"]
+
+    with pytest.raises(LLMCircuitOpenError):
+        await ask(gateway)
+    assert fake.stats["requests"] == sent
+
+
+async def test_half_open_probe_rejected_by_full_queue_does_not_wedge_breaker(gateway, fake):
+    await open_breaker(gateway, fake)
+    await asyncio.sleep(RESET_SECONDS)
+    assert gateway.breaker.state == "half_open"
+
+    # No capacity at all: the would-be probe is turned away before it gets a slot
+    capacity = gateway.max_queue
+    gateway.max_queue = -gateway.max_concurrency
+    with pytest.raises(LLMOverloadedError):
+        await ask(gateway)
+    gateway.max_queue = capacity
+
+    await ask(gateway)
+    assert gateway.breaker.state == "closed"
+
+
+async def test_half_open_probe_cancelled_while_queued_does_not_wedge_breaker(gateway, fake):
+    await open_breaker(gateway, fake)
+    await asyncio.sleep(RESET_SECONDS)
+
+    # Every slot taken: the next call waits in the queue and is cancelled there
+    for _ in range(gateway.max_concurrency):
+        await gateway._semaphore.acquire()
+    waiting = asyncio.create_task(ask(gateway))
+    await asyncio.sleep(0.01)
+    waiting.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiting
+    for _ in range(gateway.max_concurrency):
+        gateway._semaphore.release()
+
+    await ask(gateway)
+    assert gateway.breaker.state == "closed"
+
+
+async def test_failed_probe_reopens_breaker(gateway, fake):
+    await open_breaker(gateway, fake)
+    await asyncio.sleep(RESET_SECONDS)
+
+    fake.FAILURE_RATE = 1.0
+    with pytest.raises(LLMGatewayError):
+        await ask(gateway)
+    assert gateway.breaker.state == "open"
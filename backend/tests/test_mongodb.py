@@ -0,0 +1,30 @@
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+from pymongo.errors import DuplicateKeyError
+from app.db.mongodb import DOCUMENT_MODELS, DeferredIndexInitializer
+from app.models.catalog_change import CatalogChange
+from app.models.university import University
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def initializer():
+    initializer = DeferredIndexInitializer(database=AsyncMongoMockClient()["catalog"], document_models=DOCUMENT_MODELS)
+    await initializer
+    return initializer
+
+
+async def test_required_indexes_exist_before_the_deferred_sync(initializer):
+    await initializer.create_required_indexes()
+
+    universities = await University.get_motor_collection().index_information()
+    changes = await CatalogChange.get_motor_collection().index_information()
+    assert "location_2dsphere" in universities
+    # Sort and filter indexes wait for sync_indexes
+    assert "name_id" not in universities
+    assert changes["seq"]["unique"]
+
+    await CatalogChange(seq=1, collection="universities", document_id="a", operation="upsert").insert()
+    with pytest.raises(DuplicateKeyError):
+        await CatalogChange(seq=1, collection="universities", document_id="b", operation="upsert").insert()
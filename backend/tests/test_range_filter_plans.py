@@ -0,0 +1,53 @@
+"""
+The university range filters must be answered by bounded index scans: for
+each filter and sort combination the list endpoint produces, the winning
+plan has an IXSCAN over one of the range indexes with real bounds on a
+filtered field, and no COLLSCAN. Needs a real mongod (MONGODB_URL).
+"""
+from typing import Any, Dict, List, Tuple
+import pytest
+from app.models.university import University
+from app.services.university_service import SORT_FIELDS, RangeFilters, range_conditions
+
+pytestmark = pytest.mark.anyio
+
+CASES: List[Tuple[str, RangeFilters, str, int]] = [
+    ("tuition under 30k, top 200", {"tuition_fee_usd": (None, 30000), "ranking": (None, 200)}, "ranking", 1),
+    ("tuition under 30k, acceptance over 20%",
+     {"tuition_fee_usd": (None, 30000), "acceptance_rate": (20, None)}, "tuition_fee", 1),
+    ("top 200, acceptance over 20%", {"ranking": (None, 200), "acceptance_rate": (20, None)}, "ranking", 1),
+    ("tuition 10k-40k", {"tuition_fee_usd": (10000, 40000)}, "tuition_fee", -1),
+    ("acceptance 20-60%", {"acceptance_rate": (20, 60)}, "acceptance_rate", 1),
+    ("10k+ students, top 500", {"student_count": (10000, None), "ranking": (None, 500)}, "ranking", 1),
+    ("top 100", {"ranking": (None, 100)}, "ranking", 1),
+]
+
+UNBOUNDED = "[MinKey, MaxKey]"
+
+
+def stages(plan: Dict[str, Any]) -> List[Dict[str, Any]]:
+    found = [plan]
+    for key in ("inputStage", "queryPlan"):
+        if key in plan:
+            found += stages(plan[key])
+    for child in plan.get("inputStages", []):
+        found += stages(child)
+    return found
+
+
+@pytest.mark.parametrize("label, ranges, sort_by, sort_order", CASES, ids=[case[0] for case in CASES])
+async def test_range_filter_uses_a_bounded_index_scan(mongod_db, label, ranges, sort_by, sort_order):
+    cursor = University.get_motor_collection().find({"$and": range_conditions(ranges)}) \
+        .sort(SORT_FIELDS[sort_by], sort_order).limit(20)
+    plan = stages((await cursor.explain())["queryPlanner"]["winningPlan"])
+    names = [stage.get("stage") for stage in plan]
+
+    assert "COLLSCAN" not in names, " <- ".join(filter(None, names))
+    scans = [stage for stage in plan if stage.get("stage") == "IXSCAN"]
+    assert scans, " <- ".join(filter(None, names))
+    assert any(
+        bounds != [UNBOUNDED]
+        for scan in scans
+        for field, bounds in scan.get("indexBounds", {}).items()
+        if field in ranges
+    ), f"no bounded range field in {[scan.get('indexBounds') for scan in scans]}"
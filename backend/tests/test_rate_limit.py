@@ -0,0 +1,148 @@
+import asyncio
+import importlib.util
+import pytest
+from app.core import rate_limit
+from app.core.rate_limit import RateLimiter, RateLimitMiddleware, RouteClass
+
+pytestmark = pytest.mark.anyio
+
+
+async def ok_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+@pytest.fixture
+def limits(monkeypatch):
+    """Small buckets and a fresh limiter, so each test starts with full buckets."""
+    monkeypatch.setitem(rate_limit.ROUTE_CLASSES, "read", RouteClass("read", 20.0, 2))
+    monkeypatch.setitem(rate_limit.ROUTE_CLASSES, "search", RouteClass("search", 100.0, 100, max_in_flight=1))
+    limiter = RateLimiter()
+    monkeypatch.setattr(rate_limit, "rate_limiter", limiter)
+    return limiter
+
+
+async def request(
+    middleware: RateLimitMiddleware,
+    peer: str = "8.8.8.8",
+    forwarded_for: str = "",
+    path: str = "/api/universities"
+) -> dict:
+    headers = [(b"x-forwarded-for", forwarded_for.encode())] if forwarded_for else []
+    scope = {"type": "http", "method": "GET", "path": path, "headers": headers, "client": (peer, 40000)}
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    await middleware(scope, receive, send)
+    return {"status": sent[0]["status"], **{k.decode(): v.decode() for k, v in sent[0]["headers"]}}
+
+
+async def test_empty_bucket_answers_429_with_retry_after(limits):
+    middleware = RateLimitMiddleware(ok_app)
+
+    assert [(await request(middleware))["status"] for _ in range(2)] == [200, 200]
+    rejected = await request(middleware)
+
+    assert rejected["status"] == 429
+    assert rejected["retry-after"] == "1"
+    assert limits.rejected["read"] == 1
+    # Other clients have buckets of their own
+    assert (await request(middleware, peer="8.8.4.4"))["status"] == 200
+
+
+async def test_tokens_refill_over_time(limits):
+    middleware = RateLimitMiddleware(ok_app)
+    for _ in range(2):
+        await request(middleware)
+    assert (await request(middleware))["status"] == 429
+
+    # 20 tokens a second: one is back after 50ms
+    await asyncio.sleep(0.06)
+
+    assert (await request(middleware))["status"] == 200
+    assert (await request(middleware))["status"] == 429
+
+
+async def test_searches_over_the_in_flight_cap_get_503(limits):
+    release = asyncio.Event()
+
+    async def slow_app(scope, receive, send):
+        await release.wait()
+        await ok_app(scope, receive, send)
+
+    middleware = RateLimitMiddleware(slow_app)
+    first = asyncio.create_task(request(middleware, path="/api/universities/search"))
+    while not limits.in_flight["search"]:
+        await asyncio.sleep(0.001)
+
+    shed = await request(middleware, peer="8.8.4.4", path="/api/universities/search")
+    release.set()
+
+    assert shed["status"] == 503
+    assert (await first)["status"] == 200
+    assert limits.shed["search"] == 1
+    assert limits.in_flight["search"] == 0
+
+
+async def test_forwarded_for_keys_on_the_hop_the_trusted_proxy_appended(limits):
+    middleware = RateLimitMiddleware(ok_app)
+    middleware.trusted_proxies = 1
+
+    # Spoofed hops on the left don't buy a fresh bucket
+    statuses = [
+        (await request(middleware, "10.0.0.2", f"{spoofed}, 198.51.100.7"))["status"]
+        for spoofed in ("1.1.1.1", "2.2.2.2", "3.3.3.3")
+    ]
+
+    assert statuses == [200, 200, 429]
+    assert (await request(middleware, "10.0.0.2", "1.1.1.1, 198.51.100.8"))["status"] == 200
+
+
+async def test_forwarded_for_behind_two_proxies(limits):
+    middleware = RateLimitMiddleware(ok_app)
+    middleware.trusted_proxies = 2
+
+    for spoofed in ("1.1.1.1", "2.2.2.2"):
+        assert (await request(middleware, "10.0.0.3", f"{spoofed}, 198.51.100.7, 10.0.0.2"))["status"] == 200
+    assert (await request(middleware, "10.0.0.3", "3.3.3.3, 198.51.100.7, 10.0.0.2"))["status"] == 429
+    # Fewer hops than proxies: the leftmost one
+    assert (await request(middleware, "10.0.0.3", "198.51.100.9"))["status"] == 200
+
+
+async def test_redis_url_without_the_package_fails_startup(monkeypatch):
+    monkeypatch.setattr(rate_limit.settings, "rate_limit_redis_url", "redis://localhost:6379/0")
+    monkeypatch.setattr(importlib.util, "find_spec", lambda name, *args: None)
+
+    with pytest.raises(RuntimeError, match="redis"):
+        RateLimiter().open()
+
+
+@pytest.mark.parametrize("peer", ["172.18.0.5", "127.0.0.1", "::1"])
+async def test_warns_once_about_a_local_proxy(limits, capsys, peer):
+    middleware = RateLimitMiddleware(ok_app)
+
+    assert (await request(middleware, peer, "203.0.113.7"))["status"] == 200
+    assert (await request(middleware, peer, "203.0.113.8"))["status"] == 200
+
+    assert capsys.readouterr().out.count("[WARNING] Rate limiting keys clients by peer address") == 1
+
+
+@pytest.mark.parametrize("peer, forwarded_for", [("8.8.8.8", "1.1.1.1"), ("172.18.0.5", "")])
+async def test_no_warning_without_a_local_proxy(limits, capsys, peer, forwarded_for):
+    await request(RateLimitMiddleware(ok_app), peer, forwarded_for)
+
+    assert "[WARNING]" not in capsys.readouterr().out
+
+
+async def test_no_warning_when_forwarded_for_is_trusted(limits, capsys):
+    middleware = RateLimitMiddleware(ok_app)
+    middleware.trusted_proxies = 1
+
+    await request(middleware, "172.18.0.5", "203.0.113.7")
+
+    assert "[WARNING]" not in capsys.readouterr().out
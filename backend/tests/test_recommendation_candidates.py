@@ -0,0 +1,88 @@
+import pytest
+from app.ai.agent import ai_agent
+from app.models.university import University, UniversityRequirements
+from app.services.catalog_snapshot import CatalogIndex, catalog_snapshot
+from app.services.university_service import UniversityService
+
+pytestmark = pytest.mark.anyio
+
+
+async def seed_catalog() -> None:
+    """60 mediocre universities named before the best one, plus an unranked one."""
+    requirement = UniversityRequirements(specialty_id="cs", specialty_name="Computer Science", minimum_score=1200)
+    universities = [
+        University(
+            name=f"A University {i:02d}", country="Germany", city="Berlin",
+            ranking=800 + i, specialty_names=["Computer Science"], requirements=[requirement]
+        )
+        for i in range(60)
+    ]
+    universities.append(University(
+        name="Zeta Institute", country="Germany", city="Munich",
+        ranking=3, specialty_names=["Computer Science"], requirements=[requirement]
+    ))
+    universities.append(University(name="Unranked College", country="Germany", city="Bonn"))
+    await University.insert_many(universities)
+
+
+@pytest.fixture
+def snapshot():
+    """Serve catalog reads from a snapshot of the seeded catalog."""
+    previous = catalog_snapshot.index
+
+    async def load():
+        catalog_snapshot.index = CatalogIndex(await University.find_all().to_list(), [], version=1)
+
+    yield load
+    catalog_snapshot.index = previous
+
+
+async def test_mongo_candidates_are_best_ranked_first(mock_db):
+    await seed_catalog()
+
+    universities, total = await UniversityService.get_recommendation_candidates(limit=5, country="Germany")
+
+    assert total == 62
+    assert [u.name for u in universities] == [
+        "Zeta Institute", "A University 00", "A University 01", "A University 02", "A University 03"
+    ]
+
+
+async def test_mongo_candidates_fill_up_with_unranked(mock_db):
+    await seed_catalog()
+
+    universities, total = await UniversityService.get_recommendation_candidates(limit=100)
+
+    assert total == 62
+    assert len(universities) == 62
+    assert universities[-1].name == "Unranked College"
+
+
+async def test_snapshot_candidates_are_the_whole_filtered_set(mock_db, snapshot):
+    await seed_catalog()
+    await snapshot()
+
+    universities, total = await UniversityService.get_recommendation_candidates(
+        limit=5, specialty="Computer", min_score=1300
+    )
+
+    assert total == 61
+    assert len(universities) == 61
+
+
+@pytest.mark.parametrize("load_snapshot", [False, True])
+async def test_best_university_past_the_first_names_is_recommended(mock_db, snapshot, load_snapshot):
+    await seed_catalog()
+    if load_snapshot:
+        await snapshot()
+
+    result = await ai_agent.recommend_universities(
+        session_id="candidates",
+        user_query="computer science in Germany",
+        user_score=1400,
+        preferred_country="Germany",
+        preferred_specialty="Computer Science",
+        mode="offline"
+    )
+
+    assert result["ranked_universities"][0]["name"] == "Zeta Institute"
@@ -0,0 +1,32 @@
+import os
+import pytest
+from app import server
+
+
+@pytest.fixture
+def cpus(monkeypatch):
+    monkeypatch.setattr(os, "sched_getaffinity", lambda pid: set(range(64)), raising=False)
+
+
+@pytest.mark.parametrize("cpu_max, expected", [
+    ("200000 100000\n", 2),
+    ("150000 100000\n", 2),
+    ("50000 100000\n", 1),
+    ("max 100000\n", 64),
+])
+def test_cgroup_v2_quota_caps_the_workers(cpus, tmp_path, cpu_max, expected):
+    (tmp_path / "cpu.max").write_text(cpu_max)
+    assert server.available_cpus(tmp_path) == expected
+
+
+@pytest.mark.parametrize("quota, expected", [("400000", 4), ("-1", 64)])
+def test_cgroup_v1_quota_caps_the_workers(cpus, tmp_path, quota, expected):
+    (tmp_path / "cpu").mkdir()
+    (tmp_path / "cpu" / "cpu.cfs_quota_us").write_text(quota + "\n")
+    (tmp_path / "cpu" / "cpu.cfs_period_us").write_text("100000\n")
+    assert server.available_cpus(tmp_path) == expected
+
+
+def test_affinity_without_cgroup(monkeypatch, tmp_path):
+    monkeypatch.setattr(os, "sched_getaffinity", lambda pid: {0, 1, 2}, raising=False)
+    assert server.available_cpus(tmp_path) == 3
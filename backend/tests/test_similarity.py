@@ -0,0 +1,105 @@
+import pytest
+from app.models.university import University
+from app.models.university_similarity import UniversitySimilarity
+from app.services.similarity import SimilarityIndex
+
+pytestmark = pytest.mark.anyio
+
+SPECIALTIES = ["cs", "math", "physics", "law", "medicine"]
+
+
+async def seed_catalog(count: int = 40) -> list:
+    universities = [
+        University(
+            name=f"University {i:02d}",
+            country=["Germany", "France", "Japan"][i % 3],
+            city="City",
+            ranking=10 + i * 17,
+            tuition_fee_usd=1000.0 + (i * 7919) % 40000,
+            acceptance_rate=5.0 + (i * 13) % 90,
+            student_count=2000 + (i * 3571) % 50000,
+            specialties=SPECIALTIES[i % 5:i % 5 + 2]
+        )
+        for i in range(count)
+    ]
+    await University.insert_many(universities)
+    return await University.find_all().sort("+_id").to_list()
+
+
+def index() -> SimilarityIndex:
+    similarity = SimilarityIndex()
+    similarity.k = 5
+    return similarity
+
+
+async def from_scratch() -> dict:
+    """Neighbour lists of a full rebuild over the current catalog."""
+    similarity = index()
+    await similarity.refresh(set(), full=True)
+    return similarity._lists
+
+
+async def test_change_within_bounds_matches_a_full_rebuild(mock_db):
+    universities = await seed_catalog()
+    similarity = index()
+    await similarity.refresh(set(), full=True)
+
+    changed = universities[7]
+    changed.specialties = ["law", "medicine"]
+    changed.tuition_fee_usd = 20000.0
+    await changed.save()
+    await similarity.refresh({str(changed.id)})
+
+    assert similarity.last_run["mode"] == "incremental"
+    assert similarity.last_run["rows"] < len(universities)
+    assert similarity._lists == await from_scratch()
+    stored = await UniversitySimilarity.get(changed.id)
+    assert [n.university_id for n in stored.neighbours] == [u for u, _ in similarity._lists[str(changed.id)]]
+
+
+async def test_value_outside_bounds_is_clamped_without_a_rebuild(mock_db):
+    universities = await seed_catalog()
+    similarity = index()
+    await similarity.refresh(set(), full=True)
+    space = similarity._space
+
+    changed = universities[3]
+    changed.student_count = 10_000_000
+    await changed.save()
+    await similarity.refresh({str(changed.id)})
+
+    assert similarity.last_run["mode"] == "incremental"
+    assert similarity._space is space
+
+
+async def test_insert_and_delete_update_the_matrix_in_place(mock_db):
+    universities = await seed_catalog()
+    similarity = index()
+    await similarity.refresh(set(), full=True)
+
+    added = University(name="New", country="France", city="Lyon", ranking=50, specialties=["cs"])
+    await added.insert()
+    deleted = universities[0]
+    await deleted.delete()
+    await similarity.refresh({str(added.id), str(deleted.id)})
+
+    assert similarity.last_run["mode"] == "incremental"
+    assert similarity._matrix.shape[0] == len(similarity._ids) == len(universities)
+    assert str(deleted.id) not in similarity._lists
+    assert all(u != str(deleted.id) for neighbours in similarity._lists.values() for u, _ in neighbours)
+    assert await UniversitySimilarity.get(deleted.id) is None
+    assert str(added.id) in similarity._lists
+
+
+async def test_new_specialty_rebuilds_the_feature_space(mock_db):
+    universities = await seed_catalog()
+    similarity = index()
+    await similarity.refresh(set(), full=True)
+
+    changed = universities[5]
+    changed.specialties = ["astronomy"]
+    await changed.save()
+    await similarity.refresh({str(changed.id)})
+
+    assert similarity.last_run["mode"] == "full"
+    assert "astronomy" in similarity._space.specialties
@@ -0,0 +1,64 @@
+import asyncio
+import time
+import pymongo
+import pytest
+from pymongo import _csot
+from pymongo.errors import ExecutionTimeout
+from app.core import deadlines
+from app.core.singleflight import SingleFlight
+
+pytestmark = pytest.mark.anyio
+
+
+async def call_with_budget(flight: SingleFlight, budget: float, fn):
+    """Calls the flight the way DeadlineMiddleware runs a request with `budget`."""
+    deadlines._deadline.set(time.monotonic() + budget)
+    with pymongo.timeout(budget):
+        return await flight.do("key", fn)
+
+
+async def test_shared_call_runs_under_its_own_deadline():
+    flight = SingleFlight("test", timeout=5.0)
+    seen = []
+
+    async def query():
+        seen.append(_csot.get_timeout())
+        await asyncio.sleep(0.2)
+        return "result"
+
+    short = asyncio.create_task(call_with_budget(flight, 0.05, query))
+    await asyncio.sleep(0)
+    long = asyncio.create_task(call_with_budget(flight, 1.0, query))
+
+    with pytest.raises(ExecutionTimeout) as exc:
+        await short
+    assert exc.value.timeout
+    assert await long == "result"
+    assert seen == [5.0]
+    assert flight.executions == 1 and flight.coalesced == 1
+
+
+async def test_shared_call_is_cancelled_when_every_caller_is_gone():
+    flight = SingleFlight("test", timeout=5.0)
+    started = asyncio.Event()
+    cancelled = asyncio.Event()
+
+    async def query():
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    first = asyncio.create_task(call_with_budget(flight, 1.0, query))
+    second = asyncio.create_task(call_with_budget(flight, 1.0, query))
+    await started.wait()
+
+    first.cancel()
+    await asyncio.sleep(0.01)
+    assert not cancelled.is_set()
+
+    second.cancel()
+    await asyncio.wait_for(cancelled.wait(), timeout=1)
+    assert flight.stats()["in_flight"] == 0
@@ -0,0 +1,116 @@
+"""
+Rename, delete, resume and repair of denormalized specialty names. They run
+pipeline updates and $lookup, which the in-memory database doesn't support,
+so these need a real mongod (MONGODB_URL).
+"""
+import pytest
+from app.core.config import settings
+from app.models.specialty import Specialty
+from app.models.specialty_propagation import SpecialtyPropagationTask
+from app.models.university import University, UniversityRequirements
+from app.services.specialty_propagation import SpecialtyPropagationService
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def twins(mongod_db):
+    """Two distinct specialties sharing one name, both offered by one university."""
+    first = Specialty(name="Data Science")
+    second = Specialty(name="Data Science")
+    await first.insert()
+    await second.insert()
+    university = University(
+        name="Twin University", country="Germany", city="Berlin",
+        specialties=[str(first.id), str(second.id)],
+        specialty_names=["Data Science", "Data Science"],
+        requirements=[
+            UniversityRequirements(specialty_id=str(first.id), specialty_name="Data Science", minimum_score=1100),
+            UniversityRequirements(specialty_id=str(second.id), specialty_name="Data Science", minimum_score=1300)
+        ]
+    )
+    await university.insert()
+    return first, second, university
+
+
+async def test_rename_changes_only_the_renamed_specialty(twins):
+    first, second, university = twins
+    await second.set({Specialty.name: "Analytics"})
+
+    modified = await SpecialtyPropagationService.propagate_rename(str(second.id), "Data Science", "Analytics")
+
+    university = await University.get(university.id)
+    assert modified == 1
+    assert university.specialty_names == ["Data Science", "Analytics"]
+    assert [req.specialty_name for req in university.requirements] == ["Data Science", "Analytics"]
+    assert (await SpecialtyPropagationService.check_consistency())["drifted"] == 0
+
+
+async def test_delete_removes_only_the_deleted_specialty(twins):
+    first, second, university = twins
+    await second.delete()
+
+    await SpecialtyPropagationService.propagate_delete(str(second.id), "Data Science")
+
+    university = await University.get(university.id)
+    assert university.specialties == [str(first.id)]
+    assert university.specialty_names == ["Data Science"]
+    assert [req.specialty_id for req in university.requirements] == [str(first.id)]
+
+
+async def test_rename_walks_every_batch(mongod_db, monkeypatch):
+    monkeypatch.setattr(settings, "specialty_propagation_batch_size", 2)
+    specialty = Specialty(name="Physics")
+    await specialty.insert()
+    universities = [
+        University(name=f"U{i}", country="Japan", city="Tokyo",
+                   specialties=[str(specialty.id)], specialty_names=["Physics"])
+        for i in range(5)
+    ]
+    await University.insert_many(universities)
+
+    modified = await SpecialtyPropagationService.propagate_rename(str(specialty.id), "Physics", "Applied Physics")
+
+    assert modified == 5
+    assert {u.specialty_names[0] async for u in University.find_all()} == {"Applied Physics"}
+    task = await SpecialtyPropagationTask.find_one(SpecialtyPropagationTask.specialty_id == str(specialty.id))
+    assert task.status == "completed"
+
+
+async def test_resume_continues_after_the_checkpoint(mongod_db):
+    specialty = Specialty(name="Law")
+    await specialty.insert()
+    for i in range(3):
+        await University(name=f"U{i}", country="France", city="Paris",
+                         specialties=[str(specialty.id)], specialty_names=["Law"]).insert()
+    done, *rest = await University.find_all().sort("+_id").to_list()
+    # Interrupted after the first university
+    await SpecialtyPropagationTask(
+        specialty_id=str(specialty.id), operation="rename", old_name="Law", new_name="Legal Studies",
+        last_id=done.id, modified=1
+    ).insert()
+
+    assert await SpecialtyPropagationService.resume_pending() == 1
+
+    assert (await University.get(done.id)).specialty_names == ["Law"]
+    assert [(await University.get(u.id)).specialty_names for u in rest] == [["Legal Studies"]] * 2
+    task = await SpecialtyPropagationTask.find_one()
+    assert task.status == "completed"
+    assert task.modified == 3
+
+
+async def test_repair_restores_names_by_position(twins):
+    first, second, university = twins
+    await second.set({Specialty.name: "Analytics"})
+    # Drift: the rename never propagated
+    report = await SpecialtyPropagationService.check_consistency()
+    assert report["drifted"] == 1
+    assert report["sample"][0]["id"] == str(university.id)
+
+    repaired = await SpecialtyPropagationService.repair_consistency()
+
+    university = await University.get(university.id)
+    assert repaired["repaired"] == 1
+    assert university.specialty_names == ["Data Science", "Analytics"]
+    assert [req.specialty_name for req in university.requirements] == ["Data Science", "Analytics"]
+    assert (await SpecialtyPropagationService.check_consistency())["drifted"] == 0
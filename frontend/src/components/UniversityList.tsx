@@ -1,34 +1,47 @@
-import { useState, useMemo } from "react";
-import { Box, Typography, Grid } from "@mui/material";
-import { motion } from "framer-motion";
+import { useEffect, useMemo } from "react";
+import { Box, Typography, Grid, CircularProgress, useMediaQuery, useTheme } from "@mui/material";
 import UniversityCard from "./UniversityCard";
 import UniversityFilters from "./UniversityFilters";
-import type { University, UniversityFilters as Filters } from "@/types/api";
+import { useWindowedRows } from "@/lib/hooks/useWindowedRows";
+import { usePrefetchUniversity } from "@/lib/query/hooks/usePrefetchUniversity";
+import type { University, UniversityScrollFilters as Filters } from "@/types/api";
 
 /**
  * UniversityList Component
  *
- * Displays a filterable list of universities with smooth animations
- * Now powered by real API data
+ * Displays the filterable, infinitely scrolling list of universities
+ * Filtering happens on the server; the parent owns the filter state and the
+ * paged query
  *
- * @param universities - Array of universities from API
+ * @param universities - Universities loaded so far, in list order
+ * @param total - Number of matching universities, if known
+ * @param filters - Current filter values
+ * @param onFiltersChange - Callback when filters change
  * @param countries - Available countries for filtering
  * @param specialties - Available specialties for filtering
+ * @param hasMore - Whether another page can be loaded
+ * @param isLoadingMore - Whether the next page is being fetched
+ * @param onLoadMore - Load the next page
  *
  * @example
  * <UniversityList
- *   universities={universitiesData.items}
+ *   universities={items}
+ *   total={data.pages[0].total}
+ *   filters={filters}
+ *   onFiltersChange={setFilters}
  *   countries={countries}
  *   specialties={specialties}
+ *   hasMore={hasNextPage}
+ *   isLoadingMore={isFetchingNextPage}
+ *   onLoadMore={fetchNextPage}
  * />
  *
  * Features:
  * - Filter universities by country and specialty
- * - Stagger animations for grid items using Framer Motion
+ * - Loads the next page as the end of the list scrolls into view
  * - Responsive grid layout with generous spacing
  * - Apple-style minimalist design
  * - Empty state when no results
- * - Client-side filtering with useMemo
  *
  * Accessibility:
  * - Semantic heading structure
@@ -36,65 +49,77 @@ import type { University, UniversityFilters as Filters } from "@/types/api";
  * - Focus management
  *
  * Performance:
- * - Memoized filtered results
- * - Only re-filters when dependencies change
- * - GPU-accelerated animations
+ * - Windowed rendering: only rows near the viewport are in the DOM
+ * - Cards entering the viewport seed the detail cache, hovering one
+ *   prefetches its detail page
  */
 
 interface UniversityListProps {
   universities: University[];
+  total: number | null;
+  filters: Filters;
+  onFiltersChange: (filters: Filters) => void;
   countries: string[];
   specialties: string[];
+  hasMore: boolean;
+  isLoadingMore: boolean;
+  onLoadMore: () => void;
 }
 
-const containerVariants = {
-  hidden: { opacity: 0 },
-  visible: {
-    opacity: 1,
-    transition: {
-      staggerChildren: 0.08,
-    },
-  },
-};
-
-const itemVariants = {
-  hidden: { opacity: 0, y: 20 },
-  visible: {
-    opacity: 1,
-    y: 0,
-    transition: {
-      duration: 0.4,
-      ease: "easeOut",
-    },
-  },
-};
+/** Card row height before it is measured, including the gap below it */
+const ESTIMATED_ROW_HEIGHT = 460;
 
 export default function UniversityList({
   universities,
+  total,
+  filters,
+  onFiltersChange,
   countries,
   specialties,
+  hasMore,
+  isLoadingMore,
+  onLoadMore,
 }: UniversityListProps) {
-  const [filters, setFilters] = useState<Filters>({});
+  const theme = useTheme();
+  const isMd = useMediaQuery(theme.breakpoints.up("md"));
+  const isSm = useMediaQuery(theme.breakpoints.up("sm"));
+  const columns = isMd ? 3 : isSm ? 2 : 1;
+
+  // Group cards into grid rows, the unit of windowing
+  const rows = useMemo(() => {
+    const result: University[][] = [];
+    for (let start = 0; start < universities.length; start += columns) {
+      result.push(universities.slice(start, start + columns));
+    }
+    return result;
+  }, [universities, columns]);
+
+  // Other filters or a different column count put other cards at each row index
+  const layoutKey = useMemo(() => JSON.stringify([filters, columns]), [filters, columns]);
+
+  const { containerRef, start, end, paddingTop, paddingBottom, measureRow } = useWindowedRows({
+    count: rows.length,
+    estimateHeight: ESTIMATED_ROW_HEIGHT,
+    resetKey: layoutKey,
+  });
 
-  // Filter universities based on active filters
-  const filteredUniversities = useMemo(() => {
-    return universities.filter((university) => {
-      // Filter by country
-      if (filters.country && university.country !== filters.country) {
-        return false;
-      }
+  const { seed, prefetch } = usePrefetchUniversity();
 
-      // Filter by specialty (check specialty_names from API)
-      if (
-        filters.specialty &&
-        !university.specialty_names.includes(filters.specialty)
-      ) {
-        return false;
-      }
+  // Cards in view: their detail page opens from cache
+  useEffect(() => {
+    for (const row of rows.slice(start, end)) {
+      row.forEach(seed);
+    }
+  }, [rows, start, end, seed]);
 
-      return true;
-    });
-  }, [universities, filters]);
+  // The rendered window reaches the last row: fetch the next page
+  useEffect(() => {
+    if (end >= rows.length && hasMore && !isLoadingMore) {
+      onLoadMore();
+    }
+  }, [end, rows.length, hasMore, isLoadingMore, onLoadMore]);
+
+  const count = total ?? universities.length;
 
   return (
     <Box>
@@ -111,7 +136,7 @@ export default function UniversityList({
       >
         <UniversityFilters
           filters={filters}
-          onChange={setFilters}
+          onChange={onFiltersChange}
           countries={countries}
           specialties={specialties}
         />
@@ -126,15 +151,11 @@ export default function UniversityList({
           color="text.primary"
           aria-live="polite"
         >
-          {filteredUniversities.length === 0
+          {count === 0
             ? "No universities found"
-            : `${filteredUniversities.length} ${
-                filteredUniversities.length === 1
-                  ? "University"
-                  : "Universities"
-              } Found`}
+            : `${count} ${count === 1 ? "University" : "Universities"} Found`}
         </Typography>
-        {filteredUniversities.length > 0 && (
+        {count > 0 && (
           <Typography variant="body2" color="text.secondary">
             Showing all available universities matching your criteria
           </Typography>
@@ -142,26 +163,34 @@ export default function UniversityList({
       </Box>
 
       {/* University Grid */}
-      {filteredUniversities.length > 0 ? (
-        <Box
-          component={motion.div}
-          variants={containerVariants}
-          initial="hidden"
-          animate="visible"
-        >
-          <Grid container spacing={3}>
-            {filteredUniversities.map((university) => (
-              <Grid key={university._id} size={{ xs: 12, sm: 6, md: 4 }}>
-                <Box
-                  component={motion.div}
-                  variants={itemVariants}
-                  sx={{ height: "100%" }}
-                >
-                  <UniversityCard university={university} />
-                </Box>
+      {universities.length > 0 ? (
+        <Box ref={containerRef} sx={{ pt: `${paddingTop}px`, pb: `${paddingBottom}px` }}>
+          {rows.slice(start, end).map((row, offset) => (
+            <Box
+              key={start + offset}
+              ref={measureRow}
+              data-row-index={start + offset}
+              sx={{ pb: 3 }}
+            >
+              <Grid container spacing={3}>
+                {row.map((university) => (
+                  <Grid
+                    key={university._id}
+                    size={{ xs: 12, sm: 6, md: 4 }}
+                    onMouseEnter={() => prefetch(university)}
+                    onFocus={() => prefetch(university)}
+                  >
+                    <UniversityCard university={university} />
+                  </Grid>
+                ))}
               </Grid>
-            ))}
-          </Grid>
+            </Box>
+          ))}
+          {isLoadingMore && (
+            <Box sx={{ display: "flex", justifyContent: "center", py: 4 }}>
+              <CircularProgress size={28} aria-label="Loading more universities" />
+            </Box>
+          )}
         </Box>
       ) : (
         // Empty State
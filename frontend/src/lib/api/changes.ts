@@ -0,0 +1,17 @@
+/**
+ * Changes API Service
+ * Delta sync of the catalog: fetch only what changed since the last cursor
+ */
+
+import apiClient from './client';
+import type { ChangesPage } from '@/types/api';
+
+/**
+ * Get catalog changes after `since` (0 for the first call).
+ * Store `next_since` for the next call; call again while `has_more`.
+ * If `resync_required`, refetch the full lists and continue from `next_since`.
+ */
+export async function getChanges(since: number): Promise<ChangesPage> {
+  const { data } = await apiClient.get<ChangesPage>('/changes', { params: { since } });
+  return data;
+}
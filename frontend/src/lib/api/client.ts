@@ -28,10 +28,13 @@ export function transformError(error: AxiosError): ApiError {
   if (error.response) {
     // Server responded with error status
     const data = error.response.data as any;
+    const retryAfter = Number(error.response.headers['retry-after']);
     return {
       message: data?.message || data?.detail || 'An error occurred',
       detail: data?.detail,
       status: error.response.status,
+      // Seconds to wait, sent with 429 (rate limited) and 503 (busy)
+      retryAfter: Number.isFinite(retryAfter) && retryAfter > 0 ? retryAfter : undefined,
     };
   } else if (error.request) {
     // Request made but no response received
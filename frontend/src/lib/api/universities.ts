@@ -4,7 +4,19 @@
  */
 
 import apiClient from './client';
-import type { University, PaginatedResponse, UniversityFilters } from '@/types/api';
+import type {
+  University,
+  PaginatedResponse,
+  CursorPage,
+  UniversityFilters,
+  UniversityScrollFilters,
+  BatchUniversitiesResponse,
+  SimilarUniversitiesResponse,
+  ApiError,
+} from '@/types/api';
+
+/** Maximum ids per batch request (backend limit) */
+const MAX_BATCH_SIZE = 100;
 
 /**
  * Get paginated list of universities with optional filters
@@ -18,6 +30,20 @@ export async function getUniversities(
   return data;
 }
 
+/**
+ * Get one page of universities for infinite scrolling.
+ * Pass the previous page's `next_cursor` with the same filters to continue.
+ */
+export async function scrollUniversities(
+  filters: UniversityScrollFilters = {},
+  cursor?: string
+): Promise<CursorPage<University>> {
+  const { data } = await apiClient.get<CursorPage<University>>('/universities/scroll', {
+    params: { ...filters, cursor },
+  });
+  return data;
+}
+
 /**
  * Get a single university by ID
  */
@@ -26,6 +52,86 @@ export async function getUniversity(id: string): Promise<University> {
   return data;
 }
 
+/**
+ * Get many universities by ID in one request.
+ * Items follow the order of `ids`; unknown ids are null and listed in `missing`.
+ */
+export async function getUniversitiesByIds(ids: string[]): Promise<BatchUniversitiesResponse> {
+  const { data } = await apiClient.post<BatchUniversitiesResponse>('/universities/batch', { ids });
+  return data;
+}
+
+/**
+ * Get the universities most similar to one university (precomputed on the backend)
+ */
+export async function getSimilarUniversities(
+  id: string,
+  limit = 6
+): Promise<SimilarUniversitiesResponse> {
+  const { data } = await apiClient.get<SimilarUniversitiesResponse>(`/universities/${id}/similar`, {
+    params: { limit },
+  });
+  return data;
+}
+
+type PendingLoad = {
+  resolve: (university: University) => void;
+  reject: (error: ApiError) => void;
+};
+
+let pendingLoads = new Map<string, PendingLoad[]>();
+let flushScheduled = false;
+
+async function flushPendingLoads(): Promise<void> {
+  const batch = pendingLoads;
+  pendingLoads = new Map();
+  flushScheduled = false;
+
+  const ids = Array.from(batch.keys());
+  for (let start = 0; start < ids.length; start += MAX_BATCH_SIZE) {
+    const chunk = ids.slice(start, start + MAX_BATCH_SIZE);
+    try {
+      const { items } = await getUniversitiesByIds(chunk);
+      chunk.forEach((id, index) => {
+        const university = items[index];
+        for (const { resolve, reject } of batch.get(id) ?? []) {
+          if (university) {
+            resolve(university);
+          } else {
+            reject({ message: 'University not found', detail: 'University not found', status: 404 });
+          }
+        }
+      });
+    } catch (error) {
+      for (const id of chunk) {
+        for (const { reject } of batch.get(id) ?? []) {
+          reject(error as ApiError);
+        }
+      }
+    }
+  }
+}
+
+/**
+ * Get a single university by ID, DataLoader-style.
+ * Calls made in the same tick are merged into one batch request, and
+ * duplicate ids share the result.
+ */
+export function loadUniversity(id: string): Promise<University> {
+  return new Promise((resolve, reject) => {
+    const waiters = pendingLoads.get(id) ?? [];
+    waiters.push({ resolve, reject });
+    pendingLoads.set(id, waiters);
+
+    if (!flushScheduled) {
+      flushScheduled = true;
+      queueMicrotask(() => {
+        void flushPendingLoads();
+      });
+    }
+  });
+}
+
 /**
  * Search universities by query
  */
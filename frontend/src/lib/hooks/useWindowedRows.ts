@@ -0,0 +1,181 @@
+/**
+ * useWindowedRows Hook
+ * Window a long list of rows against the page scroll: only the rows in or
+ * near the viewport are rendered, with spacers standing in for the rest, so
+ * the DOM stays the same size however many rows are loaded.
+ *
+ * Rows start at `estimateHeight` and are re-measured with a ResizeObserver
+ * once rendered; attach `measureRow` as the ref of each row element, with
+ * its index in `data-row-index`.
+ *
+ * Heights are keyed by row index, so they are dropped when `count` shrinks
+ * or `resetKey` changes (e.g. new filters or a different column count put
+ * other content at the same index); rows still on screen are re-measured
+ * before paint.
+ *
+ * @example
+ * const { containerRef, start, end, paddingTop, paddingBottom, measureRow } =
+ *   useWindowedRows({ count: rows.length, estimateHeight: 420, resetKey: filterKey });
+ */
+
+import { useCallback, useEffect, useLayoutEffect, useMemo, useRef, useState } from 'react';
+
+interface WindowedRowsOptions {
+  count: number;
+  estimateHeight: number;
+  /** Rows rendered beyond each edge of the viewport */
+  overscan?: number;
+  /** Changing it discards the measured heights: rows at the same index hold other content */
+  resetKey?: unknown;
+}
+
+interface RowRange {
+  start: number;
+  end: number; // Exclusive
+}
+
+/** First index whose row ends below `top` (offsets[i + 1] > top) */
+function findRow(offsets: number[], top: number): number {
+  let low = 0;
+  let high = offsets.length - 1;
+  while (low < high) {
+    const middle = (low + high) >> 1;
+    if (offsets[middle + 1] > top) {
+      high = middle;
+    } else {
+      low = middle + 1;
+    }
+  }
+  return low;
+}
+
+export function useWindowedRows({ count, estimateHeight, overscan = 2, resetKey }: WindowedRowsOptions) {
+  const containerRef = useRef<HTMLDivElement | null>(null);
+  const heights = useRef(new Map<number, number>());
+  const rowElements = useRef(new Set<HTMLElement>());
+  const [measured, setMeasured] = useState(0);
+  const [range, setRange] = useState<RowRange>({ start: 0, end: Math.min(count, overscan + 1) });
+
+  // offsets[i] is the top of row i relative to the container, offsets[count] the total height
+  const offsets = useMemo(() => {
+    const result = new Array<number>(count + 1);
+    result[0] = 0;
+    for (let index = 0; index < count; index++) {
+      result[index + 1] = result[index] + (heights.current.get(index) ?? estimateHeight);
+    }
+    return result;
+    // `measured` bumps whenever a row height changes
+  }, [count, estimateHeight, measured]);
+
+  const offsetsRef = useRef(offsets);
+  offsetsRef.current = offsets;
+
+  // Drop heights measured for content no longer at those indices, and
+  // re-measure the mounted rows, which keep their elements across the change
+  const previous = useRef({ count, resetKey });
+  useLayoutEffect(() => {
+    const shrunk = count < previous.current.count;
+    const rekeyed = !Object.is(resetKey, previous.current.resetKey);
+    previous.current = { count, resetKey };
+    if (!shrunk && !rekeyed) {
+      return;
+    }
+    heights.current.clear();
+    for (const element of rowElements.current) {
+      const index = Number(element.dataset.rowIndex);
+      if (!Number.isNaN(index) && index < count) {
+        heights.current.set(index, element.offsetHeight);
+      }
+    }
+    setMeasured((version) => version + 1);
+  }, [count, resetKey]);
+
+  const updateRange = useCallback(() => {
+    const container = containerRef.current;
+    const rowOffsets = offsetsRef.current;
+    const rows = rowOffsets.length - 1;
+    if (!container || rows === 0) {
+      setRange((previous) => (previous.start === 0 && previous.end === 0 ? previous : { start: 0, end: 0 }));
+      return;
+    }
+
+    const top = -container.getBoundingClientRect().top;
+    const bottom = top + window.innerHeight;
+    const start = Math.max(0, findRow(rowOffsets, top) - overscan);
+    const end = Math.min(rows, findRow(rowOffsets, bottom) + 1 + overscan);
+    setRange((previous) => (previous.start === start && previous.end === end ? previous : { start, end }));
+  }, [overscan]);
+
+  // Re-window before paint when rows are added or re-measured
+  useLayoutEffect(updateRange, [offsets, updateRange]);
+
+  useEffect(() => {
+    let frame = 0;
+    const schedule = () => {
+      if (!frame) {
+        frame = requestAnimationFrame(() => {
+          frame = 0;
+          updateRange();
+        });
+      }
+    };
+    window.addEventListener('scroll', schedule, { passive: true });
+    window.addEventListener('resize', schedule);
+    return () => {
+      window.removeEventListener('scroll', schedule);
+      window.removeEventListener('resize', schedule);
+      if (frame) {
+        cancelAnimationFrame(frame);
+      }
+    };
+  }, [updateRange]);
+
+  const [observer] = useState(() =>
+    typeof ResizeObserver === 'undefined'
+      ? null
+      : new ResizeObserver((entries) => {
+          let changed = false;
+          for (const entry of entries) {
+            const element = entry.target as HTMLElement;
+            const index = Number(element.dataset.rowIndex);
+            const height = element.offsetHeight;
+            if (!Number.isNaN(index) && heights.current.get(index) !== height) {
+              heights.current.set(index, height);
+              changed = true;
+            }
+          }
+          if (changed) {
+            setMeasured((version) => version + 1);
+          }
+        })
+  );
+
+  useEffect(() => () => observer?.disconnect(), [observer]);
+
+  const measureRow = useCallback(
+    (element: HTMLElement | null) => {
+      if (!element || !observer) {
+        return;
+      }
+      rowElements.current.add(element);
+      observer.observe(element);
+      return () => {
+        rowElements.current.delete(element);
+        observer.unobserve(element);
+      };
+    },
+    [observer]
+  );
+
+  const start = Math.min(range.start, count);
+  const end = Math.min(range.end, count);
+
+  return {
+    containerRef,
+    start,
+    end,
+    paddingTop: offsets[start],
+    paddingBottom: offsets[count] - offsets[end],
+    measureRow,
+  };
+}
@@ -0,0 +1,21 @@
+/**
+ * useInfiniteUniversities Hook
+ * Fetch the university list page by page for infinite scrolling
+ * Pages are cursor-based, so loading more never repeats or skips rows
+ */
+
+import { keepPreviousData, useInfiniteQuery } from '@tanstack/react-query';
+import { scrollUniversities } from '@/lib/api/universities';
+import { queryKeys } from '../queryKeys';
+import type { UniversityScrollFilters } from '@/types/api';
+
+export function useInfiniteUniversities(filters: UniversityScrollFilters = {}) {
+  return useInfiniteQuery({
+    queryKey: queryKeys.universities.infinite(filters),
+    queryFn: ({ pageParam }) => scrollUniversities(filters, pageParam),
+    initialPageParam: undefined as string | undefined,
+    getNextPageParam: (lastPage) => lastPage.next_cursor ?? undefined,
+    // Keep showing the current results (and filters) while new filters load
+    placeholderData: keepPreviousData,
+  });
+}
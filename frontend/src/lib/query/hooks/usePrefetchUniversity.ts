@@ -0,0 +1,49 @@
+/**
+ * usePrefetchUniversity Hook
+ * Warm the detail page's queries before the user opens it
+ *
+ * - seed: list items are full university documents, so a card entering the
+ *   viewport puts its data in the detail cache without a request
+ * - prefetch: hovering a card fetches the detail (batched, skipped while the
+ *   cached copy is fresh) and the similar universities
+ */
+
+import { useCallback } from 'react';
+import { useQueryClient } from '@tanstack/react-query';
+import { getSimilarUniversities, loadUniversity } from '@/lib/api/universities';
+import { queryKeys } from '../queryKeys';
+import type { University } from '@/types/api';
+
+/** Same limit as useSimilarUniversities' default, so the detail page hits the cache */
+const SIMILAR_LIMIT = 6;
+
+export function usePrefetchUniversity() {
+  const queryClient = useQueryClient();
+
+  const seed = useCallback(
+    (university: University) => {
+      const key = queryKeys.universities.detail(university._id);
+      if (queryClient.getQueryData(key) === undefined) {
+        queryClient.setQueryData(key, university);
+      }
+    },
+    [queryClient]
+  );
+
+  const prefetch = useCallback(
+    (university: University) => {
+      seed(university);
+      void queryClient.prefetchQuery({
+        queryKey: queryKeys.universities.detail(university._id),
+        queryFn: () => loadUniversity(university._id),
+      });
+      void queryClient.prefetchQuery({
+        queryKey: [...queryKeys.universities.similar(university._id), SIMILAR_LIMIT],
+        queryFn: () => getSimilarUniversities(university._id, SIMILAR_LIMIT),
+      });
+    },
+    [queryClient, seed]
+  );
+
+  return { seed, prefetch };
+}
@@ -0,0 +1,16 @@
+/**
+ * useSimilarUniversities Hook
+ * Fetch the precomputed most similar universities for a university
+ */
+
+import { useQuery } from '@tanstack/react-query';
+import { getSimilarUniversities } from '@/lib/api/universities';
+import { queryKeys } from '../queryKeys';
+
+export function useSimilarUniversities(id: string, limit = 6) {
+  return useQuery({
+    queryKey: [...queryKeys.universities.similar(id), limit],
+    queryFn: () => getSimilarUniversities(id, limit),
+    enabled: !!id,
+  });
+}
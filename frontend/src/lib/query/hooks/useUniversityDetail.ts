@@ -1,16 +1,17 @@
 /**
  * useUniversityDetail Hook
  * Fetch a single university by ID
+ * Detail lookups made in the same tick are batched into one request
  */
 
 import { useQuery } from '@tanstack/react-query';
-import { getUniversity } from '@/lib/api/universities';
+import { loadUniversity } from '@/lib/api/universities';
 import { queryKeys } from '../queryKeys';
 
 export function useUniversityDetail(id: string) {
   return useQuery({
     queryKey: queryKeys.universities.detail(id),
-    queryFn: () => getUniversity(id),
+    queryFn: () => loadUniversity(id),
     enabled: !!id, // Only fetch if id exists
   });
 }
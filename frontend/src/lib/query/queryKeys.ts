@@ -3,7 +3,7 @@
  * Organized and type-safe query keys for TanStack Query
  */
 
-import type { UniversityFilters } from '@/types/api';
+import type { UniversityFilters, UniversityScrollFilters } from '@/types/api';
 
 export const queryKeys = {
   // Universities
@@ -11,8 +11,11 @@ export const queryKeys = {
     all: ['universities'] as const,
     lists: () => [...queryKeys.universities.all, 'list'] as const,
     list: (filters: UniversityFilters) => [...queryKeys.universities.lists(), filters] as const,
+    infinite: (filters: UniversityScrollFilters) =>
+      [...queryKeys.universities.lists(), 'infinite', filters] as const,
     details: () => [...queryKeys.universities.all, 'detail'] as const,
     detail: (id: string) => [...queryKeys.universities.details(), id] as const,
+    similar: (id: string) => [...queryKeys.universities.all, 'similar', id] as const,
     search: (query: string) => [...queryKeys.universities.all, 'search', query] as const,
   },
 
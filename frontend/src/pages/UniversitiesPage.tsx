@@ -1,12 +1,12 @@
 import { Box, Container, Typography } from '@mui/material';
-import { useState, useMemo } from 'react';
+import { useCallback, useEffect, useState, useMemo } from 'react';
 import Navigation from '@/components/Navigation';
 import UniversityList from '@/components/UniversityList';
 import { PageTransition, UniversityListSkeleton, ErrorState } from '@/components';
-import { useUniversities } from '@/lib/query/hooks/useUniversities';
+import { useInfiniteUniversities } from '@/lib/query/hooks/useInfiniteUniversities';
 import { useSpecialties } from '@/lib/query/hooks/useSpecialties';
-import { extractCountries, extractSpecialtyNames } from '@/lib/api/mappers';
-import type { UniversityFilters } from '@/types/api';
+import { extractCountries } from '@/lib/api/mappers';
+import type { UniversityScrollFilters } from '@/types/api';
 
 /**
  * UniversitiesPage Component
@@ -15,25 +15,47 @@ import type { UniversityFilters } from '@/types/api';
  * Now powered by real API data with TanStack Query
  *
  * Features:
- * - API-powered university list with real-time data
+ * - API-powered university list, filtered on the server and loaded page by
+ *   page while scrolling
  * - Skeleton loaders during data fetching
  * - Error handling with retry functionality
  * - Responsive layout with Apple-style spacing
  * - Smooth page transitions
  */
 export default function UniversitiesPage() {
-  const [filters] = useState<UniversityFilters>({});
+  const [filters, setFilters] = useState<UniversityScrollFilters>({});
 
   // Fetch universities and specialties from API
-  const { data: universitiesData, isLoading, error, refetch } = useUniversities(filters);
+  const {
+    data: universitiesData,
+    isLoading,
+    error,
+    refetch,
+    hasNextPage,
+    isFetchingNextPage,
+    fetchNextPage,
+  } = useInfiniteUniversities(filters);
   const { data: specialtiesData } = useSpecialties();
 
-  // Extract filter options from data
-  const countries = useMemo(
-    () => (universitiesData?.items ? extractCountries(universitiesData.items) : []),
+  const universities = useMemo(
+    () => universitiesData?.pages.flatMap((page) => page.items) ?? [],
     [universitiesData]
   );
 
+  // Extract filter options from data, keeping countries seen before a
+  // country filter narrowed the results
+  const [countries, setCountries] = useState<string[]>([]);
+  useEffect(() => {
+    setCountries((previous) => {
+      const merged = new Set([...previous, ...extractCountries(universities)]);
+      return merged.size === previous.length ? previous : Array.from(merged).sort();
+    });
+  }, [universities]);
+
+  const loadMore = useCallback(() => {
+    void fetchNextPage();
+  }, [fetchNextPage]);
+
   const specialtyNames = useMemo(
     () => (specialtiesData ? specialtiesData.map((s) => s.name) : []),
     [specialtiesData]
@@ -72,9 +94,15 @@ export default function UniversitiesPage() {
             />
           ) : (
             <UniversityList
-              universities={universitiesData?.items || []}
+              universities={universities}
+              total={universitiesData?.pages[0]?.total ?? null}
+              filters={filters}
+              onFiltersChange={setFilters}
               countries={countries}
               specialties={specialtyNames}
+              hasMore={hasNextPage}
+              isLoadingMore={isFetchingNextPage}
+              onLoadMore={loadMore}
             />
           )}
         </Container>
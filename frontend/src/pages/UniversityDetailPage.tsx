@@ -26,6 +26,7 @@ import { Link, useParams } from '@tanstack/react-router';
 import Navigation from '@/components/Navigation';
 import { PageTransition, UniversityDetailSkeleton, ErrorState } from '@/components';
 import { useUniversityDetail } from '@/lib/query/hooks/useUniversityDetail';
+import { useSimilarUniversities } from '@/lib/query/hooks/useSimilarUniversities';
 
 /**
  * UniversityDetailPage Component
@@ -40,11 +41,13 @@ import { useUniversityDetail } from '@/lib/query/hooks/useUniversityDetail';
  * - Apple-style minimalist design with generous spacing
  * - Smooth page transitions
  * - Requirements breakdown by specialty
+ * - Similar universities
  * - Responsive layout with grid
  */
 export default function UniversityDetailPage() {
   const { id } = useParams({ from: '/universities/$id' });
   const { data: university, isLoading, error, refetch } = useUniversityDetail(id);
+  const { data: similar } = useSimilarUniversities(id);
 
   // Loading state
   if (isLoading) {
@@ -356,6 +359,41 @@ export default function UniversityDetailPage() {
               >
                 Apply Now
               </Button>
+
+              {/* Similar Universities */}
+              {similar && similar.items.length > 0 && (
+                <Card sx={{ mt: 4, borderRadius: 4 }}>
+                  <CardContent sx={{ p: 3 }}>
+                    <Stack direction="row" alignItems="center" spacing={2} sx={{ mb: 3 }}>
+                      <School color="primary" />
+                      <Typography variant="h6" sx={{ fontWeight: 500 }}>
+                        Similar Universities
+                      </Typography>
+                    </Stack>
+                    <Divider sx={{ mb: 2 }} />
+                    <Stack spacing={1}>
+                      {similar.items.map(({ university: match }) => (
+                        <Button
+                          key={match._id}
+                          component={Link}
+                          to="/universities/$id"
+                          params={{ id: match._id }}
+                          sx={{ justifyContent: 'flex-start', textAlign: 'left' }}
+                        >
+                          <Box>
+                            <Typography variant="body1" sx={{ fontWeight: 500 }}>
+                              {match.name}
+                            </Typography>
+                            <Typography variant="body2" color="text.secondary">
+                              {match.city}, {match.country}
+                            </Typography>
+                          </Box>
+                        </Button>
+                      ))}
+                    </Stack>
+                  </CardContent>
+                </Card>
+              )}
             </Grid>
           </Grid>
         </Container>
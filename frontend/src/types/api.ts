@@ -27,9 +27,16 @@ export interface University {
   tuition_fee_usd?: number;
   student_count?: number;
   acceptance_rate?: number;
+  location?: GeoPoint | null; // City location, used by the near filter
   logo?: string; // Optional logo URL
 }
 
+// GeoJSON point, coordinates are [longitude, latitude]
+export interface GeoPoint {
+  type: 'Point';
+  coordinates: [number, number];
+}
+
 // Specialty (from backend API)
 export interface Specialty {
   _id: string; // MongoDB ObjectId as string
@@ -47,6 +54,44 @@ export interface PaginatedResponse<T> {
   total_pages: number;
 }
 
+// Cursor-paginated response (GET /universities/scroll)
+export interface CursorPage<T> {
+  items: T[];
+  page_size: number;
+  next_cursor: string | null; // null on the last page
+  total: number | null; // Only counted for the first page
+}
+
+// Similar universities (GET /universities/{id}/similar), best match first
+export interface SimilarUniversity {
+  university: University;
+  score: number; // Cosine similarity, 0..1
+}
+
+export interface SimilarUniversitiesResponse {
+  items: SimilarUniversity[];
+}
+
+// Batch get response (GET/POST /universities/batch)
+export interface BatchUniversitiesResponse {
+  items: (University | null)[];
+  missing: string[];
+}
+
+// Delta sync (GET /changes)
+export type CatalogChange =
+  | { seq: number; collection: 'universities'; id: string; operation: 'upsert'; document: University }
+  | { seq: number; collection: 'specialties'; id: string; operation: 'upsert'; document: Specialty }
+  | { seq: number; collection: 'universities' | 'specialties'; id: string; operation: 'delete' };
+
+export interface ChangesPage {
+  since: number;
+  next_since: number;
+  resync_required: boolean;
+  has_more: boolean;
+  changes: CatalogChange[];
+}
+
 // University Filters (for API queries)
 export interface UniversityFilters {
   page?: number;
@@ -54,15 +99,31 @@ export interface UniversityFilters {
   country?: string;
   specialty?: string;
   min_score?: number;
-  sort_by?: 'name' | 'ranking' | 'tuition_fee' | 'acceptance_rate';
+  sort_by?: 'name' | 'ranking' | 'tuition_fee' | 'acceptance_rate' | 'distance'; // distance needs near
   sort_order?: 'asc' | 'desc';
+  min_tuition_fee_usd?: number;
+  max_tuition_fee_usd?: number;
+  min_ranking?: number;
+  max_ranking?: number;
+  min_acceptance_rate?: number;
+  max_acceptance_rate?: number;
+  min_student_count?: number;
+  max_student_count?: number;
+  near?: string; // "lat,lon"
+  radius_km?: number; // Requires near
 }
 
+// Filters for infinite scrolling (GET /universities/scroll): no page or geo search
+export type UniversityScrollFilters = Omit<UniversityFilters, 'page' | 'near' | 'radius_km' | 'sort_by'> & {
+  sort_by?: 'name' | 'ranking' | 'tuition_fee' | 'acceptance_rate';
+};
+
 // API Error Response
 export interface ApiError {
   message: string;
   detail?: string;
   status?: number;
+  retryAfter?: number; // Seconds, from the Retry-After header
 }
 
 // AI Recommendation Request